@@ -64,7 +64,7 @@ def read_csv_file(csv_path: str) -> list:
         return []
 
 def add_coupon_mappings(mappings: list) -> dict:
-    """쿠폰 매칭 데이터를 데이터베이스에 추가합니다."""
+    """쿠폰 매칭 데이터를 데이터베이스에 일괄 추가합니다. (없는 발급자는 이메일 @ 앞부분을 이름으로 생성)"""
     results = {
         'success': 0,
         'failed': 0,
@@ -72,36 +72,21 @@ def add_coupon_mappings(mappings: list) -> dict:
         'errors': []
     }
     
-    for mapping in mappings:
-        coupon_id = mapping['coupon_id']
-        issuer_email = mapping['issuer_email']
-        row_num = mapping['row_num']
-        
-        try:
-            # 발급자 이름은 이메일에서 @ 앞부분을 사용
-            issuer_name = issuer_email.split('@')[0]
-            
-            # 쿠폰을 발급자에게 할당
-            success = issuer_db_service.assign_coupon_to_issuer(
-                name=issuer_name,
-                coupon_id=coupon_id,
-                email=issuer_email
-            )
-            
-            if success:
-                results['success'] += 1
-                logger.info(f"✓ 행 {row_num}: 쿠폰 {coupon_id} → {issuer_email} 매칭 성공")
-            else:
-                results['failed'] += 1
-                error_msg = f"행 {row_num}: 쿠폰 {coupon_id} → {issuer_email} 매칭 실패"
-                results['errors'].append(error_msg)
-                logger.error(f"✗ {error_msg}")
-                
-        except Exception as e:
-            results['failed'] += 1
-            error_msg = f"행 {row_num}: 쿠폰 {coupon_id} → {issuer_email} 처리 중 오류: {e}"
-            results['errors'].append(error_msg)
-            logger.error(f"✗ {error_msg}")
+    try:
+        report = issuer_db_service.bulk_assign_coupons(
+            (str(mapping['coupon_id']), mapping['issuer_email'], '') for mapping in mappings
+        )
+        results['success'] = report['inserted'] + report['updated'] + report['unchanged']
+        results['skipped'] = report['rows'] - results['success']
+        logger.info(
+            f"일괄 매칭 결과: 신규 {report['inserted']}개, 재할당 {report['updated']}개, "
+            f"변경 없음 {report['unchanged']}개"
+        )
+    except Exception as e:
+        results['failed'] = len(mappings)
+        error_msg = f"쿠폰 매칭 일괄 처리 중 오류: {e}"
+        results['errors'].append(error_msg)
+        logger.error(f"✗ {error_msg}")
     
     return results
 
@@ -8,6 +8,8 @@ import os
 import logging
 from datetime import datetime
 
+from admin_jobs import report_progress
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,7 +42,8 @@ def add_final_issuers(conn):
     
     added_count = 0
     
-    for issuer in final_issuers:
+    for index, issuer in enumerate(final_issuers, start=1):
+        report_progress(index, len(final_issuers))
         try:
             # 발행자 추가
             cursor.execute("""
@@ -6,7 +6,9 @@
 import psycopg2
 import os
 import logging
-from datetime import datetime
+
+from admin_jobs import report_progress
+from mapping_bulk_loader import load_mapping_rows
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -27,8 +29,6 @@ def get_database_connection():
 
 def add_final_mappings(conn):
     """최종 발행자들에게 쿠폰 매핑을 추가합니다."""
-    cursor = conn.cursor()
-    
     # 쿠폰-발행자 매핑 데이터
     mappings = [
         (154632, "oh@butfitseoul.com"),
@@ -88,31 +88,19 @@ def add_final_mappings(conn):
         (147251, "srjang@butfitseoul.com")
     ]
     
-    added_count = 0
-    
-    for coupon_id, issuer_email in mappings:
-        try:
-            # 매핑 추가
-            cursor.execute("""
-                INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email, assigned_at)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (coupon_id) DO NOTHING
-            """, (
-                coupon_id,
-                issuer_email,
-                datetime.now()
-            ))
-            
-            if cursor.rowcount > 0:
-                added_count += 1
-                logger.info(f"매핑 추가: 쿠폰 {coupon_id} -> {issuer_email}")
-            else:
-                logger.info(f"매핑 이미 존재: 쿠폰 {coupon_id} -> {issuer_email}")
-                
-        except Exception as e:
-            logger.error(f"매핑 추가 실패 쿠폰 {coupon_id}: {e}")
-    
-    conn.commit()
+    # 이미 할당된 쿠폰은 유지 (재할당하지 않음)
+    report = load_mapping_rows(
+        conn,
+        ((str(coupon_id), issuer_email, '') for coupon_id, issuer_email in mappings),
+        reassign=False
+    )
+    report_progress(len(mappings), len(mappings))
+
+    added_count = report['inserted']
+    if report['skipped_existing'] or report['unchanged']:
+        logger.info(f"매핑 이미 존재: {report['skipped_existing'] + report['unchanged']}개")
+    if report['skipped_unknown_issuer']:
+        logger.warning(f"미등록 발행자로 건너뛴 매핑: {report['skipped_unknown_issuer']}개")
     logger.info(f"총 {added_count}개의 매핑이 추가되었습니다.")
     return added_count
 
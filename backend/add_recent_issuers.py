@@ -9,6 +9,8 @@ import os
 import logging
 from datetime import datetime
 
+from admin_jobs import report_progress
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,7 +47,8 @@ def add_recent_issuers(conn):
     added_count = 0
     skipped_count = 0
     
-    for name, email, phone in recent_issuers:
+    for index, (name, email, phone) in enumerate(recent_issuers, start=1):
+        report_progress(index, len(recent_issuers))
         try:
             # 기존 발행자 확인
             cursor.execute("SELECT id FROM coupon_issuers WHERE email = %s", (email,))
@@ -0,0 +1,216 @@
+import importlib
+import logging
+import os
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from worker_bus import worker_bus
+
+logger = logging.getLogger(__name__)
+
+# 동시에 실행할 수 있는 관리자 작업 수와 보관할 작업 이력 수
+ADMIN_JOB_WORKERS = int(os.getenv("ADMIN_JOB_WORKERS", "2"))
+ADMIN_JOB_HISTORY = int(os.getenv("ADMIN_JOB_HISTORY", "100"))
+# 작업당 보관할 출력 줄 수 (초과분은 앞에서부터 버림)
+ADMIN_JOB_OUTPUT_LINES = int(os.getenv("ADMIN_JOB_OUTPUT_LINES", "2000"))
+
+_current = threading.local()
+
+def report_progress(done: int, total: Optional[int] = None):
+    """실행 중인 관리자 작업의 진행 상황을 갱신합니다. 작업 밖(스크립트 단독 실행)에서는 무시됩니다."""
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        job.progress['done'] = done
+        if total is not None:
+            job.progress['total'] = total
+
+class _JobOutputHandler(logging.Handler):
+    """작업 실행 스레드에서 기록된 로그만 해당 작업의 출력으로 수집합니다."""
+
+    def __init__(self, job: 'AdminJob'):
+        super().__init__(level=logging.INFO)
+        self.job = job
+        self.thread_id = threading.get_ident()
+        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    def emit(self, record: logging.LogRecord):
+        if record.thread != self.thread_id:
+            return
+        self.job.append_output(self.format(record))
+        if record.levelno >= logging.ERROR:
+            self.job.progress['errors'] += 1
+        elif record.levelno >= logging.WARNING:
+            self.job.progress['warnings'] += 1
+
+class AdminJob:
+    """관리자 작업 한 건의 상태"""
+
+    def __init__(self, name: str, description: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.description = description
+        self.status = 'queued'  # queued -> running -> success | error
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.progress = {'done': 0, 'total': None, 'warnings': 0, 'errors': 0}
+        self._output: List[str] = []
+        self._lock = threading.Lock()
+
+    def append_output(self, line: str):
+        with self._lock:
+            self._output.append(line)
+            if len(self._output) > ADMIN_JOB_OUTPUT_LINES:
+                del self._output[:len(self._output) - ADMIN_JOB_OUTPUT_LINES]
+
+    def to_dict(self, include_output: bool = True) -> Dict:
+        data = {
+            'job_id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'progress': dict(self.progress),
+            'error': self.error
+        }
+        if include_output:
+            with self._lock:
+                data['output'] = '\n'.join(self._output)
+        return data
+
+class AdminJobRunner:
+    """관리자 스크립트를 프로세스 내부 워커 풀에서 실행하는 작업 실행기
+
+    스크립트마다 새 파이썬 인터프리터를 띄우지 않고, 등록된 callable을 스레드 풀에서
+    실행하며 작업 ID로 상태/진행률/출력을 조회할 수 있게 합니다.
+    """
+
+    def __init__(self, max_workers: int = ADMIN_JOB_WORKERS, history: int = ADMIN_JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="admin-job")
+        self._registry: Dict[str, Dict] = {}
+        self._jobs: 'OrderedDict[str, AdminJob]' = OrderedDict()
+        # 다른 워커에서 실행 중이거나 끝난 작업의 상태 (출력 제외)
+        self._remote_jobs: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._history = history
+        self._lock = threading.Lock()
+        worker_bus.subscribe('admin_job', self._apply_remote)
+
+    def register(self, name: str, func: Callable[[], bool], description: str = ""):
+        """작업을 등록합니다. func은 성공 여부(bool)를 반환해야 합니다."""
+        self._registry[name] = {'func': func, 'description': description}
+
+    def register_script(self, name: str, module_name: str, description: str = ""):
+        """스크립트 모듈의 main()을 작업으로 등록합니다. 모듈은 처음 실행될 때 import됩니다."""
+        def run_script():
+            module = importlib.import_module(module_name)
+            return module.main()
+        self.register(name, run_script, description)
+
+    def registered(self) -> List[Dict]:
+        return [{'name': name, 'description': entry['description']} for name, entry in self._registry.items()]
+
+    def submit(self, name: str) -> AdminJob:
+        """작업을 실행 대기열에 넣고 즉시 반환합니다."""
+        entry = self._registry.get(name)
+        if entry is None:
+            raise KeyError(name)
+
+        job = AdminJob(name, entry['description'])
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+        self._publish(job)
+        self._executor.submit(self._run, job, entry['func'])
+        logger.info(f"관리자 작업 등록: {name} ({job.id})")
+        return job
+
+    def get(self, job_id: str) -> Optional[AdminJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_dict(self, job_id: str, include_output: bool = True) -> Optional[Dict]:
+        """작업 상태를 반환합니다. 다른 워커에서 실행된 작업은 출력 없이 상태만 반환합니다."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict(include_output)
+        with self._lock:
+            remote = self._remote_jobs.get(job_id)
+        if remote is None:
+            return None
+        return {**remote, 'output': None} if include_output else dict(remote)
+
+    def list_jobs(self) -> List[AdminJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def list_job_dicts(self) -> List[Dict]:
+        """이 워커와 다른 워커의 작업 이력을 최신순으로 반환합니다. (출력 제외)"""
+        with self._lock:
+            jobs = [job.to_dict(include_output=False) for job in self._jobs.values()]
+            jobs.extend(dict(remote) for job_id, remote in self._remote_jobs.items() if job_id not in self._jobs)
+        jobs.sort(key=lambda job: job['created_at'], reverse=True)
+        return jobs[:self._history]
+
+    def _publish(self, job: AdminJob):
+        worker_bus.publish('admin_job', job.to_dict(include_output=False))
+
+    def _apply_remote(self, data: Dict):
+        job_id = data.get('job_id')
+        if not job_id:
+            return
+        with self._lock:
+            self._remote_jobs[job_id] = data
+            self._remote_jobs.move_to_end(job_id)
+            while len(self._remote_jobs) > self._history:
+                self._remote_jobs.popitem(last=False)
+
+    def _run(self, job: AdminJob, func: Callable[[], bool]):
+        handler = _JobOutputHandler(job)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(handler)
+        _current.job = job
+        job.status = 'running'
+        job.started_at = datetime.now()
+        self._publish(job)
+        try:
+            success = func()
+            job.status = 'success' if success is not False else 'error'
+            if job.status == 'error':
+                job.error = "작업이 실패를 반환했습니다. 출력을 확인해주세요."
+        except Exception as e:
+            job.status = 'error'
+            job.error = str(e)
+            job.append_output(traceback.format_exc())
+            logger.error(f"관리자 작업 실패: {job.name} ({job.id}): {e}")
+        finally:
+            job.finished_at = datetime.now()
+            _current.job = None
+            root_logger.removeHandler(handler)
+            self._publish(job)
+            logger.info(f"관리자 작업 종료: {job.name} ({job.id}) - {job.status}")
+
+# 전역 관리자 작업 실행기
+admin_job_runner = AdminJobRunner()
+admin_job_runner.register_script("restore_issuer_data", "restore_issuer_data", "발행자 데이터 복구")
+admin_job_runner.register_script("add_recent_issuers", "add_recent_issuers", "최근 발행자 데이터 복구")
+admin_job_runner.register_script("restore_log_data", "restore_log_data", "로그에서 복구된 발행자 데이터 복구")
+admin_job_runner.register_script("fix_issuer_names", "fix_issuer_names", "발행자 이름 수정")
+admin_job_runner.register_script("export_issuer_data", "export_issuer_data", "발행자 데이터 CSV 추출")
+admin_job_runner.register_script("add_final_issuers", "add_final_issuers", "최종 발행자 5명 추가")
+admin_job_runner.register_script("add_final_mappings", "add_final_mappings", "최종 쿠폰 매핑 추가")
+admin_job_runner.register_script("refresh_statistics", "statistics_rollup", "통계 집계 증분 갱신")
+
+def _rebuild_statistics() -> bool:
+    from statistics_rollup import statistics_rollup
+    return statistics_rollup.refresh(full=True) is not None
+
+admin_job_runner.register("rebuild_statistics", _rebuild_statistics, "통계 집계 전체 재구성")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+쿠폰 목록 행 변환 벤치마크 스크립트
+get_coupons_from_db의 기존 dict(zip()) + strftime + _format_discount 루프와
+SQL 포맷팅 + 튜플 기반 map_coupon_rows 변환의 Python CPU 비용을 합성 데이터로 비교합니다.
+
+--database-url(또는 BENCH_DATABASE_URL)을 주면 DB에서 실제 COUPON_LIST_SELECT 결과와
+기존 SELECT + 기존 변환 루프의 결과를 같은 쿠폰에 대해 비교합니다. (예: bench_dataset.py로 만든 DB)
+dc_amount/dc_rate가 NUMERIC/실수 컬럼이면 SQL 포맷팅은 소수부를 표시하지 않으므로 ('45,000원' / Python '45,000.00원')
+그런 DB에서는 불일치로 보고됩니다.
+
+사용법: python bench_row_mapping.py [행 수 ...] [--database-url postgresql://...]   (기본: 1000 10000)
+"""
+
+import os
+import sys
+import time
+import logging
+from datetime import date, timedelta
+
+import psycopg2
+
+from database import COUPON_LIST_FROM, COUPON_LIST_SELECT, DatabaseService, map_coupon_rows
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+BENCH_DATABASE_URL = os.getenv('BENCH_DATABASE_URL')
+
+LEGACY_COLUMNS = [
+    'id', 'status', 'code', 'title', 'discount_amount', 'discount_rate', 'expiry_date',
+    'store_name', 'provider_name', 'standard_price', 'user_id', 'registered_user_name',
+    'payment_status', 'used'
+]
+
+def make_legacy_rows(count: int) -> list:
+    """기존 SELECT 형태(포맷팅 전)의 합성 행을 만듭니다."""
+    base = date(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        used = i % 3 == 0
+        rows.append((
+            200000 - i, '사용가능', f'CODE{i:06d}', f'패밀리 쿠폰) PT {i % 7}회',
+            45000 if i % 2 else 0, 0 if i % 2 else 50, base + timedelta(days=i % 365),
+            f'버핏서울 {i % 20}호점', None, 90000, i if used else None,
+            f'회원{i}' if used else None, '결제완료' if used else '미결제', used
+        ))
+    return rows
+
+# 변경 전 get_coupons_from_db의 SELECT (포맷팅 전 컬럼, 컬럼 순서는 LEGACY_COLUMNS)
+LEGACY_SELECT = f"""
+            SELECT
+                a.id,
+                CASE
+                    WHEN a.date_expired > CURRENT_DATE THEN '사용가능'
+                    WHEN a.date_expired <= CURRENT_DATE THEN '만료'
+                    WHEN a.date_expired IS NULL THEN '사용가능'
+                END as status,
+                a.code_value as code,
+                a.title,
+                a.dc_amount as discount_amount,
+                a.dc_rate as discount_rate,
+                a.date_expired as expiry_date,
+                b.name as store_name,
+                c.name as provider_name,
+                a.standard_price,
+                e.id as user_id,
+                e.name as registered_user_name,
+                CASE
+                    WHEN d.is_used = TRUE THEN '결제완료'
+                    ELSE '미결제'
+                END as payment_status,
+                CASE
+                    WHEN d.is_used = TRUE THEN true
+                    ELSE false
+                END as used{COUPON_LIST_FROM}"""
+
+def make_formatted_rows(legacy_rows: list) -> list:
+    """합성 행을 COUPON_LIST_SELECT 형태(포맷팅 완료)로 바꿉니다. (CPU 비교용, SQL 포맷팅 검증은 compare_on_database)"""
+    service = DatabaseService()
+    rows = []
+    for r in legacy_rows:
+        rows.append((
+            r[0], r[3] or '쿠폰명 없음', service._format_discount(r[4], r[5]),
+            r[6].strftime('%Y-%m-%d') if r[6] else '-', r[7] or r[8] or '알 수 없음',
+            r[1], r[2] or '', r[9], r[11] or '미등록', r[12]
+        ))
+    return rows
+
+def legacy_convert(service: DatabaseService, columns: list, results: list, issuer_mapping: dict) -> list:
+    """변경 전 get_coupons_from_db의 변환 루프"""
+    coupon_ids = [dict(zip(columns, row)).get('id') for row in results]
+    coupons = []
+    for row in results:
+        coupon_dict = dict(zip(columns, row))
+        if coupon_dict.get('expiry_date'):
+            coupon_dict['expiry_date'] = coupon_dict['expiry_date'].strftime('%Y-%m-%d')
+        else:
+            coupon_dict['expiry_date'] = '-'
+        issuer_email = issuer_mapping.get(coupon_dict.get('id'))
+        registered_by = coupon_dict.get('registered_user_name') or '미등록'
+        coupons.append({
+            'id': coupon_dict.get('id'),
+            'name': coupon_dict.get('title') or '쿠폰명 없음',
+            'discount': service._format_discount(coupon_dict.get('discount_amount'), coupon_dict.get('discount_rate')),
+            'expiration_date': coupon_dict['expiry_date'],
+            'store': coupon_dict.get('store_name') or coupon_dict.get('provider_name') or '알 수 없음',
+            'status': coupon_dict.get('status', '사용가능'),
+            'code': coupon_dict.get('code') or '',
+            'standard_price': coupon_dict.get('standard_price', 0),
+            'registered_by': registered_by,
+            'issuer': issuer_email or '',
+            'payment_status': coupon_dict.get('payment_status', '미결제'),
+            'additional_info': ''
+        })
+    return coupons
+
+def compare_on_database(database_url: str, limit: int) -> bool:
+    """DB의 쿠폰 limit개(id 역순)에 대해 COUPON_LIST_SELECT + map_coupon_rows와 기존 SELECT + 기존 루프 결과를 비교합니다."""
+    service = DatabaseService()
+    conn = psycopg2.connect(database_url)
+    try:
+        cursor = conn.cursor()
+        # 두 쿼리 모두 리터럴 '%%'를 쓰므로 파라미터와 함께 실행
+        cursor.execute(f"{COUPON_LIST_SELECT}\nORDER BY a.id DESC LIMIT %s", (limit,))
+        formatted_rows = cursor.fetchall()
+        cursor.execute(f"{LEGACY_SELECT}\nORDER BY a.id DESC LIMIT %s", (limit,))
+        legacy_rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    issuer_mapping = {row[0]: 'issuer@butfitseoul.com' for row in legacy_rows[::4]}
+    legacy = legacy_convert(service, LEGACY_COLUMNS, legacy_rows, issuer_mapping)
+    mapped = map_coupon_rows(formatted_rows, issuer_mapping)
+    mismatches = [(old, new) for old, new in zip(legacy, mapped) if old != new]
+    if len(legacy) != len(mapped):
+        logger.error(f"DB 비교: 행 수가 다릅니다 (기존 {len(legacy)}행 / SQL 포맷팅 {len(mapped)}행)")
+        return False
+    for old, new in mismatches[:5]:
+        diff = {key: (old[key], new[key]) for key in old if old[key] != new.get(key)}
+        logger.error(f"DB 비교 불일치 (쿠폰 {old['id']}): {diff}")
+    if mismatches:
+        logger.error(f"DB 비교: {len(mapped)}행 중 {len(mismatches)}행이 일치하지 않습니다.")
+        return False
+    logger.info(f"DB 비교: {len(mapped)}행 모두 기존 변환 결과와 일치합니다.")
+    return True
+
+def best_of(func, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    """메인 실행 함수"""
+    args = sys.argv[1:]
+    database_url = BENCH_DATABASE_URL
+    sizes = []
+    while args:
+        arg = args.pop(0)
+        if arg == '--database-url' and args:
+            database_url = args.pop(0)
+        else:
+            sizes.append(int(arg))
+    sizes = sizes or [1000, 10000]
+    service = DatabaseService()
+
+    if database_url:
+        try:
+            if not compare_on_database(database_url, max(sizes)):
+                return False
+        except Exception as e:
+            logger.error(f"DB 비교 실패: {e}")
+            return False
+
+    for size in sizes:
+        legacy_rows = make_legacy_rows(size)
+        formatted_rows = make_formatted_rows(legacy_rows)
+        issuer_mapping = {row[0]: 'issuer@butfitseoul.com' for row in legacy_rows[::4]}
+
+        legacy_time = best_of(lambda: legacy_convert(service, LEGACY_COLUMNS, legacy_rows, issuer_mapping))
+        mapped_time = best_of(lambda: map_coupon_rows(formatted_rows, issuer_mapping))
+        logger.info(
+            f"{size:>7}행: 기존 루프 {legacy_time * 1000:8.2f}ms / map_coupon_rows {mapped_time * 1000:8.2f}ms "
+            f"({legacy_time / mapped_time:.1f}배)"
+        )
+
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+쿠폰 API 벤치마크 스크립트
+합성 데이터셋(bench_dataset.py)을 크기별로 만들고 서버를 띄워, main.py의 모든 GET 라우트와 주요 필터 조합에
+동시 부하를 걸어 p50/p95/p99 지연 시간과 처리량을 측정합니다.
+
+- 라우트 목록은 서버의 /openapi.json에서 가져오므로 새 라우트도 자동으로 측정됩니다.
+- 쓰기 라우트(POST/PUT/PATCH/DELETE)는 데이터셋을 바꾸므로 측정하지 않고 보고서에 목록만 남깁니다.
+- 결과는 커밋 해시와 함께 JSON으로 저장하고, --compare로 이전 보고서와 p95를 비교합니다.
+
+사용법: python benchmark.py [--sizes 10k,100k,1m] [--duration 5] [--clients 2] [--connections 8]
+                            [--workers 1] [--output bench_report.json] [--compare 이전_report.json]
+  BENCH_DATABASE_URL이 없으면 로컬 PostgreSQL(initdb/pg_ctl 또는 docker)을 띄웁니다.
+"""
+
+import http.client
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from urllib.parse import quote
+
+import jwt
+
+from bench_dataset import bench_coupon_code, bench_issuer_email, database_env, open_bench_database, parse_size, seed_dataset
+from load_test import LOAD_TEST_HOST, client_worker, measure, start_server, stop_server
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BENCH_PORT = int(os.getenv('BENCH_PORT', '8766'))
+# --compare에서 p95가 이 배율 이상 늘어나면 회귀로 판단
+BENCH_REGRESSION_THRESHOLD = float(os.getenv('BENCH_REGRESSION_THRESHOLD', '1.25'))
+
+# 경로 파라미터에 넣을 값 (합성 데이터셋 기준)
+BENCH_PATH_PARAMS = {
+    'team_id': 'teamb',
+    'issuer_email': bench_issuer_email(1),
+    'coupon_id': '10',
+    'code': bench_coupon_code(1),
+    'job_id': 'bench-missing-job',
+}
+
+# 라우트 기본 호출 외에 따로 측정할 필터 조합
+BENCH_EXTRA_SCENARIOS = [
+    '/api/coupons?page=20&size=50',
+    '/api/teams/teamb/coupons?search=' + quote('피트니스'),
+    '/api/teams/teamb/coupons?search=' + quote(bench_coupon_code(1).lower()),
+    '/api/teams/teamb/coupons?issuer=' + quote(bench_issuer_email(1)),
+    '/api/teams/teamb/coupons?unassigned=true',
+    '/api/teams/teamb/coupons?coupon_names=' + quote('프렌즈 쿠폰) 1DAY 쿠폰'),
+    '/api/teams/timberland/coupons',
+    '/api/teams/timberland/statistics',
+]
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return ''
+
+def _issuer_token(secret: str) -> str:
+    """발행자 인증이 필요한 라우트용 JWT (main.py의 create_access_token과 같은 형식)"""
+    payload = {'sub': bench_issuer_email(1), 'exp': datetime.utcnow() + timedelta(hours=1)}
+    return jwt.encode(payload, secret, algorithm='HS256')
+
+def discover_routes(port: int) -> Tuple[List[str], List[str]]:
+    """서버의 OpenAPI 문서에서 (측정할 GET 경로 목록, 측정하지 않는 쓰기 라우트 목록)을 만듭니다."""
+    conn = http.client.HTTPConnection(LOAD_TEST_HOST, port, timeout=30)
+    conn.request('GET', '/openapi.json')
+    spec = json.loads(conn.getresponse().read())
+    conn.close()
+
+    paths, skipped = [], []
+    for route, operations in spec.get('paths', {}).items():
+        for method in operations:
+            if method != 'get':
+                skipped.append(f"{method.upper()} {route}")
+                continue
+            names = re.findall(r'\{(\w+)\}', route)
+            missing = [name for name in names if name not in BENCH_PATH_PARAMS]
+            if missing:
+                skipped.append(f"GET {route} (경로 파라미터 값 없음: {', '.join(missing)})")
+                continue
+            paths.append(re.sub(r'\{(\w+)\}', lambda m: quote(BENCH_PATH_PARAMS[m.group(1)], safe=''), route))
+    return paths + BENCH_EXTRA_SCENARIOS, skipped
+
+def benchmark_dataset(database_url: str, coupons: int, options: Dict) -> Dict:
+    """데이터셋 하나를 만들고 모든 경로를 측정합니다."""
+    dataset = seed_dataset(database_url, coupons)
+    env = dict(os.environ, **database_env(database_url))
+    env.setdefault('JWT_SECRET_KEY', 'your-secret-key-here')
+    headers = {'Authorization': f"Bearer {_issuer_token(env['JWT_SECRET_KEY'])}"}
+
+    with open(options['server_log'], 'a') as log_file:
+        server = start_server(options['workers'], BENCH_PORT, env, log_file)
+        try:
+            # 발행자 DB 초기화가 끝날 때까지 대기
+            for _ in range(60):
+                conn = http.client.HTTPConnection(LOAD_TEST_HOST, BENCH_PORT, timeout=5)
+                conn.request('GET', '/api/ready')
+                ready = conn.getresponse().status == 200
+                conn.close()
+                if ready:
+                    break
+                time.sleep(1)
+
+            paths, skipped = discover_routes(BENCH_PORT)
+            routes = []
+            for path in paths:
+                # 예열 1회 후 측정
+                client_worker((BENCH_PORT, path, 0.5, 1, headers))
+                result = {'path': path, **measure(BENCH_PORT, path, options['duration'], options['clients'],
+                                                  options['connections'], headers)}
+                routes.append(result)
+                logger.info(
+                    f"[{coupons}] {path}: p50 {result['p50_ms']}ms, p95 {result['p95_ms']}ms, "
+                    f"p99 {result['p99_ms']}ms, {result['rps']} req/s, 오류 {result['errors']}건"
+                )
+        finally:
+            stop_server(server)
+
+    return {**dataset, 'routes': routes, 'skipped': skipped}
+
+def compare_reports(previous: Dict, current: Dict) -> List[Dict]:
+    """같은 데이터셋 크기/경로의 p95를 비교해 BENCH_REGRESSION_THRESHOLD 이상 느려진 항목을 반환합니다."""
+    previous_p95 = {
+        (dataset['coupons'], route['path']): route['p95_ms']
+        for dataset in previous.get('datasets', []) for route in dataset['routes']
+    }
+    regressions = []
+    for dataset in current['datasets']:
+        for route in dataset['routes']:
+            before = previous_p95.get((dataset['coupons'], route['path']))
+            if not before:
+                continue
+            ratio = route['p95_ms'] / before
+            logger.info(f"[{dataset['coupons']}] {route['path']}: p95 {before}ms -> {route['p95_ms']}ms ({ratio:.2f}배)")
+            if ratio >= BENCH_REGRESSION_THRESHOLD:
+                regressions.append({'coupons': dataset['coupons'], 'path': route['path'],
+                                    'before_ms': before, 'after_ms': route['p95_ms'], 'ratio': round(ratio, 2)})
+    return regressions
+
+def main():
+    """메인 실행 함수"""
+    args = sys.argv[1:]
+    sizes = ['10k']
+    options = {'duration': 5.0, 'clients': 2, 'connections': 8, 'workers': 1, 'server_log': 'bench_server.log'}
+    output_path = 'bench_report.json'
+    compare_path = None
+    database_url = None
+    while args:
+        arg = args.pop(0)
+        if arg == '--sizes' and args:
+            sizes = args.pop(0).split(',')
+        elif arg == '--duration' and args:
+            options['duration'] = float(args.pop(0))
+        elif arg in ('--clients', '--connections', '--workers') and args:
+            options[arg.lstrip('-')] = int(args.pop(0))
+        elif arg == '--output' and args:
+            output_path = args.pop(0)
+        elif arg == '--compare' and args:
+            compare_path = args.pop(0)
+        elif arg == '--database-url' and args:
+            database_url = args.pop(0)
+
+    try:
+        database_url, stop_database = open_bench_database(database_url)
+    except Exception as e:
+        logger.error(f"벤치마크 DB 준비 실패: {e}")
+        return False
+
+    report = {
+        'commit': _git_commit(),
+        'created_at': datetime.now().isoformat(),
+        'settings': {**options, 'sizes': sizes, 'cpu_count': os.cpu_count()},
+        'datasets': []
+    }
+    try:
+        for size in sizes:
+            report['datasets'].append(benchmark_dataset(database_url, parse_size(size), options))
+    except Exception as e:
+        logger.error(f"벤치마크 실패: {e}")
+        return False
+    finally:
+        stop_database()
+
+    with open(output_path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    logger.info(f"벤치마크 보고서를 저장했습니다: {output_path}")
+
+    if compare_path:
+        with open(compare_path, 'r', encoding='utf-8') as file:
+            regressions = compare_reports(json.load(file), report)
+        for regression in regressions:
+            logger.error(
+                f"성능 회귀: [{regression['coupons']}] {regression['path']} "
+                f"p95 {regression['before_ms']}ms -> {regression['after_ms']}ms ({regression['ratio']}배)"
+            )
+        return not regressions
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
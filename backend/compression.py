@@ -0,0 +1,175 @@
+import gzip
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli 미설치 환경에서는 gzip만 사용
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 압축 설정 - 환경 변수로 조정 가능
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# 압축 대상 경로 (목록/통계 응답)
+COMPRESSED_ROUTES: List[Tuple[str, str]] = [
+    ("/coupons", r"^/coupons$"),
+    ("/api/coupons", r"^/api/coupons$"),
+    ("/api/teams/{team_id}/coupons", r"^/api/teams/[^/]+/coupons$"),
+    ("/api/statistics", r"^/api/statistics$"),
+    ("/api/teams/{team_id}/statistics", r"^/api/teams/[^/]+/statistics$"),
+]
+
+
+class CompressionStats:
+    """경로별 전송 바이트와 압축 CPU 시간을 집계합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def record(self, route: str, raw_bytes: int, wire_bytes: int, cpu_seconds: float, encoding: Optional[str]):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                'requests': 0,
+                'compressed_requests': 0,
+                'raw_bytes': 0,
+                'wire_bytes': 0,
+                'cpu_seconds': 0.0,
+                'encodings': {}
+            })
+            stats['requests'] += 1
+            stats['raw_bytes'] += raw_bytes
+            stats['wire_bytes'] += wire_bytes
+            stats['cpu_seconds'] += cpu_seconds
+            if encoding:
+                stats['compressed_requests'] += 1
+                stats['encodings'][encoding] = stats['encodings'].get(encoding, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """경로별 통계와 압축률, 평균 CPU 시간을 반환합니다."""
+        with self._lock:
+            result = {}
+            for route, stats in self._routes.items():
+                raw_bytes = stats['raw_bytes']
+                compressed = stats['compressed_requests']
+                result[route] = {
+                    'requests': stats['requests'],
+                    'compressed_requests': compressed,
+                    'raw_bytes': raw_bytes,
+                    'wire_bytes': stats['wire_bytes'],
+                    'saved_bytes': raw_bytes - stats['wire_bytes'],
+                    'compression_ratio': round(stats['wire_bytes'] / raw_bytes, 3) if raw_bytes else 1.0,
+                    'cpu_ms_total': round(stats['cpu_seconds'] * 1000, 3),
+                    'cpu_ms_per_compressed_response': round(stats['cpu_seconds'] * 1000 / compressed, 3) if compressed else 0.0,
+                    'encodings': dict(stats['encodings'])
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding 헤더를 {인코딩: q값} 형태로 파싱합니다."""
+    accepted = {}
+    for part in header.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+class ResponseCompressionMiddleware(BaseHTTPMiddleware):
+    """지정된 경로의 JSON 응답을 gzip/brotli로 압축합니다."""
+
+    def __init__(self, app, routes: List[Tuple[str, str]] = None, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 gzip_level: int = COMPRESSION_GZIP_LEVEL, brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+                 stats: CompressionStats = None):
+        super().__init__(app)
+        self.routes = [(label, re.compile(pattern)) for label, pattern in (routes or COMPRESSED_ROUTES)]
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats or compression_stats
+
+    def _match_route(self, path: str) -> Optional[str]:
+        for label, pattern in self.routes:
+            if pattern.match(path):
+                return label
+        return None
+
+    def _choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """q값이 가장 높은 인코딩을 고릅니다. (q값이 같으면 br 우선)"""
+        accepted = _parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+        candidates = (['br'] if brotli is not None else []) + ['gzip']
+        best = max(candidates, key=lambda name: accepted.get(name, wildcard))
+        return best if accepted.get(best, wildcard) > 0 else None
+
+    def _compress(self, body: bytes, encoding: str) -> Tuple[bytes, float]:
+        """본문을 압축하고 (압축 결과, 압축에 쓴 CPU 시간)을 반환합니다. (스레드풀에서 실행)"""
+        started = time.thread_time()
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level)
+        return compressed, time.thread_time() - started
+
+    async def dispatch(self, request: Request, call_next):
+        route = self._match_route(request.url.path)
+        if route is None:
+            return await call_next(request)
+
+        response = await call_next(request)
+        # 압축 여부가 Accept-Encoding에 따라 달라지므로 압축하지 않는 응답에도 Vary를 붙입니다. (캐시 오염 방지)
+        if 'content-encoding' in response.headers:
+            response.headers.add_vary_header('Accept-Encoding')
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = MutableHeaders(raw=list(response.raw_headers))
+        headers.add_vary_header('Accept-Encoding')
+        encoding = self._choose_encoding(request.headers.get('accept-encoding', ''))
+
+        if encoding is None or len(body) < self.minimum_size:
+            self.stats.record(route, len(body), len(body), 0.0, None)
+            return Response(content=body, status_code=response.status_code, headers=headers,
+                            background=response.background)
+
+        # 큰 응답의 압축이 이벤트 루프를 막지 않도록 스레드풀에서 실행합니다.
+        compressed, cpu_seconds = await run_in_threadpool(self._compress, body, encoding)
+        self.stats.record(route, len(body), len(compressed), cpu_seconds, encoding)
+
+        headers['content-encoding'] = encoding
+        headers['content-length'] = str(len(compressed))
+        return Response(content=compressed, status_code=response.status_code, headers=headers,
+                        background=response.background)
+
+
+# 전역 압축 통계 인스턴스
+compression_stats = CompressionStats()
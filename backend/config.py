@@ -22,18 +22,52 @@ def _get_env_with_default(key: str, default: str) -> str:
     """선택적 환경 변수를 가져옵니다. 없으면 기본값을 사용합니다."""
     return os.getenv(key, default)
 
-class DatabaseConfig:
+class _LazyEnvConfigMeta(type):
+    """클래스 속성에 처음 접근할 때 환경 변수를 읽어오도록 합니다.
+
+    import 시점에는 환경 변수를 확인하지 않으므로, 설정이 없는 환경에서도
+    모듈 import 자체는 실패하지 않습니다.
+    """
+
+    def __getattr__(cls, name):
+        spec = cls.__dict__.get('_ENV_KEYS', {}).get(name)
+        if spec is None:
+            raise AttributeError(name)
+        cache = cls.__dict__['_resolved']
+        if name not in cache:
+            key, default = spec
+            if default is None:
+                cache[name] = _get_required_env(key)
+            else:
+                cache[name] = _get_env_with_default(key, default)
+        return cache[name]
+
+class DatabaseConfig(metaclass=_LazyEnvConfigMeta):
     """데이터베이스 연결 설정 - 모든 값은 환경 변수에서 가져옵니다."""
     
-    # 실제 데이터베이스 연결 정보 - 환경 변수에서 필수로 가져옴
+    # 실제 데이터베이스 연결 정보 - 환경 변수에서 필수로 가져옴 (default None = 필수)
     # 하드코딩된 기본값 제거: 보안을 위해 환경 변수 필수
-    HOST = _get_required_env("DB_HOST")
-    PORT = _get_env_with_default("DB_PORT", "5432")
-    NAME = _get_required_env("DB_NAME")
-    USER = _get_required_env("DB_USER")
-    PASSWORD = _get_required_env("DB_PASSWORD")
+    _ENV_KEYS = {
+        'HOST': ("DB_HOST", None),
+        'PORT': ("DB_PORT", "5432"),
+        'NAME': ("DB_NAME", None),
+        'USER': ("DB_USER", None),
+        'PASSWORD': ("DB_PASSWORD", None),
+    }
+    _resolved = {}
+    
+    @classmethod
+    def get_connection_params(cls):
+        """psycopg2.connect에 전달할 연결 파라미터를 반환합니다."""
+        return {
+            'host': cls.HOST,
+            'port': cls.PORT,
+            'database': cls.NAME,
+            'user': cls.USER,
+            'password': cls.PASSWORD
+        }
     
     @classmethod
     def get_connection_string(cls):
         """데이터베이스 연결 문자열을 반환합니다."""
-        return f"postgresql://{cls.USER}:{cls.PASSWORD}@{cls.HOST}:{cls.PORT}/{cls.NAME}" 
\ No newline at end of file
+        return f"postgresql://{cls.USER}:{cls.PASSWORD}@{cls.HOST}:{cls.PORT}/{cls.NAME}" 
@@ -0,0 +1,214 @@
+"""
+쿠폰 목록 변경분 조회 (delta sync)
+클라이언트가 받은 토큰 이후에 바뀐 쿠폰만 목록 API와 같은 형태로 돌려줍니다.
+
+변경으로 보는 것:
+- 새 쿠폰 (b_payment_bcoupon.id 워터마크)
+- 등록/결제 상태 변경 (b_payment_bcouponuser의 id, updated_at 워터마크)
+- 발행자 할당/재할당 (coupon_issuer_mapping.assigned_at)과 할당 해제 (coupon_issuer_unassignments.unassigned_at)
+
+토큰은 이 워터마크들을 담은 base64 JSON이며 클라이언트는 내용을 해석하지 않고 다음 요청에 그대로 보냅니다.
+변경 쿠폰이 COUPON_CHANGES_MAX개를 넘거나 토큰이 너무 오래되면 reset=true와 새 토큰을 돌려주고,
+클라이언트는 현재 페이지를 다시 불러옵니다. 쿠폰 삭제는 변경분에 나타나지 않습니다.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from database import db_service
+from issuer_database import issuer_db_service
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 돌려주는 변경 쿠폰 수 (넘으면 reset)
+COUPON_CHANGES_MAX = int(os.getenv('COUPON_CHANGES_MAX', '500'))
+# 시각 워터마크를 DB 현재 시각보다 이만큼(초) 뒤에 두어 늦게 커밋된 트랜잭션의 변경을 놓치지 않게 합니다.
+COUPON_CHANGES_OVERLAP = float(os.getenv('COUPON_CHANGES_OVERLAP', '5'))
+# 할당 해제 기록 보관 기간(일), 이보다 오래된 토큰은 reset
+COUPON_CHANGES_RETENTION_DAYS = float(os.getenv('COUPON_CHANGES_RETENTION_DAYS', '7'))
+TOKEN_VERSION = 1
+
+class InvalidChangeToken(ValueError):
+    """해석할 수 없는 변경분 토큰"""
+
+def encode_token(state: Dict[str, Any]) -> str:
+    payload = json.dumps(state, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_token(token: str) -> Dict[str, Any]:
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        state = json.loads(payload)
+        if not isinstance(state, dict) or state.get('v') != TOKEN_VERSION:
+            raise InvalidChangeToken("지원하지 않는 토큰입니다")
+        for key in ('c', 'r'):
+            state[key] = int(state[key])
+        # 시각 워터마크는 ISO 문자열 그대로 두고 (None 허용) 해석 가능한지만 확인합니다.
+        for key in ('u', 'a', 'd'):
+            value = state.get(key)
+            if value is not None:
+                if not isinstance(value, str):
+                    raise InvalidChangeToken("잘못된 토큰입니다")
+                datetime.fromisoformat(value)
+        if not isinstance(state['t'], str):
+            raise InvalidChangeToken("잘못된 토큰입니다")
+        state['t'] = datetime.fromisoformat(state['t'])
+        if state['t'].tzinfo is not None:
+            raise InvalidChangeToken("잘못된 토큰입니다")
+        return state
+    except InvalidChangeToken:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidChangeToken("잘못된 토큰입니다") from e
+
+def _advance(current: Optional[str], seen: Optional[datetime], now: Dict[bool, datetime]) -> Optional[str]:
+    """시각 워터마크를 seen까지 올리되 (DB 현재 시각 - COUPON_CHANGES_OVERLAP)을 넘지 않게 합니다. 줄이지는 않습니다.
+
+    트랜잭션은 시작 시각을 기록하므로 늦게 커밋된 변경이 워터마크보다 앞선 시각으로 나타날 수 있습니다.
+    최근 겹침 시간 안의 변경은 다음 조회에서 한 번 더 읽습니다. (중복은 클라이언트가 덮어씀)
+    now는 {aware 여부: DB 현재 시각}으로, 컬럼 타입(timestamp/timestamptz)에 맞는 시각과 비교합니다.
+    """
+    if seen is None:
+        return current
+    candidate = min(seen, now[seen.tzinfo is not None] - timedelta(seconds=COUPON_CHANGES_OVERLAP))
+    if current is None or candidate > datetime.fromisoformat(current):
+        return candidate.isoformat()
+    return current
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+class CouponChangeFeed:
+    """토큰 기반 쿠폰 변경분 조회"""
+
+    def __init__(self):
+        self._pruned_at = None
+        self._stats = {'polls': 0, 'resets': 0, 'changed_coupons': 0}
+
+    def current_state(self) -> Dict[str, Any]:
+        """지금 시점의 워터마크"""
+        conn = db_service.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT CURRENT_TIMESTAMP, LOCALTIMESTAMP")
+            now = dict(zip((True, False), cursor.fetchone()))
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM b_payment_bcoupon")
+            coupon_id = cursor.fetchone()[0]
+            cursor.execute("SELECT COALESCE(MAX(id), 0), MAX(updated_at) FROM b_payment_bcouponuser")
+            registration_id, registration_updated_at = cursor.fetchone()
+        finally:
+            conn.close()
+        state = {
+            'v': TOKEN_VERSION,
+            'c': coupon_id,
+            'r': registration_id,
+            'u': _advance(None, registration_updated_at, now),
+            'a': None,
+            'd': None,
+            't': datetime.now().isoformat(),
+        }
+        self._init_issuer_watermarks(state)
+        return state
+
+    def _init_issuer_watermarks(self, state: Dict[str, Any]):
+        """발행자 DB 워터마크가 없으면 현재 시점으로 채웁니다. (발행자 DB를 쓸 수 없으면 그대로 둠)"""
+        if issuer_db_service.disabled:
+            return
+        try:
+            assigned_at, unassigned_at, now = issuer_db_service.get_mapping_watermarks()
+        except Exception as e:
+            logger.warning(f"발행자 할당 워터마크 조회 실패: {e}")
+            return
+        now = {False: now}
+        state['a'] = state['a'] or _advance(None, assigned_at or now[False], now)
+        state['d'] = state['d'] or _advance(None, unassigned_at or now[False], now)
+
+    def _reset(self) -> Dict[str, Any]:
+        self._stats['resets'] += 1
+        return {'coupons': [], 'token': encode_token(self.current_state()), 'reset': True}
+
+    def changes(self, team_id: Optional[str], since: Optional[str]) -> Dict[str, Any]:
+        """since 토큰 이후 바뀐 팀 쿠폰 목록과 다음 토큰. since가 없으면 토큰만 발급합니다. (reset=true)"""
+        self._stats['polls'] += 1
+        if not since:
+            return self._reset()
+        state = decode_token(since)
+        if datetime.now() - state['t'] > timedelta(days=COUPON_CHANGES_RETENTION_DAYS):
+            return self._reset()
+        self._prune_unassignment_log()
+
+        changed_ids = set()
+        conn = db_service.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT CURRENT_TIMESTAMP, LOCALTIMESTAMP")
+            now = dict(zip((True, False), cursor.fetchone()))
+            cursor.execute(
+                "SELECT id FROM b_payment_bcoupon WHERE id > %s ORDER BY id LIMIT %s",
+                (state['c'], COUPON_CHANGES_MAX + 1)
+            )
+            new_ids = [row[0] for row in cursor.fetchall()]
+            if len(new_ids) > COUPON_CHANGES_MAX:
+                return self._reset()
+            changed_ids.update(new_ids)
+            if new_ids:
+                state['c'] = new_ids[-1]
+
+            cursor.execute(
+                "SELECT b_coupon_id, id, updated_at FROM b_payment_bcouponuser WHERE id > %s OR updated_at > %s",
+                (state['r'], _parse(state.get('u')))
+            )
+            registrations = cursor.fetchall()
+        finally:
+            conn.close()
+        registration_watermark = state.get('u')
+        for coupon_id, registration_id, updated_at in registrations:
+            changed_ids.add(coupon_id)
+            state['r'] = max(state['r'], registration_id)
+            registration_watermark = _advance(registration_watermark, updated_at, now)
+        state['u'] = registration_watermark
+
+        # 발행자 DB를 쓸 수 없으면 할당 변경은 건너뛰고 워터마크를 유지합니다. (다시 쓸 수 있게 되면 그때부터 반영)
+        if state.get('a') is None or state.get('d') is None:
+            self._init_issuer_watermarks(state)
+        elif not issuer_db_service.disabled:
+            try:
+                assigned, unassigned, issuer_now = issuer_db_service.get_mapping_changes(_parse(state['a']), _parse(state['d']))
+                issuer_now = {False: issuer_now}
+                for coupon_id, assigned_at in assigned:
+                    changed_ids.add(coupon_id)
+                    state['a'] = _advance(state['a'], assigned_at, issuer_now)
+                for coupon_id, unassigned_at in unassigned:
+                    changed_ids.add(coupon_id)
+                    state['d'] = _advance(state['d'], unassigned_at, issuer_now)
+            except Exception as e:
+                logger.warning(f"발행자 할당 변경 조회 실패: {e}")
+
+        changed_ids.discard(None)
+        if len(changed_ids) > COUPON_CHANGES_MAX:
+            return self._reset()
+
+        coupons = db_service.get_coupons_by_ids(sorted(changed_ids), team_id=team_id)
+        self._stats['changed_coupons'] += len(coupons)
+        state['t'] = datetime.now().isoformat()
+        return {'coupons': coupons, 'token': encode_token(state), 'reset': False}
+
+    def _prune_unassignment_log(self):
+        """할당 해제 기록을 보관 기간만 남기고 정리합니다. (한 시간에 한 번)"""
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < 3600:
+            return
+        self._pruned_at = now
+        issuer_db_service.prune_unassignment_log(datetime.now() - timedelta(days=COUPON_CHANGES_RETENTION_DAYS))
+
+    def stats(self) -> Dict:
+        return dict(self._stats)
+
+# 전역 변경분 조회기
+coupon_changes = CouponChangeFeed()
@@ -0,0 +1,35 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+from database import COUPON_API_KEYS
+
+# 내보내기 형식별 Content-Type
+EXPORT_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+def iter_csv(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """쿠폰 묶음을 CSV 바이트 청크로 변환합니다. (엑셀 한글 표시를 위해 BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COUPON_API_KEYS)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+    for coupons in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([coupon[key] for key in COUPON_API_KEYS] for coupon in coupons)
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_ndjson(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """쿠폰 묶음을 줄 단위 JSON(NDJSON) 바이트 청크로 변환합니다."""
+    for coupons in batches:
+        yield ''.join(json.dumps(coupon, ensure_ascii=False, default=str) + '\n' for coupon in coupons).encode('utf-8')
+
+EXPORT_WRITERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+}
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+쿠폰 목록 검색어(search) 필터
+pg_trgm GIN 인덱스가 준비된 쿠폰 DB에서는 인덱스를 탈 수 있는 형태로 검색 조건을 만들고,
+인덱스가 없으면 기존 LIKE 조건을 그대로 사용합니다.
+
+- 제목/코드는 b_payment_bcoupon의 trigram 인덱스, 지점명/제휴사명은 각 테이블의 trigram 인덱스로 찾은 뒤
+  쿠폰 ID 집합으로 합칩니다. (조인 결과 전체를 훑는 OR 조건 대신)
+- 쿠폰 코드처럼 보이는 검색어는 먼저 코드 완전 일치(LOWER(code_value) 인덱스)로 찾고, 있으면 그 쿠폰만 반환합니다.
+- 3글자 미만 검색어는 trigram을 만들 수 없으므로 기존 LIKE 조건을 씁니다.
+- 한글 trigram은 DB의 LC_CTYPE이 UTF-8 로캘일 때만 만들어집니다. (C 로캘이면 한글 검색어는 인덱스를 못 탑니다)
+
+인덱스 생성: python coupon_search.py [--check]
+  쿠폰 DB(DB_*)에 pg_trgm 확장과 인덱스를 CONCURRENTLY로 만듭니다. --check는 상태만 출력합니다.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# auto: 인덱스가 있으면 trigram 조건 사용 / trgm: 항상 사용 / like: 항상 기존 LIKE 조건
+COUPON_SEARCH_MODE = os.getenv('COUPON_SEARCH_MODE', 'auto').lower()
+# 인덱스 준비 여부를 다시 확인하는 주기(초)
+COUPON_SEARCH_CHECK_INTERVAL = float(os.getenv('COUPON_SEARCH_CHECK_INTERVAL', '300'))
+TRGM_MIN_LENGTH = 3
+# 쿠폰 코드로 볼 검색어: 공백 없는 영문/숫자/하이픈 6자 이상, 숫자 포함
+COUPON_CODE_PATTERN = re.compile(r'^(?=.*\d)[A-Za-z0-9-]{6,50}$')
+
+SEARCH_INDEXES = {
+    'idx_bcoupon_title_trgm': 'ON b_payment_bcoupon USING gin (title gin_trgm_ops)',
+    'idx_bcoupon_code_trgm': 'ON b_payment_bcoupon USING gin (code_value gin_trgm_ops)',
+    'idx_bcoupon_code_lower': 'ON b_payment_bcoupon (LOWER(code_value))',
+    'idx_bplace_name_trgm': 'ON b_class_bplace USING gin (name gin_trgm_ops)',
+    'idx_bprovider_name_trgm': 'ON b_class_bprovider USING gin (name gin_trgm_ops)',
+}
+
+# 기존 검색 조건 (COUPON_LIST_FROM의 별칭 기준, 파라미터 3개)
+LIKE_SEARCH_CONDITION = """
+            (LOWER(a.title) LIKE %s OR
+             LOWER(COALESCE(b.name, c.name, '')) LIKE %s OR
+             LOWER(COALESCE(a.code_value, '')) LIKE %s)
+            """
+
+# trigram 인덱스용 검색 조건 (파라미터 4개). 지점명이 없는 쿠폰만 제휴사명으로 찾습니다. (COALESCE(b.name, c.name)과 동일)
+TRGM_SEARCH_CONDITION = """
+            a.id IN (
+                SELECT id FROM b_payment_bcoupon WHERE title ILIKE %s
+                UNION
+                SELECT id FROM b_payment_bcoupon WHERE code_value ILIKE %s
+                UNION
+                SELECT s.id FROM b_payment_bcoupon s
+                JOIN b_class_bplace sb ON sb.id = s.b_place_id
+                WHERE sb.name ILIKE %s
+                UNION
+                SELECT s.id FROM b_payment_bcoupon s
+                JOIN b_class_bprovider sc ON sc.id = s.b_provider_id
+                LEFT JOIN b_class_bplace sb ON sb.id = s.b_place_id
+                WHERE sb.name IS NULL AND sc.name ILIKE %s
+            )
+            """
+
+def looks_like_coupon_code(search: str) -> bool:
+    return bool(COUPON_CODE_PATTERN.match(search.strip()))
+
+def search_index_status(conn) -> Dict[str, bool]:
+    """검색 인덱스별 사용 가능 여부 (없으면 False, CONCURRENTLY 생성이 실패해 INVALID인 경우도 False)"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = ANY(%s)
+    """, (list(SEARCH_INDEXES),))
+    valid = dict(cursor.fetchall())
+    return {name: bool(valid.get(name)) for name in SEARCH_INDEXES}
+
+def create_search_indexes(conn) -> Dict[str, bool]:
+    """pg_trgm 확장과 검색 인덱스를 만듭니다. 쓰기를 막지 않도록 CONCURRENTLY로 만들며 autocommit으로 전환합니다."""
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, definition in SEARCH_INDEXES.items():
+        if search_index_status(conn)[name]:
+            continue
+        # 실패로 남은 INVALID 인덱스는 IF NOT EXISTS에 걸리므로 지우고 다시 만듭니다.
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        started = time.time()
+        cursor.execute(f"CREATE INDEX CONCURRENTLY {name} {definition}")
+        logger.info(f"검색 인덱스 생성: {name} ({time.time() - started:.1f}초)")
+    cursor.execute("ANALYZE b_payment_bcoupon")
+    return search_index_status(conn)
+
+class CouponSearch:
+    """검색어 필터 조건 생성기 - 인덱스 준비 여부를 주기적으로 확인해 조건 형태를 고릅니다."""
+
+    def __init__(self, mode: str = COUPON_SEARCH_MODE, check_interval: float = COUPON_SEARCH_CHECK_INTERVAL):
+        self.mode = mode
+        self.check_interval = check_interval
+        self._ready = False
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._stats = {'trgm': 0, 'like': 0, 'exact_code': 0}
+
+    def indexes_ready(self, get_connection: Callable) -> bool:
+        if self.mode != 'auto':
+            return self.mode == 'trgm'
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._ready
+            # 확인 실패도 주기 동안 유지해 요청마다 카탈로그를 조회하지 않습니다.
+            self._checked_at = time.monotonic()
+            try:
+                conn = get_connection()
+                try:
+                    status = search_index_status(conn)
+                finally:
+                    conn.close()
+                self._ready = all(status.values())
+                if not self._ready:
+                    logger.info(f"검색 인덱스 미준비 - 기존 LIKE 검색 사용: {status}")
+            except Exception as e:
+                logger.warning(f"검색 인덱스 확인 실패: {e}")
+                self._ready = False
+            return self._ready
+
+    def find_ids_by_code(self, code: str, get_connection: Callable) -> List[int]:
+        """쿠폰 코드 완전 일치(대소문자 무시) 쿠폰 ID 목록"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM b_payment_bcoupon WHERE LOWER(code_value) = %s", (code.strip().lower(),))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def build_condition(self, search: str, get_connection: Callable) -> Tuple[str, List]:
+        """검색어 필터 조건과 파라미터를 반환합니다. (COUPON_LIST_FROM의 별칭 기준, 파라미터와 함께 실행)"""
+        if len(search.strip()) >= TRGM_MIN_LENGTH and self.indexes_ready(get_connection):
+            if looks_like_coupon_code(search):
+                try:
+                    coupon_ids = self.find_ids_by_code(search, get_connection)
+                    if coupon_ids:
+                        self._stats['exact_code'] += 1
+                        return f"a.id IN ({','.join(['%s'] * len(coupon_ids))})", coupon_ids
+                except Exception as e:
+                    logger.warning(f"쿠폰 코드 조회 실패 - 부분 일치 검색으로 진행: {e}")
+            self._stats['trgm'] += 1
+            search_param = f"%{search}%"
+            return TRGM_SEARCH_CONDITION, [search_param] * 4
+
+        self._stats['like'] += 1
+        search_param = f"%{search.lower()}%"
+        return LIKE_SEARCH_CONDITION, [search_param] * 3
+
+    def stats(self) -> Dict:
+        ready = self._ready if self.mode == 'auto' else self.mode == 'trgm'
+        return {'mode': self.mode, 'indexes_ready': ready, **self._stats}
+
+# 전역 검색 조건 생성기
+coupon_search = CouponSearch()
+
+def main():
+    """메인 실행 함수"""
+    from database import db_service
+
+    logging.basicConfig(level=logging.INFO)
+    check_only = '--check' in sys.argv[1:]
+    try:
+        conn = db_service.get_connection()
+        try:
+            status = search_index_status(conn) if check_only else create_search_indexes(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"검색 인덱스 {'확인' if check_only else '생성'} 실패: {e}")
+        return False
+
+    for name, valid in status.items():
+        logger.info(f"{'✓' if valid else '✗'} {name}")
+    return all(status.values())
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,471 @@
+"""
+쿠폰 목록 메모리 스냅샷
+쿠폰 목록에 필요한 컬럼을 워커 메모리에 열 단위 배열로 들고 있다가, 목록/쿠폰명/지점명 조회를
+DB 대신 스냅샷에서 응답합니다. (get_coupons_from_db와 같은 필터, 정렬, 페이지 결과)
+
+- 시작 시 전체를 읽고, 이후 id 워터마크 이후의 새 쿠폰과 등록 행만 추가로 읽습니다.
+- 등록 행 전체를 주기적으로 다시 읽어 결제/등록 회원 변경을 반영하고, 더 긴 주기로 전체를 새로 만듭니다.
+- 갱신이 오래 실패하면 ready가 False가 되어 DatabaseService가 DB 조회로 돌아갑니다.
+
+설정 (환경 변수):
+- COUPON_SNAPSHOT_ENABLED: 스냅샷 사용 여부 (기본 false)
+- COUPON_SNAPSHOT_REFRESH_INTERVAL: 새 쿠폰/등록 반영 주기(초, 기본 15)
+- COUPON_SNAPSHOT_RECONCILE_INTERVAL: 등록 행 전체 재확인 주기(초, 기본 300)
+- COUPON_SNAPSHOT_REBUILD_INTERVAL: 전체 재구성 주기(초, 기본 3600)
+- COUPON_SNAPSHOT_MAX_STALENESS: 마지막 갱신 성공 후 스냅샷을 쓰는 최대 시간(초, 기본 120)
+"""
+
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from coupon_search import looks_like_coupon_code
+
+logger = logging.getLogger(__name__)
+
+# 쿠폰 목록을 메모리 스냅샷에서 응답할지 여부 (워커마다 스냅샷을 하나씩 가집니다)
+COUPON_SNAPSHOT_ENABLED = os.getenv('COUPON_SNAPSHOT_ENABLED', 'false').lower() == 'true'
+# 새 쿠폰/등록(id 워터마크 이후)을 가져오는 주기(초)
+COUPON_SNAPSHOT_REFRESH_INTERVAL = float(os.getenv('COUPON_SNAPSHOT_REFRESH_INTERVAL', '15'))
+# b_payment_bcouponuser 전체를 다시 읽어 결제/등록 상태 변경을 맞추는 주기(초)
+COUPON_SNAPSHOT_RECONCILE_INTERVAL = float(os.getenv('COUPON_SNAPSHOT_RECONCILE_INTERVAL', '300'))
+# 스냅샷 전체를 새로 만드는 주기(초) - 쿠폰/지점명 수정, 삭제, 늦게 커밋된 작은 id를 반영
+COUPON_SNAPSHOT_REBUILD_INTERVAL = float(os.getenv('COUPON_SNAPSHOT_REBUILD_INTERVAL', '3600'))
+# 마지막 갱신 성공 후 이 시간(초)이 지나면 스냅샷을 쓰지 않고 DB를 조회합니다.
+COUPON_SNAPSHOT_MAX_STALENESS = float(os.getenv('COUPON_SNAPSHOT_MAX_STALENESS', '120'))
+
+# 팀별 쿠폰명 키워드 (database.team_title_filter와 같은 조건, 대소문자 구분)
+TEAM_TITLE_KEYWORDS = {
+    'timberland': ('팀버핏',),
+    'teamb': ('패밀리 쿠폰)', '프렌즈 쿠폰)'),
+}
+
+# 포맷팅은 COUPON_LIST_SELECT와 같습니다. 만료 시작일은 date_expired가 이 날짜 이하가 되는 첫날입니다.
+SNAPSHOT_COUPON_QUERY = """
+    SELECT
+        a.id,
+        a.title,
+        b.name,
+        c.name,
+        CASE
+            WHEN a.dc_amount > 0 THEN to_char(a.dc_amount, 'FM999,999,999,999') || '원'
+            WHEN a.dc_rate > 0 THEN a.dc_rate::text || '%%'
+            ELSE '-'
+        END,
+        COALESCE(to_char(a.date_expired, 'YYYY-MM-DD'), '-'),
+        (a.date_expired + interval '1 day' - interval '1 microsecond')::date - DATE '1970-01-01',
+        COALESCE(a.code_value, ''),
+        a.standard_price
+    FROM b_payment_bcoupon a
+    LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
+    LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
+    WHERE a.id > %s
+    ORDER BY a.id
+"""
+
+# 쿠폰 하나에 등록 행이 여러 개면 마지막(id가 가장 큰) 등록을 사용합니다.
+SNAPSHOT_REGISTRATION_QUERY = """
+    SELECT d.id, d.b_coupon_id, COALESCE(NULLIF(e.name, ''), '미등록'), d.is_used
+    FROM b_payment_bcouponuser d
+    LEFT JOIN user_user e ON d.user_id = e.id
+    WHERE d.id > %s
+    ORDER BY d.id
+"""
+
+UNREGISTERED = '미등록'
+EPOCH = date(1970, 1, 1)
+
+def like_pattern(search: str) -> Pattern:
+    """LOWER(...) LIKE '%검색어%'와 같은 의미의 부분 일치 정규식 (%, _는 와일드카드, 줄바꿈은 넘지 않음)"""
+    parts = []
+    for char in search.lower():
+        if char == '%':
+            parts.append('[^\n]*')
+        elif char == '_':
+            parts.append('[^\n]')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts))
+
+def title_matches_team(title: Optional[str], team_id: Optional[str]) -> bool:
+    keywords = TEAM_TITLE_KEYWORDS.get(team_id)
+    if keywords is None:
+        return True
+    return bool(title) and any(keyword in title for keyword in keywords)
+
+class _Dictionary:
+    """값 -> 번호 사전 인코딩 (열에는 번호만 저장)"""
+
+    def __init__(self, initial: Iterable = ()):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        for value in initial:
+            self.code(value)
+
+    def code(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class _CatalogData:
+    """쿠폰 스냅샷 본체 - 행 순서는 쿠폰 id 오름차순입니다.
+
+    (쿠폰명, 지점) 조합을 그룹으로 묶어 그룹별 행 번호 목록을 두므로, 팀/쿠폰명/지점명/검색어 조건은
+    행이 아니라 그룹 단위로 평가하고 해당 그룹들의 행 목록만 id 역순으로 병합합니다.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.ids = array('q')
+        self.groups = array('i')
+        self.discounts = array('i')
+        self.expiry_texts = array('i')
+        self.expires_on = array('i')      # 1970-01-01 기준 일수, -1: 만료일 없음
+        self.prices = array('i')
+        self.users = array('i')
+        self.paid = array('b')
+        # 쿠폰 코드: '\n'으로 구분해 이어 붙인 문자열과 행별 시작 위치 (행 i = blob[offsets[i]:offsets[i+1]-1])
+        self.code_blob = '\n'
+        self.code_blob_lower = '\n'
+        self.code_offsets = array('q', [1])
+
+        self.titles = _Dictionary()
+        self.stores = _Dictionary()       # (COALESCE(b.name, c.name), 화면 표시 지점명)
+        self.group_keys = _Dictionary()   # (쿠폰명 번호, 지점 번호)
+        self.group_rows: List[array] = []
+        self.discount_values = _Dictionary()
+        self.expiry_text_values = _Dictionary()
+        self.price_values = _Dictionary()
+        self.user_names = _Dictionary([UNREGISTERED])
+
+        self.registration_watermark = 0
+        self.reconciled_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def watermark(self) -> int:
+        return self.ids[-1] if self.ids else 0
+
+    def append_coupons(self, rows: List[tuple]):
+        codes, codes_lower = [], []
+        with self.lock:
+            for coupon_id, title, place_name, provider_name, discount, expiry_text, expires_on, code, price in rows:
+                raw_store = place_name if place_name is not None else provider_name
+                store = (raw_store, place_name or provider_name or '알 수 없음')
+                group = self.group_keys.code((self.titles.code(title), self.stores.code(store)))
+                if group == len(self.group_rows):
+                    self.group_rows.append(array('i'))
+                self.group_rows[group].append(len(self.ids))
+                self.ids.append(coupon_id)
+                self.groups.append(group)
+                self.discounts.append(self.discount_values.code(discount))
+                self.expiry_texts.append(self.expiry_text_values.code(expiry_text))
+                self.expires_on.append(-1 if expires_on is None else expires_on)
+                self.prices.append(self.price_values.code(price))
+                self.users.append(0)
+                self.paid.append(0)
+                lower = code.lower()
+                codes.append(code)
+                # 소문자 변환으로 길이가 바뀌는 코드는 원문으로 검색 (두 문자열의 위치를 맞추기 위해)
+                codes_lower.append(lower if len(lower) == len(code) else code)
+                self.code_offsets.append(self.code_offsets[-1] + len(code) + 1)
+            if codes:
+                self.code_blob += '\n'.join(codes) + '\n'
+                self.code_blob_lower += '\n'.join(codes_lower) + '\n'
+
+    def position(self, coupon_id: int) -> int:
+        index = bisect_left(self.ids, coupon_id)
+        return index if index < len(self.ids) and self.ids[index] == coupon_id else -1
+
+    def apply_registrations(self, rows: List[tuple]) -> bool:
+        """등록 행을 반영합니다. 아직 읽지 않은 쿠폰(워터마크 이후)의 등록을 만나면 멈추고 False를 반환합니다.
+        (그 등록부터는 다음 갱신에서 쿠폰을 읽은 뒤 다시 가져옵니다)"""
+        with self.lock:
+            watermark = self.watermark
+            for registration_id, coupon_id, user_name, is_used in rows:
+                if coupon_id is None:
+                    # 쿠폰이 없는 등록 행은 건너뜁니다. (워터마크와 비교할 수 없음)
+                    self.registration_watermark = max(self.registration_watermark, registration_id)
+                    continue
+                if coupon_id > watermark:
+                    return False
+                self.registration_watermark = max(self.registration_watermark, registration_id)
+                index = self.position(coupon_id)
+                if index >= 0:
+                    self.users[index] = self.user_names.code(user_name)
+                    self.paid[index] = 1 if is_used else 0
+        return True
+
+    def code_at(self, index: int) -> str:
+        return self.code_blob[self.code_offsets[index]:self.code_offsets[index + 1] - 1]
+
+    def row(self, index: int, today: int) -> tuple:
+        """COUPON_LIST_SELECT와 같은 컬럼 순서의 행"""
+        title_code, store_code = self.group_keys.values[self.groups[index]]
+        title = self.titles.values[title_code]
+        expires_on = self.expires_on[index]
+        return (
+            self.ids[index],
+            title or '쿠폰명 없음',
+            self.discount_values.values[self.discounts[index]],
+            self.expiry_text_values.values[self.expiry_texts[index]],
+            self.stores.values[store_code][1],
+            '만료' if 0 <= expires_on <= today else '사용가능',
+            self.code_at(index),
+            self.price_values.values[self.prices[index]],
+            self.user_names.values[self.users[index]],
+            '결제완료' if self.paid[index] else '미결제',
+        )
+
+    def code_match_rows(self, pattern: Pattern) -> List[int]:
+        rows = []
+        last = -1
+        for match in pattern.finditer(self.code_blob_lower):
+            index = bisect_right(self.code_offsets, match.start()) - 1
+            if index != last and index < len(self.ids):
+                rows.append(index)
+                last = index
+        return rows
+
+    def exact_code_rows(self, code: str) -> List[int]:
+        needle = '\n' + code.strip().lower() + '\n'
+        rows = []
+        position = self.code_blob_lower.find(needle)
+        while position >= 0:
+            rows.append(bisect_left(self.code_offsets, position + 1))
+            position = self.code_blob_lower.find(needle, position + 1)
+        return rows
+
+class CouponSnapshot:
+    """쿠폰 목록 메모리 스냅샷
+
+    시작 시 전체를 읽고, 이후 REFRESH 주기마다 id 워터마크 이후의 쿠폰과 등록 행만 추가로 읽습니다.
+    RECONCILE 주기마다 b_payment_bcouponuser를 다시 읽어 결제 상태/등록 회원 변경을 반영하고,
+    REBUILD 주기마다 전체를 새로 읽어 교체합니다. 갱신이 MAX_STALENESS 이상 실패하면 ready가 False가 되어
+    DatabaseService가 DB 조회로 돌아갑니다.
+    """
+
+    def __init__(self, enabled: bool = COUPON_SNAPSHOT_ENABLED):
+        self.enabled = enabled
+        self._data: Optional[_CatalogData] = None
+        self._service = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._refreshed_at = None
+        self._rebuilt_at = None
+        self._stats = {'queries': 0, 'refreshes': 0, 'reconciles': 0, 'rebuilds': 0, 'errors': 0}
+
+    @property
+    def ready(self) -> bool:
+        return (self._data is not None and self._refreshed_at is not None
+                and time.monotonic() - self._refreshed_at < COUPON_SNAPSHOT_MAX_STALENESS)
+
+    def start(self, service):
+        """갱신 스레드를 시작합니다. service는 stream_query를 제공하는 DatabaseService입니다."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._service = service
+        self._thread = threading.Thread(target=self._run, name="coupon-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = self._data
+                now = time.monotonic()
+                if data is None or now - self._rebuilt_at >= COUPON_SNAPSHOT_REBUILD_INTERVAL:
+                    self.rebuild()
+                else:
+                    if now - data.reconciled_at >= COUPON_SNAPSHOT_RECONCILE_INTERVAL:
+                        self.reconcile(data)
+                    self.refresh(data)
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"쿠폰 스냅샷 갱신 실패: {e}")
+            self._stop.wait(COUPON_SNAPSHOT_REFRESH_INTERVAL)
+
+    def _load_coupons(self, data: _CatalogData):
+        for rows in self._service.stream_query(SNAPSHOT_COUPON_QUERY, (data.watermark,), name="snapshot_coupons"):
+            data.append_coupons(rows)
+
+    def _load_registrations(self, data: _CatalogData):
+        batches = self._service.stream_query(SNAPSHOT_REGISTRATION_QUERY, (data.registration_watermark,),
+                                             name="snapshot_registrations")
+        try:
+            for rows in batches:
+                if not data.apply_registrations(rows):
+                    break
+        finally:
+            batches.close()
+
+    def rebuild(self):
+        started = time.time()
+        data = _CatalogData()
+        self._load_coupons(data)
+        self._load_registrations(data)
+        self._data = data
+        self._rebuilt_at = self._refreshed_at = time.monotonic()
+        self._stats['rebuilds'] += 1
+        logger.info(f"쿠폰 스냅샷 생성 완료: {len(data)}개, 그룹 {len(data.group_rows)}개 ({time.time() - started:.1f}초)")
+
+    def refresh(self, data: _CatalogData):
+        before = len(data)
+        self._load_coupons(data)
+        self._load_registrations(data)
+        self._refreshed_at = time.monotonic()
+        self._stats['refreshes'] += 1
+        if len(data) != before:
+            logger.info(f"쿠폰 스냅샷 갱신: 새 쿠폰 {len(data) - before}개")
+
+    def reconcile(self, data: _CatalogData):
+        """등록 행 전체를 다시 읽어 결제/등록 상태를 맞춥니다. (삭제된 등록은 미등록으로 돌아감)"""
+        with data.lock:
+            count = len(data)
+        users = array('i', [0]) * count
+        paid = array('b', [0]) * count
+        watermark = 0
+        for rows in self._service.stream_query(SNAPSHOT_REGISTRATION_QUERY, (0,), name="snapshot_reconcile"):
+            for registration_id, coupon_id, user_name, is_used in rows:
+                watermark = registration_id
+                if coupon_id is None:
+                    continue
+                index = data.position(coupon_id)
+                if 0 <= index < count:
+                    with data.lock:
+                        users[index] = data.user_names.code(user_name)
+                    paid[index] = 1 if is_used else 0
+        with data.lock:
+            # 다시 읽는 동안 추가된 쿠폰의 상태는 그대로 가져옵니다.
+            users.extend(data.users[count:])
+            paid.extend(data.paid[count:])
+            data.users, data.paid = users, paid
+            data.registration_watermark = max(data.registration_watermark, watermark)
+            data.reconciled_at = time.monotonic()
+        self._stats['reconciles'] += 1
+
+    def query(self, team_id: str = None, page: int = 1, size: int = 100, search: str = None,
+              coupon_names: List[str] = None, store_names: List[str] = None,
+              issuer_coupon_ids: List[int] = None,
+              assigned_coupon_ids: List[int] = None) -> Tuple[List[tuple], int]:
+        """get_coupons_from_db와 같은 조건으로 (COUPON_LIST_SELECT 형태의 행 목록, 전체 개수)를 반환합니다.
+
+        assigned_coupon_ids를 주면 해당 쿠폰을 제외합니다. (미지정 필터)
+        """
+        data = self._data
+        self._stats['queries'] += 1
+        today = (date.today() - EPOCH).days
+        name_set = set(coupon_names) if coupon_names else None
+        store_set = set(store_names) if store_names else None
+        assigned = set(assigned_coupon_ids) if assigned_coupon_ids else None
+
+        with data.lock:
+            titles, stores = data.titles.values, data.stores.values
+            base = set()
+            for group, (title_code, store_code) in enumerate(data.group_keys.values):
+                title = titles[title_code]
+                if not title_matches_team(title, team_id):
+                    continue
+                if name_set is not None and title not in name_set:
+                    continue
+                if store_set is not None and stores[store_code][0] not in store_set:
+                    continue
+                base.add(group)
+
+            # 검색어: 그룹(쿠폰명/지점명) 일치 + 그룹은 안 맞지만 코드가 맞는 행
+            matched, extra = base, []
+            if search:
+                exact = data.exact_code_rows(search) if looks_like_coupon_code(search) else []
+                if exact:
+                    matched = set()
+                    extra = sorted(index for index in exact if data.groups[index] in base)
+                else:
+                    # 부분 일치이므로 앞뒤 '%'는 붙이지 않습니다. (정규식 search)
+                    pattern = like_pattern(search)
+                    matched = set()
+                    for group in base:
+                        title_code, store_code = data.group_keys.values[group]
+                        if (pattern.search((titles[title_code] or '').lower())
+                                or pattern.search((stores[store_code][0] or '').lower())):
+                            matched.add(group)
+                    extra = [index for index in data.code_match_rows(pattern)
+                             if data.groups[index] in base and data.groups[index] not in matched]
+
+            offset = (page - 1) * size
+            if issuer_coupon_ids is not None:
+                extra_set = set(extra)
+                indexes = []
+                for coupon_id in set(issuer_coupon_ids):
+                    if assigned is not None and coupon_id in assigned:
+                        continue
+                    index = data.position(coupon_id)
+                    if index >= 0 and (data.groups[index] in matched or index in extra_set):
+                        indexes.append(index)
+                indexes.sort(reverse=True)
+                total = len(indexes)
+                page_indexes = indexes[offset:offset + size]
+            elif not extra and assigned is None and len(matched) == len(data.group_rows):
+                # 조건 없음: 행 번호가 곧 id 순서
+                total = len(data)
+                page_indexes = range(total - 1 - offset, max(total - 1 - offset - size, -1), -1)
+            else:
+                streams = [reversed(data.group_rows[group]) for group in matched]
+                if extra:
+                    streams.append(reversed(extra))
+                total = sum(len(data.group_rows[group]) for group in matched) + len(extra)
+                merged = heapq.merge(*streams, reverse=True)
+                if assigned is not None:
+                    extra_set = set(extra)
+                    for coupon_id in assigned:
+                        index = data.position(coupon_id)
+                        if index >= 0 and (data.groups[index] in matched or index in extra_set):
+                            total -= 1
+                    ids = data.ids
+                    merged = (index for index in merged if ids[index] not in assigned)
+                page_indexes = list(islice(merged, offset, offset + size))
+
+            return [data.row(index, today) for index in page_indexes], total
+
+    def coupon_names(self, team_id: str = None) -> List[str]:
+        data = self._data
+        with data.lock:
+            return sorted(title for title in data.titles.values if title and title_matches_team(title, team_id))
+
+    def store_names(self, team_id: str = None) -> List[str]:
+        data = self._data
+        with data.lock:
+            titles, stores = data.titles.values, data.stores.values
+            names = {
+                stores[store_code][0] for title_code, store_code in data.group_keys.values
+                if stores[store_code][0] and title_matches_team(titles[title_code], team_id)
+            }
+        return sorted(names)
+
+    def stats(self) -> Dict:
+        data = self._data
+        return {
+            'enabled': self.enabled,
+            'ready': self.ready,
+            'coupons': len(data) if data is not None else 0,
+            'groups': len(data.group_rows) if data is not None else 0,
+            'watermark': data.watermark if data is not None else 0,
+            'refreshed_seconds_ago': round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at else None,
+            **self._stats
+        }
+
+# 전역 쿠폰 스냅샷
+coupon_snapshot = CouponSnapshot()
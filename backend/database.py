@@ -2,23 +2,211 @@ import psycopg2
 from psycopg2 import sql
 from psycopg2.extras import RealDictCursor
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterator, Optional
 import os
+import threading
+import time
+import uuid
+from itertools import islice
+from collections import OrderedDict
 from config import DatabaseConfig
 from datetime import datetime
 from issuer_database import issuer_db_service
+from coupon_search import coupon_search
+from coupon_snapshot import coupon_snapshot
+from single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
+# 서버 사이드(named) 커서에서 한 번에 가져오는 행 수
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "2000"))
+# 내보내기(export) 시 배치 크기
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", str(STREAM_BATCH_SIZE)))
+
+# 쿠폰 코드 조회 캐시 (최근 조회한 코드 -> 쿠폰 행). 원본 DB 변경(결제 등)은 TTL 후에 반영됩니다.
+COUPON_CODE_CACHE_SIZE = int(os.getenv("COUPON_CODE_CACHE_SIZE", "1000"))
+COUPON_CODE_CACHE_TTL = float(os.getenv("COUPON_CODE_CACHE_TTL", "30"))
+
+# 쿠폰 목록 API 응답의 키 순서
+COUPON_API_KEYS = (
+    'id', 'name', 'discount', 'expiration_date', 'store', 'status', 'code',
+    'standard_price', 'registered_by', 'issuer', 'payment_status', 'additional_info'
+)
+
+# 쿠폰 목록 조회 FROM/JOIN 절 (등록 조인 제외 - WHERE 절은 a, b, c만 참조하므로 개수 쿼리는 이것만 사용)
+COUPON_LIST_BASE_FROM = """
+            FROM b_payment_bcoupon a
+            LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
+            LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id"""
+
+# 쿠폰 하나에 등록 행이 여러 개면 마지막(id가 가장 큰) 등록 한 건만 조인합니다.
+# 쿠폰당 한 행이므로 메모리 스냅샷(coupon_snapshot.py), 통계 집계(statistics_rollup.py)와 개수/페이지가 같습니다.
+COUPON_REGISTRATION_JOIN = """
+            LEFT JOIN LATERAL (
+                SELECT d.user_id, d.is_used
+                FROM b_payment_bcouponuser d
+                WHERE d.b_coupon_id = a.id
+                ORDER BY d.id DESC
+                LIMIT 1
+            ) d ON TRUE
+            LEFT JOIN user_user e ON d.user_id = e.id"""
+
+COUPON_LIST_FROM = COUPON_LIST_BASE_FROM + COUPON_REGISTRATION_JOIN
+
+# 쿠폰 목록 조회 SELECT - API 응답 형태로의 포맷팅(날짜, 할인, 기본값)을 SQL에서 처리합니다.
+# 컬럼 순서는 COUPON_API_KEYS에서 issuer, additional_info를 뺀 순서와 같습니다.
+# 리터럴 '%'는 '%%'로 써야 하므로 항상 파라미터(빈 리스트 포함)와 함께 실행해야 합니다.
+COUPON_LIST_SELECT = f"""
+            SELECT 
+                a.id,
+                COALESCE(NULLIF(a.title, ''), '쿠폰명 없음') as name,
+                CASE 
+                    WHEN a.dc_amount > 0 THEN to_char(a.dc_amount, 'FM999,999,999,999') || '원'
+                    WHEN a.dc_rate > 0 THEN a.dc_rate::text || '%%'
+                    ELSE '-'
+                END as discount,
+                COALESCE(to_char(a.date_expired, 'YYYY-MM-DD'), '-') as expiration_date,
+                COALESCE(NULLIF(b.name, ''), NULLIF(c.name, ''), '알 수 없음') as store,
+                CASE 
+                    WHEN a.date_expired > CURRENT_DATE THEN '사용가능'
+                    WHEN a.date_expired <= CURRENT_DATE THEN '만료' 
+                    WHEN a.date_expired IS NULL THEN '사용가능' 
+                END as status,
+                COALESCE(a.code_value, '') as code,
+                a.standard_price,
+                COALESCE(NULLIF(e.name, ''), '미등록') as registered_by,
+                CASE 
+                    WHEN d.is_used = TRUE THEN '결제완료' 
+                    ELSE '미결제' 
+                END as payment_status{COUPON_LIST_FROM}"""
+
+# COUPON_LIST_SELECT 결과 튜플의 컬럼 인덱스
+COUPON_ID_IDX = 0
+COUPON_PAYMENT_STATUS_IDX = 9
+
+# iter_coupons_by_issuer 쿼리 결과 컬럼 순서
+ISSUER_COUPON_COLUMNS = (
+    'id', 'status', 'code', 'title', 'discount_amount', 'discount_rate', 'expiry_date',
+    'store_name', 'provider_name', 'standard_price', 'registered_by', 'payment_status'
+)
+
+def map_coupon_rows(rows, issuer_mapping: Dict[int, str]) -> List[Dict[str, Any]]:
+    """COUPON_LIST_SELECT 결과 튜플을 API 쿠폰 dict 리스트로 변환합니다."""
+    keys = COUPON_API_KEYS
+    get_issuer = issuer_mapping.get
+    return [
+        dict(zip(keys, row[:COUPON_PAYMENT_STATUS_IDX] + (get_issuer(row[COUPON_ID_IDX]) or '', row[COUPON_PAYMENT_STATUS_IDX], '')))
+        for row in rows
+    ]
+
+def team_title_filter(team_id: str = None) -> str:
+    """팀별 쿠폰명 필터 조건 (리터럴 '%' 사용 - 파라미터 없이 실행하는 쿼리용)"""
+    if team_id == "timberland":
+        return "a.title LIKE '%팀버핏%'"
+    if team_id == "teamb":
+        return "(a.title LIKE '%패밀리 쿠폰)%' OR a.title LIKE '%프렌즈 쿠폰)%')"
+    # team_id가 None이면 모든 쿠폰 조회 (조건 없음)
+    return ""
+
+def coupon_count_query(where_clause: str) -> str:
+    """쿠폰 목록의 전체 개수 쿼리"""
+    return f"""
+            SELECT COUNT(*) as total
+            {COUPON_LIST_BASE_FROM}
+            {where_clause}
+            """
+
+def coupon_page_query(where_clause: str, page: int = None, size: int = None) -> str:
+    """쿠폰 목록 조회 쿼리. page가 없으면 LIMIT/OFFSET 없이 전체를 id 역순으로 조회합니다."""
+    query = f"""
+            {COUPON_LIST_SELECT}
+            {where_clause}
+            ORDER BY a.id DESC
+            """
+    if page is not None:
+        # LIMIT과 OFFSET은 정수이므로 문자열 포맷팅으로 처리
+        query += f"LIMIT {int(size)} OFFSET {(int(page) - 1) * int(size)}\n"
+    return query
+
+def coupon_by_code_query() -> str:
+    """쿠폰 코드 완전 일치(대소문자 무시) 조회 쿼리 - LOWER(code_value) 인덱스 사용 (coupon_search.SEARCH_INDEXES)"""
+    return f"""
+            {COUPON_LIST_SELECT}
+            WHERE LOWER(a.code_value) = %s
+            ORDER BY a.id DESC
+            LIMIT 1
+            """
+
+def coupon_names_query(team_id: str = None) -> str:
+    """고유 쿠폰명 조회 쿼리 (파라미터 없이 실행)"""
+    team_filter = team_title_filter(team_id)
+    return f"""
+        SELECT DISTINCT a.title as 쿠폰명
+        FROM b_payment_bcoupon a
+        WHERE {team_filter + ' AND ' if team_filter else ''}a.title IS NOT NULL
+        ORDER BY a.title
+        """
+
+def store_names_query(team_id: str = None) -> str:
+    """고유 지점명 조회 쿼리 (파라미터 없이 실행)"""
+    team_filter = team_title_filter(team_id)
+    return f"""
+        SELECT DISTINCT 
+            COALESCE(b.name, c.name) as 지점명
+        FROM b_payment_bcoupon a
+        LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
+        LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
+        WHERE {team_filter + ' AND ' if team_filter else ''}COALESCE(b.name, c.name) IS NOT NULL
+        ORDER BY COALESCE(b.name, c.name)
+        """
+
+def issuer_coupons_query(coupon_ids: List[int]) -> str:
+    """발행자에게 할당된 쿠폰 중 teamb 쿠폰 조회 쿼리 (컬럼 순서: ISSUER_COUPON_COLUMNS, 파라미터 없이 실행)"""
+    # 동적으로 쿠폰 ID를 쿼리에 포함 (파라미터 없이 실행하므로 LIKE의 '%'를 그대로 사용)
+    coupon_ids_str = ','.join(str(int(cid)) for cid in coupon_ids)
+    return f"""
+        SELECT 
+            a.id,
+            CASE 
+                WHEN a.date_expired > CURRENT_DATE THEN '사용가능'
+                WHEN a.date_expired <= CURRENT_DATE THEN '만료' 
+                WHEN a.date_expired IS NULL THEN '사용가능' 
+            END as status,
+            COALESCE(a.code_value, '') as code,
+            COALESCE(a.title, '쿠폰명 없음') as title,
+            COALESCE(a.dc_amount, 0) as discount_amount,
+            COALESCE(a.dc_rate, 0) as discount_rate,
+            a.date_expired as expiry_date,
+            COALESCE(b.name, '알 수 없음') as store_name,
+            COALESCE(c.name, '알 수 없음') as provider_name,
+            COALESCE(a.standard_price, 0) as standard_price,
+            COALESCE(e.name, '미등록') as registered_by,
+            CASE 
+                WHEN d.is_used = TRUE THEN '결제완료' 
+                ELSE '미결제' 
+            END as payment_status
+        {COUPON_LIST_FROM}
+        WHERE a.id IN ({coupon_ids_str})
+        AND (
+            (a.title LIKE '%패밀리 쿠폰)%' OR a.title LIKE '%프렌즈 쿠폰)%')
+            OR (c.name LIKE '%teamb%' OR c.name LIKE '%TeamB%')
+            OR (b.name LIKE '%teamb%' OR b.name LIKE '%TeamB%')
+        )
+        ORDER BY a.id DESC
+        """
+
 class DatabaseService:
     def __init__(self):
-        self.connection_params = {
-            'host': DatabaseConfig.HOST,
-            'port': DatabaseConfig.PORT,
-            'database': DatabaseConfig.NAME,
-            'user': DatabaseConfig.USER,
-            'password': DatabaseConfig.PASSWORD
-        }
+        # 연결 정보는 첫 연결 시점에 환경 변수에서 읽습니다 (import 시 DB/환경 변수 불필요)
+        self._connection_params = None
+        self._code_cache: 'OrderedDict[str, Tuple[float, Optional[tuple]]]' = OrderedDict()
+        self._code_cache_lock = threading.Lock()
+    
+    @property
+    def connection_params(self) -> Dict[str, Any]:
+        if self._connection_params is None:
+            self._connection_params = DatabaseConfig.get_connection_params()
+        return self._connection_params
     
     def get_connection(self):
         """데이터베이스 연결을 반환합니다."""
@@ -29,6 +217,33 @@ class DatabaseService:
             logger.error(f"데이터베이스 연결 실패: {e}")
             raise
 
+    def stream_query(self, query: str, params=None, batch_size: int = STREAM_BATCH_SIZE,
+                     name: str = "stream") -> Iterator[List[tuple]]:
+        """서버 사이드(named) 커서로 쿼리 결과를 batch_size개씩 묶어 반환합니다.
+        
+        결과 전체를 클라이언트에 올리지 않으므로 메모리 사용량은 batch_size에 비례합니다.
+        제너레이터를 끝까지 소비하지 않고 닫아도(close) 커서와 연결이 정리됩니다.
+        params가 None이면 파라미터 치환을 하지 않으므로 리터럴 '%'를 그대로 쓸 수 있습니다.
+        """
+        connection = self.get_connection()
+        try:
+            with connection.cursor(name=f"{name}_{uuid.uuid4().hex[:12]}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            connection.close()
+
+    def stream_rows(self, query: str, params=None, batch_size: int = STREAM_BATCH_SIZE,
+                    name: str = "stream") -> Iterator[tuple]:
+        """stream_query의 결과를 행 단위로 풀어서 반환합니다."""
+        for rows in self.stream_query(query, params, batch_size, name):
+            yield from rows
+
     def check_coupon_exists(self, coupon_id: int) -> bool:
         """해당 쿠폰 ID가 원본 쿠폰 DB에 존재하는지 확인합니다."""
         try:
@@ -41,14 +256,73 @@ class DatabaseService:
             # 연결 오류 시에도 삭제 API는 계속 진행할 수 있도록 False 반환
             return False
     
+    def get_coupon_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        """쿠폰 코드로 쿠폰 하나를 조회해 목록 API와 같은 형태(발행자 포함)로 반환합니다. 없으면 None.
+        
+        최근 조회한 코드는 COUPON_CODE_CACHE_TTL초 동안 캐시합니다. (없는 코드 포함, 발행자는 매번 조회)
+        """
+        normalized = code.strip().lower()
+        if not normalized:
+            return None
+        
+        now = time.monotonic()
+        with self._code_cache_lock:
+            cached = self._code_cache.get(normalized)
+            if cached is not None and cached[0] > now:
+                self._code_cache.move_to_end(normalized)
+                row = cached[1]
+            else:
+                cached = None
+        
+        if cached is None:
+            try:
+                with self.get_connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute(coupon_by_code_query(), (normalized,))
+                        row = cursor.fetchone()
+            except Exception as e:
+                logger.error(f"쿠폰 코드 조회 실패 ({code}): {e}")
+                raise
+            with self._code_cache_lock:
+                self._code_cache[normalized] = (now + COUPON_CODE_CACHE_TTL, row)
+                self._code_cache.move_to_end(normalized)
+                while len(self._code_cache) > COUPON_CODE_CACHE_SIZE:
+                    self._code_cache.popitem(last=False)
+        
+        if row is None:
+            return None
+        try:
+            issuer_mapping = issuer_db_service.get_coupon_id_to_issuer_map([row[COUPON_ID_IDX]])
+        except Exception as e:
+            logger.warning(f"발행자 정보 조회 실패: {e}")
+            issuer_mapping = {}
+        return map_coupon_rows([row], issuer_mapping)[0]
+    
+    def get_coupons_by_ids(self, coupon_ids: List[int], team_id: str = None) -> List[Dict[str, Any]]:
+        """쿠폰 ID 목록 중 팀 조건에 맞는 쿠폰을 목록 API와 같은 형태(발행자 포함)로 id 역순으로 반환합니다."""
+        if not coupon_ids:
+            return []
+        where_clause, params = self._build_coupon_where(team_id=team_id, issuer_coupon_ids=list(coupon_ids))
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(coupon_page_query(where_clause), params)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        try:
+            issuer_mapping = issuer_db_service.get_coupon_id_to_issuer_map([row[COUPON_ID_IDX] for row in rows])
+        except Exception as e:
+            logger.warning(f"발행자 정보 조회 실패: {e}")
+            issuer_mapping = {}
+        return map_coupon_rows(rows, issuer_mapping)
+    
+    @single_flight.coalesce("get_coupons_from_db", unordered=("coupon_names", "store_names"))
     def get_coupons_from_db(self, team_id: str = None, page: int = 1, size: int = 100, 
                            search: str = None, coupon_names: List[str] = None, 
                            store_names: List[str] = None, issuer: str = None, 
                            unassigned: bool = False) -> Dict[str, Any]:
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
             # 발행자 필터링이 있는 경우, 해당 발행자 이메일들의 쿠폰 ID 목록을 조회
             issuer_coupon_ids = None
             if issuer:
@@ -75,210 +349,87 @@ class DatabaseService:
                         'total_pages': 0
                     }
             
-            # 팀별 필터링 조건
-            team_filter = ""
-            base_params = []
-            
-            if team_id == "timberland":
-                team_filter = "WHERE a.title LIKE %s"
-                base_params = ['%팀버핏%']
-            elif team_id == "teamb":
-                team_filter = "WHERE (a.title LIKE %s OR a.title LIKE %s)"
-                base_params = ['%패밀리 쿠폰)%', '%프렌즈 쿠폰)%']
-            # team_id가 None이면 모든 쿠폰 조회 (WHERE 조건 없음)
-            
-            # 추가 필터링 조건들
-            additional_filters = []
-            params = base_params.copy()  # 기본 파라미터 복사
-            
-            # 발행자 필터링 (쿠폰 ID 기반)
-            if issuer and issuer_coupon_ids:
-                placeholders = ','.join(['%s'] * len(issuer_coupon_ids))
-                additional_filters.append(f"a.id IN ({placeholders})")
-                params.extend(issuer_coupon_ids)
-            
-            # 미지정(발행자 없음) 필터링: 발행자 매핑에 없는 쿠폰만
-            if unassigned:
-                try:
-                    assigned_coupon_ids = issuer_db_service.get_all_assigned_coupon_ids()
-                    if assigned_coupon_ids:
-                        placeholders = ','.join(['%s'] * len(assigned_coupon_ids))
-                        additional_filters.append(f"a.id NOT IN ({placeholders})")
-                        params.extend(assigned_coupon_ids)
-                except Exception as e:
-                    logging.warning(f"미지정 필터 적용 중 매핑 조회 실패: {e}")
-            
-            # 검색어 필터링
-            if search:
-                search_condition = """
-                (LOWER(a.title) LIKE %s OR 
-                 LOWER(COALESCE(b.name, c.name, '')) LIKE %s OR 
-                 LOWER(COALESCE(a.code_value, '')) LIKE %s)
-                """
-                additional_filters.append(search_condition)
-                search_param = f"%{search.lower()}%"
-                params.extend([search_param, search_param, search_param])
-            
-            # 쿠폰명 필터링
-            if coupon_names:
-                placeholders = ','.join(['%s'] * len(coupon_names))
-                additional_filters.append(f"a.title IN ({placeholders})")
-                params.extend(coupon_names)
-            
-            # 지점명 필터링
-            if store_names:
-                placeholders = ','.join(['%s'] * len(store_names))
-                additional_filters.append(f"COALESCE(b.name, c.name) IN ({placeholders})")
-                params.extend(store_names)
-            
-            # WHERE 절 구성
-            where_clause = team_filter
-            if additional_filters:
-                if team_filter:
-                    where_clause += " AND " + " AND ".join(additional_filters)
-                else:
-                    where_clause = "WHERE " + " AND ".join(additional_filters)
-            
-            # 전체 개수 조회 쿼리
-            count_query = f"""
-            SELECT COUNT(*) as total
-            FROM b_payment_bcoupon a
-            LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
-            LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
-            LEFT JOIN b_payment_bcouponuser d ON d.b_coupon_id = a.id
-            LEFT JOIN user_user e ON d.user_id = e.id
-            {where_clause}
-            """
-            
-            # 안전한 쿼리 실행
-            logging.info(f"실행할 count 쿼리: {count_query}")
-            logging.info(f"쿼리 파라미터: {params}")
+            if coupon_snapshot.ready:
+                # 메모리 스냅샷에서 조회 (coupon_snapshot.py)
+                assigned_coupon_ids = None
+                if unassigned:
+                    try:
+                        assigned_coupon_ids = issuer_db_service.get_all_assigned_coupon_ids()
+                    except Exception as e:
+                        logging.warning(f"미지정 필터 적용 중 매핑 조회 실패: {e}")
+                results, total_count = coupon_snapshot.query(
+                    team_id=team_id,
+                    page=page,
+                    size=size,
+                    search=search,
+                    coupon_names=coupon_names,
+                    store_names=store_names,
+                    issuer_coupon_ids=issuer_coupon_ids if issuer else None,
+                    assigned_coupon_ids=assigned_coupon_ids
+                )
+            else:
+                connection = self.get_connection()
+                cursor = connection.cursor()
+                
+                where_clause, params = self._build_coupon_where(
+                    team_id=team_id,
+                    search=search,
+                    coupon_names=coupon_names,
+                    store_names=store_names,
+                    issuer_coupon_ids=issuer_coupon_ids if issuer else None,
+                    unassigned=unassigned
+                )
+            
+                # 전체 개수 조회 쿼리
+                count_query = coupon_count_query(where_clause)
+            
+                # 안전한 쿼리 실행
+                logging.info(f"실행할 count 쿼리: {count_query}")
+                logging.info(f"쿼리 파라미터: {params}")
             
-            if params:
                 cursor.execute(count_query, params)
-            else:
-                cursor.execute(count_query)
-            count_result = cursor.fetchone()
+                count_result = cursor.fetchone()
             
-            logging.info(f"count_result: {count_result}, 타입: {type(count_result)}")
+                logging.info(f"count_result: {count_result}, 타입: {type(count_result)}")
             
-            if count_result:
-                if isinstance(count_result, (list, tuple)) and len(count_result) > 0:
-                    total_count = count_result[0]
+                if count_result:
+                    if isinstance(count_result, (list, tuple)) and len(count_result) > 0:
+                        total_count = count_result[0]
+                    else:
+                        total_count = count_result if isinstance(count_result, int) else 0
                 else:
-                    total_count = count_result if isinstance(count_result, int) else 0
-            else:
-                total_count = 0
+                    total_count = 0
             
-            logging.info(f"total_count: {total_count}")
+                logging.info(f"total_count: {total_count}")
             
-            # 발행자 필터링이 있는 경우 페이지네이션 무시하고 전체 데이터 반환
-            if issuer:
-                # 메인 데이터 조회 쿼리 (LIMIT, OFFSET 없음)
-                query = f"""
-                SELECT 
-                    a.id,
-                    CASE 
-                        WHEN a.date_expired > CURRENT_DATE THEN '사용가능'
-                        WHEN a.date_expired <= CURRENT_DATE THEN '만료' 
-                        WHEN a.date_expired IS NULL THEN '사용가능' 
-                    END as status,
-                    a.code_value as code,
-                    a.title,
-                    a.dc_amount as discount_amount,
-                    a.dc_rate as discount_rate,
-                    a.date_expired as expiry_date,
-                    b.name as store_name,
-                    c.name as provider_name,
-                    a.standard_price,
-                    e.id as user_id,
-                    e.name as registered_user_name,
-                    CASE 
-                        WHEN d.is_used = TRUE THEN '결제완료' 
-                        ELSE '미결제' 
-                    END as payment_status,
-                    CASE 
-                        WHEN d.is_used = TRUE THEN true 
-                        ELSE false 
-                    END as used
-                FROM b_payment_bcoupon a
-                LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
-                LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
-                LEFT JOIN b_payment_bcouponuser d ON d.b_coupon_id = a.id
-                LEFT JOIN user_user e ON d.user_id = e.id
-                {where_clause}
-                ORDER BY a.id DESC
-                """
-                
-                # 전체 결과를 가져온 후 클라이언트에서 페이지네이션 처리
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                
-                columns = [desc[0] for desc in cursor.description]
-                all_results = cursor.fetchall()
-                
-                # 페이지네이션 처리
-                offset = (page - 1) * size
-                results = all_results[offset:offset + size]
-                
-                logging.info(f"발행자 '{issuer}' 필터링: 전체 {len(all_results)}개 중 {len(results)}개 반환 (페이지 {page})")
+                # 발행자 필터링이 있는 경우: named 커서로 스트리밍하면서 해당 페이지만 잘라냄
+                if issuer:
+                    # 메인 데이터 조회 쿼리 (LIMIT, OFFSET 없음)
+                    query = coupon_page_query(where_clause)
                 
-            else:
-                # 일반적인 경우 페이지네이션 적용
-                offset = (page - 1) * size
+                    # offset까지는 버리고 size개만 보관 - 이후 행은 서버에서 가져오지 않음
+                    offset = (page - 1) * size
+                    rows = self.stream_rows(query, params, batch_size=min(STREAM_BATCH_SIZE, offset + size), name="issuer_coupons")
+                    try:
+                        results = list(islice(rows, offset, offset + size))
+                    finally:
+                        rows.close()
                 
-                # 메인 데이터 조회 쿼리 (LIMIT과 OFFSET은 문자열 포맷팅으로 처리)
-                query = f"""
-                SELECT 
-                    a.id,
-                    CASE 
-                        WHEN a.date_expired > CURRENT_DATE THEN '사용가능'
-                        WHEN a.date_expired <= CURRENT_DATE THEN '만료' 
-                        WHEN a.date_expired IS NULL THEN '사용가능' 
-                    END as status,
-                    a.code_value as code,
-                    a.title,
-                    a.dc_amount as discount_amount,
-                    a.dc_rate as discount_rate,
-                    a.date_expired as expiry_date,
-                    b.name as store_name,
-                    c.name as provider_name,
-                    a.standard_price,
-                    e.id as user_id,
-                    e.name as registered_user_name,
-                    CASE 
-                        WHEN d.is_used = TRUE THEN '결제완료' 
-                        ELSE '미결제' 
-                    END as payment_status,
-                    CASE 
-                        WHEN d.is_used = TRUE THEN true 
-                        ELSE false 
-                    END as used
-                FROM b_payment_bcoupon a
-                LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
-                LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
-                LEFT JOIN b_payment_bcouponuser d ON d.b_coupon_id = a.id
-                LEFT JOIN user_user e ON d.user_id = e.id
-                {where_clause}
-                ORDER BY a.id DESC
-                LIMIT {size} OFFSET {offset}
-                """
+                    logging.info(f"발행자 '{issuer}' 필터링: 전체 {total_count}개 중 {len(results)}개 반환 (페이지 {page})")
                 
-                # 메인 쿼리 실행
-                if params:
-                    cursor.execute(query, params)
                 else:
-                    cursor.execute(query)
+                    # 일반적인 경우 페이지네이션 적용
+                    # 메인 데이터 조회 쿼리 (LIMIT과 OFFSET은 문자열 포맷팅으로 처리)
+                    query = coupon_page_query(where_clause, page, size)
                 
-                columns = [desc[0] for desc in cursor.description]
-                results = cursor.fetchall()
+                    # 메인 쿼리 실행 (params가 비어 있어도 전달해야 SELECT의 '%%'가 '%'로 처리됩니다)
+                    cursor.execute(query, params)
+                    results = cursor.fetchall()
             
             # 발행자 정보 조회 (한 번에 가져오기)
             issuer_mapping = {}
             if results:
-                coupon_ids = [dict(zip(columns, row)).get('id') for row in results]
+                coupon_ids = [row[COUPON_ID_IDX] for row in results]
                 try:
                     issuer_mapping = issuer_db_service.get_coupon_id_to_issuer_map([cid for cid in coupon_ids if cid])
                     logging.info(f"발행자 매핑 조회 완료: {len(issuer_mapping)}개 매핑")
@@ -286,38 +437,8 @@ class DatabaseService:
                     logging.warning(f"발행자 정보 조회 실패: {e}")
                     issuer_mapping = {}
             
-            coupons = []
-            for row in results:
-                coupon_dict = dict(zip(columns, row))
-                
-                # 날짜 포맷팅
-                if coupon_dict.get('expiry_date'):
-                    coupon_dict['expiry_date'] = coupon_dict['expiry_date'].strftime('%Y-%m-%d')
-                else:
-                    coupon_dict['expiry_date'] = '-'
-                
-                # 발행자 정보와 등록자 정보 분리
-                coupon_id = coupon_dict.get('id')
-                issuer_email = issuer_mapping.get(coupon_id)  # SQLite에서 가져온 발행자 이메일
-                registered_by = coupon_dict.get('registered_user_name') or '미등록'  # PostgreSQL의 실제 등록자
-                
-                # API 응답 형식에 맞게 변환
-                api_coupon = {
-                    'id': coupon_dict.get('id'),
-                    'name': coupon_dict.get('title') or '쿠폰명 없음',
-                    'discount': self._format_discount(coupon_dict.get('discount_amount'), coupon_dict.get('discount_rate')),
-                    'expiration_date': coupon_dict['expiry_date'],
-                    'store': coupon_dict.get('store_name') or coupon_dict.get('provider_name') or '알 수 없음',
-                    'status': coupon_dict.get('status', '사용가능'),
-                    'code': coupon_dict.get('code') or '',
-                    'standard_price': coupon_dict.get('standard_price', 0),
-                    'registered_by': registered_by,  # PostgreSQL의 실제 등록자
-                    'issuer': issuer_email or '',  # SQLite의 쿠폰발행자 이메일
-                    'payment_status': coupon_dict.get('payment_status', '미결제'),
-                    'additional_info': ''
-                }
-                
-                coupons.append(api_coupon)
+            # API 응답 형식으로 변환 (포맷팅은 SQL에서 처리됨)
+            coupons = map_coupon_rows(results, issuer_mapping)
             
             total_pages = (total_count + size - 1) // size
             
@@ -345,6 +466,115 @@ class DatabaseService:
             if 'connection' in locals():
                 connection.close()
     
+    def iter_coupon_batches(self, team_id: str = None, search: str = None,
+                            coupon_names: List[str] = None, store_names: List[str] = None,
+                            issuer: str = None, unassigned: bool = False,
+                            batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """쿠폰 전체를 서버 사이드(named) 커서로 batch_size개씩 조회하여 API 형태의 묶음으로 반환합니다.
+        
+        한 번에 batch_size개 행만 메모리에 올라오므로 테이블 크기와 무관하게 메모리 사용량이 일정합니다.
+        발행자 정보는 묶음마다 발행자 DB에서 일괄 조회합니다.
+        """
+        issuer_coupon_ids = None
+        if issuer:
+            issuer_emails = [email.strip() for email in issuer.split(',') if email.strip()]
+            issuer_coupon_ids = issuer_db_service.get_assigned_coupon_ids_for_emails(issuer_emails)
+            if not issuer_coupon_ids:
+                return
+        
+        where_clause, params = self._build_coupon_where(
+            team_id=team_id,
+            search=search,
+            coupon_names=coupon_names,
+            store_names=store_names,
+            issuer_coupon_ids=issuer_coupon_ids,
+            unassigned=unassigned
+        )
+        query = coupon_page_query(where_clause)
+        
+        exported = 0
+        for rows in self.stream_query(query, params, batch_size=batch_size, name="coupon_export"):
+            try:
+                issuer_mapping = issuer_db_service.get_coupon_id_to_issuer_map([row[COUPON_ID_IDX] for row in rows])
+            except Exception as e:
+                logging.warning(f"발행자 정보 조회 실패: {e}")
+                issuer_mapping = {}
+            exported += len(rows)
+            yield map_coupon_rows(rows, issuer_mapping)
+        logging.info(f"팀 {team_id} 쿠폰 내보내기 완료: {exported}개")
+    
+    def _build_coupon_where(self, team_id: str = None, search: str = None,
+                            coupon_names: List[str] = None, store_names: List[str] = None,
+                            issuer_coupon_ids: List[int] = None,
+                            unassigned: bool = False,
+                            assigned_coupon_ids: List[int] = None) -> Tuple[str, List[Any]]:
+        """쿠폰 목록 조회용 WHERE 절과 파라미터를 구성합니다. (COUPON_LIST_FROM의 별칭 기준)
+
+        assigned_coupon_ids를 주지 않으면 미지정 필터에 필요한 할당 쿠폰 ID를 발행자 DB에서 조회합니다.
+        """
+        # 팀별 필터링 조건
+        team_filter = ""
+        base_params = []
+        
+        if team_id == "timberland":
+            team_filter = "WHERE a.title LIKE %s"
+            base_params = ['%팀버핏%']
+        elif team_id == "teamb":
+            team_filter = "WHERE (a.title LIKE %s OR a.title LIKE %s)"
+            base_params = ['%패밀리 쿠폰)%', '%프렌즈 쿠폰)%']
+        # team_id가 None이면 모든 쿠폰 조회 (WHERE 조건 없음)
+        
+        # 추가 필터링 조건들
+        additional_filters = []
+        params = base_params.copy()  # 기본 파라미터 복사
+        
+        # 발행자 필터링 (쿠폰 ID 기반)
+        if issuer_coupon_ids:
+            placeholders = ','.join(['%s'] * len(issuer_coupon_ids))
+            additional_filters.append(f"a.id IN ({placeholders})")
+            params.extend(issuer_coupon_ids)
+        
+        # 미지정(발행자 없음) 필터링: 발행자 매핑에 없는 쿠폰만
+        if unassigned:
+            try:
+                if assigned_coupon_ids is None:
+                    assigned_coupon_ids = issuer_db_service.get_all_assigned_coupon_ids()
+                if assigned_coupon_ids:
+                    placeholders = ','.join(['%s'] * len(assigned_coupon_ids))
+                    additional_filters.append(f"a.id NOT IN ({placeholders})")
+                    params.extend(assigned_coupon_ids)
+            except Exception as e:
+                logging.warning(f"미지정 필터 적용 중 매핑 조회 실패: {e}")
+        
+        # 검색어 필터링
+        if search:
+            # 검색 인덱스가 있으면 trigram/코드 일치 조건, 없으면 기존 LIKE 조건 (coupon_search.py)
+            search_condition, search_params = coupon_search.build_condition(search, self.get_connection)
+            additional_filters.append(search_condition)
+            params.extend(search_params)
+        
+        # 쿠폰명 필터링
+        if coupon_names:
+            placeholders = ','.join(['%s'] * len(coupon_names))
+            additional_filters.append(f"a.title IN ({placeholders})")
+            params.extend(coupon_names)
+        
+        # 지점명 필터링
+        if store_names:
+            placeholders = ','.join(['%s'] * len(store_names))
+            additional_filters.append(f"COALESCE(b.name, c.name) IN ({placeholders})")
+            params.extend(store_names)
+        
+        # WHERE 절 구성
+        where_clause = team_filter
+        if additional_filters:
+            if team_filter:
+                where_clause += " AND " + " AND ".join(additional_filters)
+            else:
+                where_clause = "WHERE " + " AND ".join(additional_filters)
+        
+        return where_clause, params
+    
     def _determine_status(self, used_flag: bool, expiry_date) -> str:
         """만료일을 기반으로 상태를 결정합니다."""
         current_date = datetime.now().date()
@@ -367,22 +597,12 @@ class DatabaseService:
         logger.info(f"사용가능한 쿠폰: {expiry_date} > {current_date}")
         return "사용가능"
     
+    @single_flight.coalesce("get_coupon_names_from_db")
     def get_coupon_names_from_db(self, team_id: str = None) -> List[str]:
         """데이터베이스에서 고유한 쿠폰명 리스트를 조회합니다."""
-        # 팀별 필터링 조건
-        team_filter = ""
-        if team_id == "timberland":
-            team_filter = "WHERE a.title LIKE '%팀버핏%'"
-        elif team_id == "teamb":
-            team_filter = "WHERE (a.title LIKE '%패밀리 쿠폰)%' OR a.title LIKE '%프렌즈 쿠폰)%')"
-        # team_id가 None이면 모든 쿠폰 조회 (WHERE 조건 없음)
-        
-        query = f"""
-        SELECT DISTINCT a.title as 쿠폰명
-        FROM b_payment_bcoupon a
-        {team_filter} {' AND ' if team_filter else 'WHERE '} a.title IS NOT NULL
-        ORDER BY a.title
-        """
+        if coupon_snapshot.ready:
+            return coupon_snapshot.coupon_names(team_id)
+        query = coupon_names_query(team_id)
         
         try:
             with self.get_connection() as conn:
@@ -402,26 +622,12 @@ class DatabaseService:
             else:
                 return ["팀버핏 20% 할인 쿠폰", "팀버핏 무료 체험 쿠폰"]
 
+    @single_flight.coalesce("get_stores_from_db")
     def get_stores_from_db(self, team_id: str = None) -> List[str]:
         """데이터베이스에서 고유한 지점명 리스트를 조회합니다."""
-        # 팀별 필터링 조건
-        team_filter = ""
-        if team_id == "timberland":
-            team_filter = "WHERE a.title LIKE '%팀버핏%'"
-        elif team_id == "teamb":
-            team_filter = "WHERE (a.title LIKE '%패밀리 쿠폰)%' OR a.title LIKE '%프렌즈 쿠폰)%')"
-        # team_id가 None이면 모든 쿠폰 조회 (WHERE 조건 없음)
-        
-        query = f"""
-        SELECT DISTINCT 
-            COALESCE(b.name, c.name) as 지점명
-        FROM b_payment_bcoupon a
-        LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
-        LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
-        {team_filter}
-        {' AND ' if team_filter else 'WHERE '} COALESCE(b.name, c.name) IS NOT NULL
-        ORDER BY COALESCE(b.name, c.name)
-        """
+        if coupon_snapshot.ready:
+            return coupon_snapshot.store_names(team_id)
+        query = store_names_query(team_id)
         
         try:
             with self.get_connection() as conn:
@@ -572,175 +778,107 @@ class DatabaseService:
         """특정 쿠폰발행자의 쿠폰 목록 조회 (별도 DB 서비스 사용)"""
         try:
             logger.info(f"=== 발행자 '{issuer_email}' 쿠폰 조회 시작 ===")
+            found_coupons = list(self.iter_coupons_by_issuer(issuer_email))
+            logger.info(f"=== 발행자 '{issuer_email}'의 teamb 쿠폰 {len(found_coupons)}개를 조회했습니다. ===")
+            return found_coupons
             
-            # 별도 DB에서 발행자에게 할당된 쿠폰 ID 조회
-            coupon_ids = issuer_db_service.get_assigned_coupon_ids(issuer_email)
-            logger.info(f"할당된 쿠폰 ID 목록: {coupon_ids}")
-            
-            if not coupon_ids:
-                logger.info(f"발행자 '{issuer_email}'에게 할당된 쿠폰이 없습니다.")
-                return []
-            
-            # 쿠폰 ID 1은 제외하고 teamb 쿠폰만 조회
-            teamb_coupon_ids = [cid for cid in coupon_ids if cid != 1]
-            
-            if not teamb_coupon_ids:
-                logger.info(f"발행자 '{issuer_email}'에게 할당된 teamb 쿠폰이 없습니다.")
-                return []
-            
-            # 발행자 이름 조회 - 안전하게 처리
-            issuer_name = issuer_email  # 기본값으로 email 사용
-            try:
-                issuers = issuer_db_service.get_all_issuers()
-                issuer = next((i for i in issuers if i['email'] == issuer_email), None)
-                if issuer:
-                    issuer_name = issuer['name']
-                    logger.info(f"발행자 이름 조회 성공: {issuer_name}")
-                else:
-                    logger.warning(f"발행자 이름을 찾을 수 없어 email을 사용합니다: {issuer_email}")
-            except Exception as e:
-                logger.warning(f"발행자 이름 조회 실패, email을 사용합니다: {e}")
-            
-            # teamb 팀 쿠폰 데이터에서 조회
-            found_coupons = []
-            
-            # PostgreSQL에서 teamb 팀 쿠폰 조회
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
-            # teamb 팀 필터링 조건 추가
-            # 동적으로 쿠폰 ID를 쿼리에 포함
-            coupon_ids_str = ','.join(map(str, teamb_coupon_ids))
-            query = f"""
-            SELECT 
-                a.id,
-                CASE 
-                    WHEN a.date_expired > CURRENT_DATE THEN '사용가능'
-                    WHEN a.date_expired <= CURRENT_DATE THEN '만료' 
-                    WHEN a.date_expired IS NULL THEN '사용가능' 
-                END as status,
-                COALESCE(a.code_value, '') as code,
-                COALESCE(a.title, '쿠폰명 없음') as title,
-                COALESCE(a.dc_amount, 0) as discount_amount,
-                COALESCE(a.dc_rate, 0) as discount_rate,
-                a.date_expired as expiry_date,
-                COALESCE(b.name, '알 수 없음') as store_name,
-                COALESCE(c.name, '알 수 없음') as provider_name,
-                COALESCE(a.standard_price, 0) as standard_price,
-                COALESCE(e.name, '미등록') as registered_by,
-                CASE 
-                    WHEN d.is_used = TRUE THEN '결제완료' 
-                    ELSE '미결제' 
-                END as payment_status
-            FROM b_payment_bcoupon a
-            LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
-            LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
-            LEFT JOIN b_payment_bcouponuser d ON d.b_coupon_id = a.id
-            LEFT JOIN user_user e ON d.user_id = e.id
-            WHERE a.id IN ({coupon_ids_str})
-            AND (
-                (a.title LIKE '%패밀리 쿠폰)%' OR a.title LIKE '%프렌즈 쿠폰)%')
-                OR (c.name LIKE '%teamb%' OR c.name LIKE '%TeamB%')
-                OR (b.name LIKE '%teamb%' OR b.name LIKE '%TeamB%')
-            )
-            ORDER BY a.id DESC
-            """
-            
-            logger.info(f"teamb 팀 쿠폰 조회 쿼리: {query}")
-            logger.info(f"조회 teamb 쿠폰 ID 목록: {teamb_coupon_ids}")
+        except Exception as e:
+            logger.error(f"쿠폰발행자별 쿠폰 조회 실패: {e}")
+            return []
+
+    def get_coupons_by_issuer_page(self, issuer_email: str, page: int, size: int) -> Tuple[List[dict], int]:
+        """발행자 쿠폰 중 해당 페이지만 보관하고 전체 개수를 함께 반환합니다. (전체 목록을 메모리에 올리지 않음)"""
+        try:
+            start_idx = (page - 1) * size
+            end_idx = start_idx + size
+            coupons = []
+            total = 0
+            for coupon in self.iter_coupons_by_issuer(issuer_email):
+                if start_idx <= total < end_idx:
+                    coupons.append(coupon)
+                total += 1
+            return coupons, total
             
+        except Exception as e:
+            logger.error(f"쿠폰발행자별 쿠폰 페이지 조회 실패: {e}")
+            return [], 0
+
+    def count_coupons_by_issuer_status(self, issuer_email: str) -> Dict[str, int]:
+        """발행자 쿠폰의 상태별 개수를 스트리밍으로 집계합니다."""
+        counts: Dict[str, int] = {}
+        try:
+            for coupon in self.iter_coupons_by_issuer(issuer_email):
+                status = coupon.get('status', '')
+                counts[status] = counts.get(status, 0) + 1
+        except Exception as e:
+            logger.error(f"쿠폰발행자별 상태 집계 실패: {e}")
+        return counts
+
+    def iter_coupons_by_issuer(self, issuer_email: str) -> Iterator[dict]:
+        """특정 쿠폰발행자의 teamb 쿠폰을 서버 사이드 커서로 한 건씩 반환합니다.
+        
+        결과 전체를 메모리에 올리지 않으므로, 개수 집계나 페이지 슬라이싱처럼
+        전체 목록이 필요 없는 호출부는 이 제너레이터를 직접 소비합니다.
+        """
+        # 별도 DB에서 발행자에게 할당된 쿠폰 ID 조회
+        coupon_ids = issuer_db_service.get_assigned_coupon_ids(issuer_email)
+        logger.info(f"할당된 쿠폰 ID 수: {len(coupon_ids)}")
+        
+        # 쿠폰 ID 1은 제외하고 teamb 쿠폰만 조회
+        teamb_coupon_ids = [cid for cid in coupon_ids if cid != 1]
+        
+        if not teamb_coupon_ids:
+            logger.info(f"발행자 '{issuer_email}'에게 할당된 teamb 쿠폰이 없습니다.")
+            return
+        
+        query = issuer_coupons_query(teamb_coupon_ids)
+        
+        for i, row in enumerate(self.stream_rows(query, name="issuer_coupons")):
             try:
-                cursor.execute(query)  # 파라미터 없이 실행
+                coupon_dict = dict(zip(ISSUER_COUPON_COLUMNS, row))
                 
-                # 컬럼명을 안전하게 가져오기
-                columns = []
-                if cursor.description:
-                    for desc in cursor.description:
-                        if hasattr(desc, 'name'):
-                            columns.append(desc.name)
-                        else:
-                            columns.append(desc[0])
+                # 날짜 포맷팅
+                if coupon_dict.get('expiry_date'):
+                    expiry_date = coupon_dict['expiry_date'].strftime('%Y-%m-%d')
                 else:
-                    logger.error("cursor.description이 None입니다")
-                    connection.close()
-                    return []
+                    expiry_date = None
                 
-                logger.info(f"쿼리 결과 컬럼: {columns}")
+                coupon = {
+                    'id': coupon_dict.get('id'),
+                    'status': coupon_dict.get('status', '사용가능'),
+                    'code': coupon_dict.get('code', ''),
+                    'name': coupon_dict.get('title', '쿠폰명 없음'),
+                    'discount_percent': coupon_dict.get('discount_rate', 0),
+                    'discount_amount': coupon_dict.get('discount_amount', 0),
+                    'expiration_date': expiry_date,
+                    'store': coupon_dict.get('store_name', '알 수 없음'),
+                    'provider': coupon_dict.get('provider_name', '알 수 없음'),
+                    'registered_by': coupon_dict.get('registered_by', '미등록'),  # PostgreSQL의 실제 등록자 (쿠폰등록회원)
+                    'phone': None,
+                    'usage_date': None,
+                    'memo': '',
+                    'created_at': None,
+                    'updated_at': None,
+                    'image_url': None,
+                    'team_id': 'teamb',
+                    'standard_price': coupon_dict.get('standard_price', 0),
+                    'payment_status': coupon_dict.get('payment_status', '미결제'),  # 실제 결제 상태
+                    'used': coupon_dict.get('payment_status') == '결제완료'  # 결제완료면 used=True
+                }
                 
-                results = cursor.fetchall()
-                logger.info(f"teamb 팀 쿠폰 조회 결과 수: {len(results)}")
+                # 할인 정보 설정
+                if coupon['discount_percent']:
+                    coupon['discount'] = f"{coupon['discount_percent']}%"
+                elif coupon['discount_amount']:
+                    coupon['discount'] = f"{coupon['discount_amount']:,}원"
+                else:
+                    coupon['discount'] = "할인 정보 없음"
                 
-                for i, row in enumerate(results):
-                    try:
-                        logger.info(f"처리 중인 행 {i}: 길이={len(row)}, 컬럼 수={len(columns)}")
-                        logger.info(f"행 데이터: {row}")
-                        
-                        coupon_dict = dict(zip(columns, row))
-                        logger.info(f"teamb 쿠폰 데이터: ID={coupon_dict.get('id')}, 제목={coupon_dict.get('title')}")
-                        
-                        # 날짜 포맷팅
-                        if coupon_dict.get('expiry_date'):
-                            expiry_date = coupon_dict['expiry_date'].strftime('%Y-%m-%d')
-                        else:
-                            expiry_date = None
-                        
-                        # 디버깅: registered_by 필드 확인
-                        registered_by_from_db = coupon_dict.get('registered_by', '미등록')
-                        logger.info(f"쿠폰 ID {coupon_dict.get('id')}: DB에서 가져온 registered_by = '{registered_by_from_db}'")
-                        
-                        coupon = {
-                            'id': coupon_dict.get('id'),
-                            'status': coupon_dict.get('status', '사용가능'),
-                            'code': coupon_dict.get('code', ''),
-                            'name': coupon_dict.get('title', '쿠폰명 없음'),
-                            'discount_percent': coupon_dict.get('discount_rate', 0),
-                            'discount_amount': coupon_dict.get('discount_amount', 0),
-                            'expiration_date': expiry_date,
-                            'store': coupon_dict.get('store_name', '알 수 없음'),
-                            'provider': coupon_dict.get('provider_name', '알 수 없음'),
-                            'registered_by': registered_by_from_db,  # PostgreSQL의 실제 등록자 (쿠폰등록회원)
-                            'phone': None,
-                            'usage_date': None,
-                            'memo': '',
-                            'created_at': None,
-                            'updated_at': None,
-                            'image_url': None,
-                            'team_id': 'teamb',
-                            'standard_price': coupon_dict.get('standard_price', 0),
-                            'payment_status': coupon_dict.get('payment_status', '미결제'),  # 실제 결제 상태
-                            'used': coupon_dict.get('payment_status') == '결제완료'  # 결제완료면 used=True
-                        }
-                        
-                        # 디버깅: 최종 쿠폰 객체의 registered_by 확인
-                        logger.info(f"쿠폰 ID {coupon['id']}: 최종 registered_by = '{coupon['registered_by']}'")
-                        
-                        # 할인 정보 설정
-                        if coupon['discount_percent']:
-                            coupon['discount'] = f"{coupon['discount_percent']}%"
-                        elif coupon['discount_amount']:
-                            coupon['discount'] = f"{coupon['discount_amount']:,}원"
-                        else:
-                            coupon['discount'] = "할인 정보 없음"
-                        
-                        found_coupons.append(coupon)
-                        
-                    except Exception as row_error:
-                        logger.error(f"쿠폰 데이터 처리 중 오류 (행 {i}): {row_error}")
-                        continue
-                        
-            except Exception as query_error:
-                logger.error(f"PostgreSQL 쿼리 실행 오류: {query_error}")
-                connection.close()
-                return []
-            
-            connection.close()
-            
-            logger.info(f"=== 발행자 '{issuer_email}'의 teamb 쿠폰 {len(found_coupons)}개를 조회했습니다. ===")
-            return found_coupons
-            
-        except Exception as e:
-            logger.error(f"쿠폰발행자별 쿠폰 조회 실패: {e}")
-            return []
+                yield coupon
+                
+            except Exception as row_error:
+                logger.error(f"쿠폰 데이터 처리 중 오류 (행 {i}): {row_error}")
+                continue
 
     def get_assigned_coupon_ids(self, issuer_name: str) -> List[int]:
         """발행자에게 할당된 쿠폰 ID 목록을 조회합니다."""
@@ -9,6 +9,8 @@ import os
 import logging
 from datetime import datetime
 
+from admin_jobs import report_progress
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,7 +40,8 @@ def fix_issuer_names(conn):
     
     updated_count = 0
     
-    for email, correct_name in name_corrections.items():
+    for index, (email, correct_name) in enumerate(name_corrections.items(), start=1):
+        report_progress(index, len(name_corrections))
         try:
             # 현재 이름 확인
             cursor.execute("SELECT name FROM coupon_issuers WHERE email = %s", (email,))
@@ -4,12 +4,42 @@ import logging
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import os
+import threading
+import time
 from urllib.parse import urlparse, urlunparse
 
+from issuer_fallback_store import create_fallback_store, ISSUER_FALLBACK_DB_PATH
+from issuer_mapping_cache import issuer_mapping_cache, MAPPING_NOTIFY_DDL
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 할당 해제(매핑 삭제) 기록 - 변경분 조회(coupon_changes.py)가 삭제된 할당을 알 수 있도록 트리거로 남깁니다.
+UNASSIGNMENT_LOG_DDL = [
+    '''
+    CREATE TABLE IF NOT EXISTS coupon_issuer_unassignments (
+        coupon_id INTEGER NOT NULL,
+        unassigned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_unassignments_at ON coupon_issuer_unassignments(unassigned_at)',
+    '''
+    CREATE OR REPLACE FUNCTION log_coupon_issuer_unassignment() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO coupon_issuer_unassignments (coupon_id) VALUES (OLD.coupon_id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    ''',
+    'DROP TRIGGER IF EXISTS coupon_issuer_mapping_unassign_log ON coupon_issuer_mapping',
+    '''
+    CREATE TRIGGER coupon_issuer_mapping_unassign_log
+    AFTER DELETE ON coupon_issuer_mapping
+    FOR EACH ROW EXECUTE PROCEDURE log_coupon_issuer_unassignment()
+    ''',
+]
+
 def mask_database_url(url: str) -> str:
     """데이터베이스 URL에서 비밀번호를 마스킹합니다."""
     try:
@@ -39,48 +69,147 @@ def mask_database_url(url: str) -> str:
                 return f"{parts[0].split(':')[0]}:***@{parts[1]}"
         return "postgresql://***:***@***"
 
+# 초기화 설정 - 앱 부팅이 발행자 DB 지연에 묶이지 않도록 연결/대기 시간을 제한
+ISSUER_DB_CONNECT_TIMEOUT = int(os.getenv('ISSUER_DB_CONNECT_TIMEOUT', '5'))
+ISSUER_DB_INIT_WAIT = float(os.getenv('ISSUER_DB_INIT_WAIT', '10'))
+ISSUER_DB_AUTO_MIGRATE = os.getenv('ISSUER_DB_AUTO_MIGRATE', 'true').lower() == 'true'
+
 class IssuerDatabaseService:
     def __init__(self):
         # PostgreSQL 연결 정보 (없거나 연결 실패 시 비활성화 모드)
+        # 실제 연결 확인과 테이블 생성은 start_readiness_probe()에서 백그라운드로 수행합니다.
         self.database_url = os.getenv('DATABASE_URL')
-        self.disabled = False
-        # 간단한 인메모리 저장소 (비활성화 모드에서 사용)
-        self._memory_mapping = {}  # coupon_id -> issuer_email
-        self._memory_issuers = {}  # email -> {name, phone}
+        self._disabled = False
+        # 비활성화 모드에서 사용할 대체 저장소 (SQLite WAL 또는 인메모리, 처음 사용할 때 생성)
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
         self._init_error = None  # 초기화 에러 메시지 저장
 
-        if not self.database_url:
-            self.disabled = True
-            self._init_error = "DATABASE_URL 환경 변수가 설정되지 않았습니다."
-            logger.error(f"발행자 DB 비활성화: {self._init_error}")
-            logger.error("Railway 대시보드에서 DATABASE_URL 환경 변수를 설정해주세요.")
-            return
+        # 지연 초기화 상태: pending -> ready | disabled
+        self._state = 'pending'
+        self._schema_ready = False
+        self._probe_lock = threading.Lock()
+        self._probe_thread = None
+        self._probe_started_at = None
+        self._probe_finished_at = None
+        self._initialized = threading.Event()
 
-        # 보안: 로그에 비밀번호가 포함되지 않도록 마스킹
-        masked_url = mask_database_url(self.database_url)
-        logger.info(f"PostgreSQL 데이터베이스 연결 시도: {masked_url}")
-        
+    @property
+    def disabled(self) -> bool:
+        """비활성화(인메모리) 모드 여부. 초기화가 끝나지 않았다면 제한 시간만큼 대기합니다."""
+        self.wait_until_initialized()
+        return self._disabled
+
+    @disabled.setter
+    def disabled(self, value: bool):
+        self._disabled = value
+
+    @property
+    def fallback_store(self):
+        """비활성화 모드용 대체 저장소 (ISSUER_FALLBACK_STORE: sqlite | memory)"""
+        if self._fallback is None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    self._fallback = create_fallback_store()
+        return self._fallback
+
+    @property
+    def db_path(self) -> str:
+        """비활성화 모드에서 사용하는 SQLite 대체 저장소 파일 경로"""
+        return ISSUER_FALLBACK_DB_PATH
+
+    def start_readiness_probe(self):
+        """연결 확인(및 자동 마이그레이션)을 백그라운드 스레드에서 시작합니다. 여러 번 호출해도 한 번만 실행됩니다."""
+        with self._probe_lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_started_at = time.time()
+            self._probe_thread = threading.Thread(
+                target=self._run_readiness_probe, name="issuer-db-probe", daemon=True
+            )
+            self._probe_thread.start()
+
+    def wait_until_initialized(self, timeout: float = None) -> bool:
+        """초기화가 끝날 때까지 최대 timeout초 대기합니다. 완료 여부를 반환합니다."""
+        if self._initialized.is_set():
+            return True
+        self.start_readiness_probe()
+        return self._initialized.wait(ISSUER_DB_INIT_WAIT if timeout is None else timeout)
+
+    def _run_readiness_probe(self):
         try:
-            # 연결 테스트
-            test_conn = self.get_connection()
-            test_conn.close()
-            logger.info("PostgreSQL 데이터베이스 연결 성공")
-            
-            # 테이블 생성
-            self.create_tables()
+            if not self.database_url:
+                self._disable("DATABASE_URL 환경 변수가 설정되지 않았습니다.")
+                logger.error("Railway 대시보드에서 DATABASE_URL 환경 변수를 설정해주세요.")
+                return
+
+            # 보안: 로그에 비밀번호가 포함되지 않도록 마스킹
+            masked_url = mask_database_url(self.database_url)
+            logger.info(f"PostgreSQL 데이터베이스 연결 시도: {masked_url}")
+
+            try:
+                # 연결 테스트
+                test_conn = self._connect()
+                test_conn.close()
+                logger.info("PostgreSQL 데이터베이스 연결 성공")
+            except Exception as e:
+                self._disable(f"데이터베이스 연결 실패: {str(e)}")
+                logger.error("Railway에서 DATABASE_URL이 올바른 PostgreSQL 연결 문자열인지 확인해주세요.")
+                return
+
+            if ISSUER_DB_AUTO_MIGRATE:
+                try:
+                    self.migrate()
+                except Exception as e:
+                    self._disable(f"테이블 생성 실패: {str(e)}")
+                    return
+
+            self._state = 'ready'
             logger.info("발행자 DB 초기화 완료")
-        except Exception as e:
-            self.disabled = True
-            self._init_error = f"데이터베이스 연결 또는 테이블 생성 실패: {str(e)}"
-            logger.error(f"발행자 DB 비활성화: {self._init_error}")
-            logger.error("Railway에서 DATABASE_URL이 올바른 PostgreSQL 연결 문자열인지 확인해주세요.")
+            self._start_mapping_cache()
+        finally:
+            self._probe_finished_at = time.time()
+            self._initialized.set()
+
+    def _disable(self, reason: str):
+        self._disabled = True
+        self._state = 'disabled'
+        self._init_error = reason
+        logger.error(f"발행자 DB 비활성화: {self._init_error}")
+        # 첫 요청이 저장소 초기화 비용을 치르지 않도록 미리 준비
+        self.fallback_store
+
+    def migrate(self):
+        """발행자 테이블/인덱스를 생성합니다 (스키마 마이그레이션 단계)."""
+        self.create_tables()
+        self._schema_ready = True
+
+    def readiness(self) -> Dict:
+        """readiness 엔드포인트용 초기화 상태를 반환합니다."""
+        elapsed = None
+        if self._probe_started_at is not None:
+            finished = self._probe_finished_at or time.time()
+            elapsed = round((finished - self._probe_started_at) * 1000, 1)
+        return {
+            'state': self._state,
+            'ready': self._initialized.is_set(),
+            'disabled': self._disabled,
+            'schema_ready': self._schema_ready,
+            'reason': self._init_error,
+            'fallback_store': self._fallback.kind if self._disabled and self._fallback else None,
+            'mapping_cache': issuer_mapping_cache.stats(),
+            'probe_elapsed_ms': elapsed
+        }
+
+    def _connect(self):
+        return psycopg2.connect(self.database_url, connect_timeout=ISSUER_DB_CONNECT_TIMEOUT)
     
     def get_connection(self):
         """PostgreSQL 데이터베이스 연결을 반환합니다."""
         try:
             if self.disabled:
                 raise RuntimeError("발행자 DB 비활성화 모드")
-            conn = psycopg2.connect(self.database_url)
+            conn = self._connect()
             return conn
         except Exception as e:
             logger.error(f"PostgreSQL 연결 실패: {e}")
@@ -89,7 +218,8 @@ class IssuerDatabaseService:
     def create_tables(self):
         """발행자 관련 테이블을 생성합니다."""
         try:
-            conn = self.get_connection()
+            # 초기화 프로브 스레드에서도 호출되므로 disabled 대기 없이 직접 연결
+            conn = self._connect()
             cursor = conn.cursor()
             
             # 발행자 정보 테이블
@@ -120,6 +250,7 @@ class IssuerDatabaseService:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_issuer_email ON coupon_issuers(email)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_mapping_issuer ON coupon_issuer_mapping(issuer_email)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_mapping_coupon ON coupon_issuer_mapping(coupon_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_mapping_assigned_at ON coupon_issuer_mapping(assigned_at)')
             
             conn.commit()
             conn.close()
@@ -128,13 +259,58 @@ class IssuerDatabaseService:
         except Exception as e:
             logger.error(f"테이블 생성 실패: {e}")
             raise
+
+        self.create_notify_triggers()
+        self.create_unassignment_log()
+
+    def create_notify_triggers(self):
+        """매핑 캐시 무효화용 NOTIFY 트리거를 생성합니다. 실패해도 테이블 사용에는 지장이 없습니다."""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            for statement in MAPPING_NOTIFY_DDL:
+                cursor.execute(statement)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"매핑 변경 알림 트리거 생성 실패 (매핑 캐시 비활성화): {e}")
+
+    def create_unassignment_log(self):
+        """할당 해제 기록 테이블과 트리거를 생성합니다. 실패하면 변경분 조회에 할당 해제가 빠집니다."""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            for statement in UNASSIGNMENT_LOG_DDL:
+                cursor.execute(statement)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"할당 해제 기록 트리거 생성 실패: {e}")
+
+    def _start_mapping_cache(self):
+        """알림 트리거가 있을 때만 매핑 캐시의 NOTIFY 수신을 시작합니다. (없으면 캐시 없이 직접 조회)"""
+        if not issuer_mapping_cache.enabled:
+            return
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = 'coupon_issuer_mapping_notify'")
+            has_trigger = cursor.fetchone() is not None
+            conn.close()
+        except Exception as e:
+            logger.warning(f"매핑 변경 알림 트리거 확인 실패: {e}")
+            has_trigger = False
+        if not has_trigger:
+            logger.warning("매핑 변경 알림 트리거가 없어 매핑 캐시를 사용하지 않습니다. (migrate_issuer_db.py 실행 필요)")
+            return
+        issuer_mapping_cache.start_listener(self.database_url)
     
     def save_issuer_info(self, name: str, email: str, phone: str = None) -> bool:
         """발행자 정보를 저장하거나 업데이트합니다."""
         try:
             if self.disabled:
                 # 인메모리에 저장
-                self._memory_issuers[email] = {"name": name, "email": email, "phone": phone}
+                self.fallback_store.save_issuer(name, email, phone)
                 return True
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -176,8 +352,8 @@ class IssuerDatabaseService:
         try:
             if self.disabled:
                 # 인메모리 매핑 기록
-                self._memory_issuers[email] = {"name": name, "email": email, "phone": phone}
-                self._memory_mapping[coupon_id] = email
+                self.fallback_store.save_issuer(name, email, phone)
+                self.fallback_store.assign(coupon_id, email)
                 return True
             # 먼저 발행자 정보 저장/업데이트
             self.save_issuer_info(name, email, phone)
@@ -208,28 +384,34 @@ class IssuerDatabaseService:
             
             conn.commit()
             conn.close()
+            # 이 워커의 캐시는 즉시 갱신 (다른 워커는 NOTIFY로 무효화)
+            issuer_mapping_cache.put(coupon_id, email)
             return True
             
         except Exception as e:
             logger.error(f"쿠폰 할당 실패: {e}")
             return False
     
+    def bulk_assign_coupons(self, rows, create_missing_issuers: bool = True) -> Dict:
+        """(coupon_id, issuer_email, assigned_at) 행들을 한 번에 할당합니다. (COPY 스테이징 + 일괄 병합)"""
+        if self.disabled:
+            return self.fallback_store.bulk_assign(rows)
+
+        from mapping_bulk_loader import load_mapping_rows
+
+        conn = self.get_connection()
+        try:
+            return load_mapping_rows(conn, rows, create_missing_issuers=create_missing_issuers)
+        finally:
+            conn.close()
+            issuer_mapping_cache.invalidate_all()
+
     def get_all_issuers(self) -> List[Dict]:
         """모든 발행자와 할당된 쿠폰 수를 조회합니다."""
         try:
             if self.disabled:
-                # 인메모리 목록 반환
-                issuers = []
-                for email, info in self._memory_issuers.items():
-                    count = sum(1 for cid, em in self._memory_mapping.items() if em == email)
-                    issuers.append({
-                        'name': info.get('name') or email,
-                        'email': email,
-                        'phone': info.get('phone'),
-                        'created_at': None,
-                        'coupon_count': count
-                    })
-                return issuers
+                # 대체 저장소 목록 반환
+                return self.fallback_store.issuers_with_counts()
             conn = self.get_connection()
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             
@@ -260,7 +442,7 @@ class IssuerDatabaseService:
         """특정 발행자에게 할당된 쿠폰 ID 목록을 조회합니다."""
         try:
             if self.disabled:
-                return [cid for cid, em in self._memory_mapping.items() if em == issuer_email]
+                return self.fallback_store.coupon_ids_for(issuer_email)
             conn = self.get_connection()
             cursor = conn.cursor()
             
@@ -283,22 +465,22 @@ class IssuerDatabaseService:
         """발행자를 삭제합니다. (관련 쿠폰 할당도 함께 삭제)"""
         try:
             if self.disabled:
-                # 인메모리에서 제거
-                if issuer_email in self._memory_issuers:
-                    del self._memory_issuers[issuer_email]
-                self._memory_mapping = {cid: em for cid, em in self._memory_mapping.items() if em != issuer_email}
+                # 대체 저장소에서 제거
+                self.fallback_store.delete_issuer(issuer_email)
                 return True
             conn = self.get_connection()
             cursor = conn.cursor()
             
             # 쿠폰 할당 먼저 삭제
-            cursor.execute("DELETE FROM coupon_issuer_mapping WHERE issuer_email = %s", (issuer_email,))
+            cursor.execute("DELETE FROM coupon_issuer_mapping WHERE issuer_email = %s RETURNING coupon_id", (issuer_email,))
+            removed_coupon_ids = [row[0] for row in cursor.fetchall()]
             
             # 발행자 삭제
             cursor.execute("DELETE FROM coupon_issuers WHERE email = %s", (issuer_email,))
             
             conn.commit()
             conn.close()
+            issuer_mapping_cache.invalidate(removed_coupon_ids)
             logger.info(f"발행자 {issuer_email} 삭제 완료")
             return True
             
@@ -309,8 +491,10 @@ class IssuerDatabaseService:
     def unassign_coupon_from_issuer(self, coupon_id: int) -> bool:
         """특정 쿠폰에서 발행자 할당을 해제합니다."""
         if self.disabled:
-            logging.warning("IssuerDatabaseService가 비활성화 모드입니다. 쿠폰 발행자 할당 해제를 건너뜁니다.")
-            return False
+            if self.fallback_store.unassign(coupon_id) is None:
+                logging.warning(f"쿠폰 {coupon_id}에 할당된 발행자가 없습니다.")
+                return False
+            return True
         
         try:
             conn = self.get_connection()
@@ -329,6 +513,7 @@ class IssuerDatabaseService:
             cursor.execute("DELETE FROM coupon_issuer_mapping WHERE coupon_id = %s", (coupon_id,))
             conn.commit()
             conn.close()
+            issuer_mapping_cache.put(coupon_id, None)
             
             logging.info(f"쿠폰 {coupon_id}의 발행자 할당이 해제되었습니다.")
             return True
@@ -346,7 +531,8 @@ class IssuerDatabaseService:
                     'database_type': 'PostgreSQL',
                     'reason': self._init_error or 'DATABASE_URL not set or connection failed',
                     'database_url_set': self.database_url is not None,
-                    'database_url_masked': mask_database_url(self.database_url) if self.database_url else None
+                    'database_url_masked': mask_database_url(self.database_url) if self.database_url else None,
+                    'fallback_store': self.fallback_store.stats()
                 }
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -397,25 +583,30 @@ class IssuerDatabaseService:
     # 확장: 특정 쿠폰 ID 목록에 대한 email 매핑 반환
     def get_coupon_id_to_issuer_map(self, coupon_ids: List[int]) -> Dict[int, str]:
         if self.disabled:
-            return {cid: self._memory_mapping.get(cid) for cid in coupon_ids if cid in self._memory_mapping}
+            return self.fallback_store.issuers_of(list(coupon_ids))
         try:
             if not coupon_ids:
                 return {}
-            conn = self.get_connection()
+            # 캐시에 없는 쿠폰만 DB에서 조회 (조회 실패는 캐시에 남기지 않음)
+            return issuer_mapping_cache.get_many(list(coupon_ids), self._fetch_coupon_issuers)
+        except Exception as e:
+            logger.error(f"쿠폰 발행자 매핑 조회 실패: {e}")
+            return {}
+
+    def _fetch_coupon_issuers(self, coupon_ids: List[int]) -> Dict[int, str]:
+        conn = self.get_connection()
+        try:
             cursor = conn.cursor()
             placeholders = ','.join(['%s'] * len(coupon_ids))
             cursor.execute(f"SELECT coupon_id, issuer_email FROM coupon_issuer_mapping WHERE coupon_id IN ({placeholders})", tuple(coupon_ids))
-            results = cursor.fetchall()
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        finally:
             conn.close()
-            return {row[0]: row[1] for row in results}
-        except Exception as e:
-            logger.error(f"쿠폰 발행자 매핑 조회 실패: {e}")
-            return {}
 
     # 확장: 모든 할당된 쿠폰 ID 집합 반환
     def get_all_assigned_coupon_ids(self) -> List[int]:
         if self.disabled:
-            return list(self._memory_mapping.keys())
+            return self.fallback_store.all_coupon_ids()
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -427,5 +618,67 @@ class IssuerDatabaseService:
             logger.error(f"모든 할당 쿠폰 조회 실패: {e}")
             return []
 
+    def get_mapping_changes(self, assigned_after: datetime, unassigned_after: datetime) -> Tuple[List[tuple], List[tuple], datetime]:
+        """assigned_after 이후 할당/재할당된 (coupon_id, assigned_at), unassigned_after 이후 할당 해제된 (coupon_id, unassigned_at),
+        조회 시점의 DB 시각(LOCALTIMESTAMP)"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT LOCALTIMESTAMP")
+            now = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT coupon_id, assigned_at FROM coupon_issuer_mapping WHERE assigned_at > %s",
+                (assigned_after,)
+            )
+            assigned = cursor.fetchall()
+            try:
+                cursor.execute(
+                    "SELECT coupon_id, unassigned_at FROM coupon_issuer_unassignments WHERE unassigned_at > %s",
+                    (unassigned_after,)
+                )
+                unassigned = cursor.fetchall()
+            except psycopg2.Error as e:
+                # 마이그레이션 전이라 기록 테이블이 없으면 할당 해제 없이 진행
+                logger.warning(f"할당 해제 기록 조회 실패: {e}")
+                conn.rollback()
+                unassigned = []
+            return assigned, unassigned, now
+        finally:
+            conn.close()
+
+    def get_mapping_watermarks(self) -> Tuple[Optional[datetime], Optional[datetime], datetime]:
+        """(마지막 할당 시각, 마지막 할당 해제 시각, 조회 시점의 DB 시각). 기록이 없으면 None"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(assigned_at), LOCALTIMESTAMP FROM coupon_issuer_mapping")
+            assigned_at, now = cursor.fetchone()
+            try:
+                cursor.execute("SELECT MAX(unassigned_at) FROM coupon_issuer_unassignments")
+                unassigned_at = cursor.fetchone()[0]
+            except psycopg2.Error:
+                conn.rollback()
+                unassigned_at = None
+            return assigned_at, unassigned_at, now
+        finally:
+            conn.close()
+
+    def prune_unassignment_log(self, before: datetime) -> int:
+        """before 이전의 할당 해제 기록을 지우고 지운 행 수를 반환합니다."""
+        if self.disabled:
+            return 0
+        try:
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM coupon_issuer_unassignments WHERE unassigned_at < %s", (before,))
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"할당 해제 기록 정리 실패: {e}")
+            return 0
+
 # 전역 서비스 인스턴스
 issuer_db_service = IssuerDatabaseService() 
\ No newline at end of file
@@ -0,0 +1,313 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from worker_bus import WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# 발행자 DB(PostgreSQL)를 쓸 수 없을 때 사용할 대체 저장소: sqlite(기본, 재시작/워커 간 공유) | memory
+ISSUER_FALLBACK_STORE = os.getenv('ISSUER_FALLBACK_STORE', 'sqlite').lower()
+ISSUER_FALLBACK_DB_PATH = os.getenv(
+    'ISSUER_FALLBACK_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'issuer_fallback.db')
+)
+# 다른 워커가 쓰기 중일 때 대기할 최대 시간(ms)
+ISSUER_FALLBACK_BUSY_TIMEOUT = int(os.getenv('ISSUER_FALLBACK_BUSY_TIMEOUT', '5000'))
+
+# add_coupon_mappings_sqlite.py와 같은 스키마
+FALLBACK_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS coupon_issuers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        phone TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS coupon_issuer_mapping (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        coupon_id INTEGER NOT NULL,
+        issuer_email TEXT NOT NULL,
+        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(coupon_id, issuer_email),
+        FOREIGN KEY (issuer_email) REFERENCES coupon_issuers(email)
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_issuer_email ON coupon_issuers(email)',
+    'CREATE INDEX IF NOT EXISTS idx_mapping_issuer ON coupon_issuer_mapping(issuer_email)',
+    'CREATE INDEX IF NOT EXISTS idx_mapping_coupon ON coupon_issuer_mapping(coupon_id)',
+]
+
+# IN 절 하나에 넣을 최대 쿠폰 ID 수 (SQLite 변수 개수 제한 대비)
+_IN_CHUNK = 500
+
+class InMemoryIssuerStore:
+    """비활성화 모드용 인메모리 발행자/매핑 저장소
+
+    쿠폰 -> 발행자 정방향 인덱스와 발행자 -> 쿠폰 역방향 인덱스를 함께 유지해
+    할당/해제는 O(1), 발행자별 조회/삭제는 O(할당 수), 발행자별 쿠폰 수는 O(1)로 처리합니다.
+    """
+
+    kind = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._issuers: Dict[str, Dict] = {}  # email -> {name, email, phone}
+        self._coupon_to_issuer: Dict[int, str] = {}  # coupon_id -> issuer_email
+        self._issuer_to_coupons: Dict[str, Dict[int, None]] = {}  # issuer_email -> 할당 순서를 유지하는 쿠폰 ID 집합
+
+    def save_issuer(self, name: str, email: str, phone: str = None):
+        with self._lock:
+            self._issuers[email] = {"name": name, "email": email, "phone": phone}
+
+    def ensure_issuer(self, name: str, email: str):
+        """발행자가 없을 때만 추가합니다."""
+        with self._lock:
+            self._issuers.setdefault(email, {"name": name, "email": email, "phone": None})
+
+    def assign(self, coupon_id: int, email: str) -> Optional[str]:
+        """쿠폰을 발행자에게 할당하고 이전 발행자를 반환합니다."""
+        with self._lock:
+            previous = self._coupon_to_issuer.get(coupon_id)
+            if previous is not None:
+                self._issuer_to_coupons[previous].pop(coupon_id, None)
+            self._coupon_to_issuer[coupon_id] = email
+            self._issuer_to_coupons.setdefault(email, {})[coupon_id] = None
+            return previous
+
+    def unassign(self, coupon_id: int) -> Optional[str]:
+        with self._lock:
+            previous = self._coupon_to_issuer.pop(coupon_id, None)
+            if previous is not None:
+                self._issuer_to_coupons[previous].pop(coupon_id, None)
+            return previous
+
+    def delete_issuer(self, email: str):
+        with self._lock:
+            self._issuers.pop(email, None)
+            for coupon_id in self._issuer_to_coupons.pop(email, {}):
+                self._coupon_to_issuer.pop(coupon_id, None)
+
+    def bulk_assign(self, rows: Iterable[Tuple[str, str, str]]) -> Dict:
+        count = 0
+        for coupon_id, email, _ in rows:
+            coupon_id, email = str(coupon_id).strip(), email.strip()
+            if coupon_id.isdigit() and email.find('@') > 0:
+                self.ensure_issuer(email.split('@')[0], email)
+                self.assign(int(coupon_id), email)
+                count += 1
+        return {'rows': count, 'inserted': count, 'updated': 0, 'unchanged': 0}
+
+    def issuer_of(self, coupon_id: int) -> Optional[str]:
+        return self._coupon_to_issuer.get(coupon_id)
+
+    def issuers_of(self, coupon_ids: List[int]) -> Dict[int, str]:
+        mapping = {}
+        for coupon_id in coupon_ids:
+            email = self._coupon_to_issuer.get(coupon_id)
+            if email is not None:
+                mapping[coupon_id] = email
+        return mapping
+
+    def coupon_ids_for(self, email: str) -> List[int]:
+        """발행자에게 할당된 쿠폰 ID (최근 할당 순, DB의 assigned_at DESC와 동일)"""
+        with self._lock:
+            return list(reversed(self._issuer_to_coupons.get(email, {})))
+
+    def coupon_count(self, email: str) -> int:
+        return len(self._issuer_to_coupons.get(email, ()))
+
+    def issuers_with_counts(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    'name': info.get('name') or email,
+                    'email': email,
+                    'phone': info.get('phone'),
+                    'created_at': None,
+                    'coupon_count': len(self._issuer_to_coupons.get(email, ()))
+                }
+                for email, info in self._issuers.items()
+            ]
+
+    def all_coupon_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._coupon_to_issuer)
+
+    def stats(self) -> Dict:
+        return {'type': self.kind, 'issuer_count': len(self._issuers), 'mapping_count': len(self._coupon_to_issuer)}
+
+class SQLiteIssuerStore:
+    """비활성화 모드용 SQLite(WAL) 발행자/매핑 저장소
+
+    InMemoryIssuerStore와 같은 인터페이스를 제공하며, 데이터가 파일에 남아 재시작 후에도 유지되고
+    여러 uvicorn 워커가 같은 파일을 공유합니다. WAL 모드라 읽기는 쓰기와 동시에 진행됩니다.
+    연결은 스레드마다 하나씩 열어 재사용합니다.
+    """
+
+    kind = 'sqlite'
+
+    def __init__(self, db_path: str = ISSUER_FALLBACK_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            for statement in FALLBACK_SCHEMA:
+                conn.execute(statement)
+        logger.info(f"발행자 대체 저장소(SQLite WAL) 사용: {db_path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=ISSUER_FALLBACK_BUSY_TIMEOUT / 1000)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={ISSUER_FALLBACK_BUSY_TIMEOUT}')
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        """쓰기 트랜잭션. BEGIN IMMEDIATE로 워커 간 쓰기를 직렬화합니다."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        return conn
+
+    def save_issuer(self, name: str, email: str, phone: str = None):
+        conn = self._conn()
+        with conn:
+            conn.execute('''
+                INSERT INTO coupon_issuers (name, email, phone) VALUES (?, ?, ?)
+                ON CONFLICT(email) DO UPDATE SET
+                    name = excluded.name, phone = excluded.phone, updated_at = CURRENT_TIMESTAMP
+            ''', (name, email, phone))
+
+    def ensure_issuer(self, name: str, email: str):
+        conn = self._conn()
+        with conn:
+            conn.execute('INSERT OR IGNORE INTO coupon_issuers (name, email) VALUES (?, ?)', (name, email))
+
+    def assign(self, coupon_id: int, email: str) -> Optional[str]:
+        conn = self._write()
+        try:
+            row = conn.execute(
+                'SELECT issuer_email FROM coupon_issuer_mapping WHERE coupon_id = ? ORDER BY assigned_at DESC LIMIT 1',
+                (coupon_id,)
+            ).fetchone()
+            conn.execute('DELETE FROM coupon_issuer_mapping WHERE coupon_id = ?', (coupon_id,))
+            conn.execute(
+                'INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email) VALUES (?, ?)', (coupon_id, email)
+            )
+            conn.commit()
+            return row[0] if row else None
+        except Exception:
+            conn.rollback()
+            raise
+
+    def unassign(self, coupon_id: int) -> Optional[str]:
+        conn = self._write()
+        try:
+            row = conn.execute(
+                'SELECT issuer_email FROM coupon_issuer_mapping WHERE coupon_id = ? LIMIT 1', (coupon_id,)
+            ).fetchone()
+            conn.execute('DELETE FROM coupon_issuer_mapping WHERE coupon_id = ?', (coupon_id,))
+            conn.commit()
+            return row[0] if row else None
+        except Exception:
+            conn.rollback()
+            raise
+
+    def delete_issuer(self, email: str):
+        conn = self._write()
+        try:
+            conn.execute('DELETE FROM coupon_issuer_mapping WHERE issuer_email = ?', (email,))
+            conn.execute('DELETE FROM coupon_issuers WHERE email = ?', (email,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def bulk_assign(self, rows: Iterable[Tuple[str, str, str]]) -> Dict:
+        """(coupon_id, issuer_email, assigned_at) 행들을 스테이징 테이블을 거쳐 한 번에 할당합니다."""
+        from mapping_bulk_loader import load_mapping_rows
+
+        return load_mapping_rows(self._conn(), rows, create_missing_issuers=True)
+
+    def issuer_of(self, coupon_id: int) -> Optional[str]:
+        row = self._conn().execute(
+            'SELECT issuer_email FROM coupon_issuer_mapping WHERE coupon_id = ? LIMIT 1', (coupon_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def issuers_of(self, coupon_ids: List[int]) -> Dict[int, str]:
+        conn = self._conn()
+        mapping = {}
+        for start in range(0, len(coupon_ids), _IN_CHUNK):
+            chunk = coupon_ids[start:start + _IN_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for coupon_id, email in conn.execute(
+                f'SELECT coupon_id, issuer_email FROM coupon_issuer_mapping WHERE coupon_id IN ({placeholders})',
+                chunk
+            ):
+                mapping[coupon_id] = email
+        return mapping
+
+    def coupon_ids_for(self, email: str) -> List[int]:
+        rows = self._conn().execute(
+            'SELECT coupon_id FROM coupon_issuer_mapping WHERE issuer_email = ? ORDER BY assigned_at DESC, id DESC',
+            (email,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def coupon_count(self, email: str) -> int:
+        return self._conn().execute(
+            'SELECT COUNT(*) FROM coupon_issuer_mapping WHERE issuer_email = ?', (email,)
+        ).fetchone()[0]
+
+    def issuers_with_counts(self) -> List[Dict]:
+        rows = self._conn().execute('''
+            SELECT ci.name, ci.email, ci.phone, ci.created_at, COUNT(cim.coupon_id)
+            FROM coupon_issuers ci
+            LEFT JOIN coupon_issuer_mapping cim ON ci.email = cim.issuer_email
+            GROUP BY ci.id
+            ORDER BY ci.created_at DESC, ci.id DESC
+        ''').fetchall()
+        return [
+            {'name': name or email, 'email': email, 'phone': phone, 'created_at': created_at, 'coupon_count': count}
+            for name, email, phone, created_at, count in rows
+        ]
+
+    def all_coupon_ids(self) -> List[int]:
+        return [row[0] for row in self._conn().execute('SELECT DISTINCT coupon_id FROM coupon_issuer_mapping')]
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        return {
+            'type': self.kind,
+            'path': self.db_path,
+            'journal_mode': conn.execute('PRAGMA journal_mode').fetchone()[0],
+            'issuer_count': conn.execute('SELECT COUNT(*) FROM coupon_issuers').fetchone()[0],
+            'mapping_count': conn.execute('SELECT COUNT(*) FROM coupon_issuer_mapping').fetchone()[0]
+        }
+
+def create_fallback_store():
+    """ISSUER_FALLBACK_STORE 설정에 맞는 대체 저장소를 만듭니다. SQLite를 열 수 없으면 인메모리로 대체합니다."""
+    use_sqlite = ISSUER_FALLBACK_STORE == 'sqlite'
+    if not use_sqlite and WEB_CONCURRENCY > 1:
+        # 인메모리 저장소는 워커마다 따로 존재하므로 멀티 워커에서는 공유되는 SQLite를 사용
+        logger.warning("멀티 워커 모드에서는 인메모리 대체 저장소 대신 SQLite 저장소를 사용합니다.")
+        use_sqlite = True
+    if use_sqlite:
+        try:
+            return SQLiteIssuerStore()
+        except Exception as e:
+            logger.error(f"SQLite 대체 저장소 초기화 실패, 인메모리 저장소 사용: {e}")
+    return InMemoryIssuerStore()
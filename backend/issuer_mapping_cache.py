@@ -0,0 +1,217 @@
+import logging
+import os
+import select
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+logger = logging.getLogger(__name__)
+
+# coupon_id -> issuer_email 캐시 설정
+ISSUER_CACHE_ENABLED = os.getenv('ISSUER_CACHE_ENABLED', 'true').lower() == 'true'
+ISSUER_CACHE_MAX_ENTRIES = int(os.getenv('ISSUER_CACHE_MAX_ENTRIES', '200000'))
+# LISTEN 연결이 끊겼을 때 재연결 대기 시간(초, 지수 증가)의 상한
+ISSUER_CACHE_RECONNECT_MAX = float(os.getenv('ISSUER_CACHE_RECONNECT_MAX', '30'))
+# 알림이 없을 때 LISTEN 연결 상태를 확인하는 주기(초)
+ISSUER_CACHE_KEEPALIVE = float(os.getenv('ISSUER_CACHE_KEEPALIVE', '30'))
+
+# coupon_issuer_mapping 변경 알림 채널 (payload: 쿠폰 ID, TRUNCATE 시 '*')
+MAPPING_NOTIFY_CHANNEL = 'coupon_issuer_mapping_changed'
+
+# 마이그레이션에서 실행하는 알림 트리거 DDL
+MAPPING_NOTIFY_DDL = [
+    f'''
+    CREATE OR REPLACE FUNCTION notify_coupon_issuer_mapping_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            PERFORM pg_notify('{MAPPING_NOTIFY_CHANNEL}', '*');
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM pg_notify('{MAPPING_NOTIFY_CHANNEL}', OLD.coupon_id::text);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM pg_notify('{MAPPING_NOTIFY_CHANNEL}', NEW.coupon_id::text);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    ''',
+    'DROP TRIGGER IF EXISTS coupon_issuer_mapping_notify ON coupon_issuer_mapping',
+    '''
+    CREATE TRIGGER coupon_issuer_mapping_notify
+    AFTER INSERT OR UPDATE OR DELETE ON coupon_issuer_mapping
+    FOR EACH ROW EXECUTE PROCEDURE notify_coupon_issuer_mapping_change()
+    ''',
+    'DROP TRIGGER IF EXISTS coupon_issuer_mapping_notify_truncate ON coupon_issuer_mapping',
+    '''
+    CREATE TRIGGER coupon_issuer_mapping_notify_truncate
+    AFTER TRUNCATE ON coupon_issuer_mapping
+    FOR EACH STATEMENT EXECUTE PROCEDURE notify_coupon_issuer_mapping_change()
+    ''',
+]
+
+_MISSING = object()
+
+class IssuerMappingCache:
+    """프로세스 내부 coupon_id -> issuer_email 캐시
+
+    요청한 쿠폰만 DB에서 채우고(할당 없음도 캐시), coupon_issuer_mapping 트리거가 보내는
+    NOTIFY를 백그라운드 스레드에서 받아 해당 쿠폰을 무효화합니다. 같은 워커의 쓰기는
+    write-through로 즉시 반영합니다. LISTEN 연결이 없을 때는 오래된 값을 주지 않도록
+    캐시를 쓰지 않고 DB를 직접 조회합니다.
+    """
+
+    def __init__(self, max_entries: int = ISSUER_CACHE_MAX_ENTRIES, enabled: bool = ISSUER_CACHE_ENABLED):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[int, Optional[str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 무효화가 일어날 때마다 증가. 조회 중에 무효화가 있었다면 조회 결과를 캐시에 넣지 않습니다.
+        self._version = 0
+        self._listening = False
+        self._listener = None
+        self._stop = threading.Event()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'notifications': 0, 'reconnects': 0}
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self._listening
+
+    def get_many(self, coupon_ids: List[int], loader: Callable[[List[int]], Dict[int, str]]) -> Dict[int, str]:
+        """쿠폰 ID들의 발행자 이메일을 반환합니다. 캐시에 없는 쿠폰만 loader로 조회합니다."""
+        if not self.active:
+            return loader(coupon_ids)
+
+        result: Dict[int, str] = {}
+        missing: List[int] = []
+        with self._lock:
+            for coupon_id in coupon_ids:
+                email = self._entries.get(coupon_id, _MISSING)
+                if email is _MISSING:
+                    missing.append(coupon_id)
+                    continue
+                self._entries.move_to_end(coupon_id)
+                if email is not None:
+                    result[coupon_id] = email
+            self._stats['hits'] += len(coupon_ids) - len(missing)
+            self._stats['misses'] += len(missing)
+            version = self._version
+
+        if missing:
+            loaded = loader(missing)
+            result.update(loaded)
+            with self._lock:
+                if version == self._version and self.active:
+                    for coupon_id in missing:
+                        self._store(coupon_id, loaded.get(coupon_id))
+        return result
+
+    def put(self, coupon_id: int, email: Optional[str]):
+        """이 워커에서 커밋한 변경을 즉시 반영합니다. (None: 할당 없음)"""
+        with self._lock:
+            self._version += 1
+            if self.active:
+                self._store(coupon_id, email)
+
+    def invalidate(self, coupon_ids: List[int]):
+        with self._lock:
+            self._version += 1
+            for coupon_id in coupon_ids:
+                self._entries.pop(coupon_id, None)
+            self._stats['invalidations'] += len(coupon_ids)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._stats['invalidations'] += 1
+
+    def _store(self, coupon_id: int, email: Optional[str]):
+        self._entries[coupon_id] = email
+        self._entries.move_to_end(coupon_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'listening': self._listening,
+                'entries': len(self._entries),
+                **self._stats
+            }
+
+    def start_listener(self, database_url: str):
+        """NOTIFY 수신 스레드를 시작합니다. 여러 번 호출해도 한 번만 실행됩니다."""
+        if not self.enabled or not database_url or self._listener is not None:
+            return
+        self._listener = threading.Thread(
+            target=self._listen_loop, args=(database_url,), name="issuer-cache-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+
+    def _listen_loop(self, database_url: str):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(database_url, connect_timeout=5)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {MAPPING_NOTIFY_CHANNEL}")
+                # 연결이 없던 동안의 변경은 알 수 없으므로 비우고 시작
+                self.invalidate_all()
+                self._listening = True
+                backoff = 1.0
+                logger.info("발행자 매핑 캐시: 변경 알림 수신 시작")
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], ISSUER_CACHE_KEEPALIVE) == ([], [], []):
+                        # 알림이 없으면 연결이 살아있는지만 확인
+                        # (이 쿼리 중에 온 알림은 conn.notifies에 쌓이고 소켓은 다시 readable이 되지 않으므로 아래에서 함께 처리)
+                        cursor.execute("SELECT 1")
+                    else:
+                        conn.poll()
+                    payloads = [notify.payload for notify in conn.notifies]
+                    conn.notifies.clear()
+                    self._apply_notifications(payloads)
+            except Exception as e:
+                logger.error(f"발행자 매핑 캐시 알림 연결 실패: {e}")
+            finally:
+                if self._listening:
+                    self._listening = False
+                    self.invalidate_all()
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            if self._stop.wait(backoff):
+                break
+            self._stats['reconnects'] += 1
+            backoff = min(backoff * 2, ISSUER_CACHE_RECONNECT_MAX)
+
+    def _apply_notifications(self, payloads: List[str]):
+        if not payloads:
+            return
+        self._stats['notifications'] += len(payloads)
+        if '*' in payloads:
+            self.invalidate_all()
+            return
+        coupon_ids = []
+        for payload in payloads:
+            try:
+                coupon_ids.append(int(payload))
+            except ValueError:
+                logger.warning(f"알 수 없는 매핑 변경 알림: {payload}")
+        self.invalidate(coupon_ids)
+
+# 전역 캐시 인스턴스
+issuer_mapping_cache = IssuerMappingCache()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+멀티 워커 부하 테스트 스크립트
+워커 수를 바꿔가며 uvicorn 서버를 띄우고 같은 부하를 걸어 처리량이 코어 수에 비례해 늘어나는지 확인합니다.
+
+- 부하 생성기는 별도 프로세스들(keep-alive HTTP 연결)로 실행되어 서버와 GIL을 공유하지 않습니다.
+- 워커 수별 초당 요청 수, p50/p95/p99 지연 시간, 1워커 대비 배율/효율을 출력합니다.
+- 서버 코어와 부하 생성기 코어가 겹치지 않도록 (워커 수 + 클라이언트 수) <= CPU 수로 맞추는 것을 권장합니다.
+
+사용법: python load_test.py [--workers 1,2,4] [--path /health] [--duration 10] [--clients 4] [--connections 16] [--output report.json]
+"""
+
+import http.client
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import Pool
+from typing import Dict, List
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_HOST = "127.0.0.1"
+LOAD_TEST_PORT = int(os.getenv("LOAD_TEST_PORT", "8765"))
+
+def client_worker(args) -> Dict:
+    """연결 여러 개를 스레드로 열어 duration초 동안 요청을 보내고 지연 시간(ms)을 모읍니다.
+
+    args: (port, path, duration, connections, headers) - 프로세스 풀에 넘기기 위해 튜플로 받습니다.
+    """
+    port, path, duration, connections, headers = args
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run():
+        conn = http.client.HTTPConnection(LOAD_TEST_HOST, port, timeout=60)
+        local = []
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    errors[0] += 1
+                    continue
+            except Exception:
+                errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(LOAD_TEST_HOST, port, timeout=60)
+                continue
+            local.append((time.perf_counter() - started) * 1000)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=run) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'latencies': latencies, 'errors': errors[0]}
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def wait_for_server(port: int = LOAD_TEST_PORT, timeout: float = 30) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(LOAD_TEST_HOST, port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except Exception:
+            time.sleep(0.3)
+    return False
+
+def start_server(workers: int, port: int = LOAD_TEST_PORT, env: Dict = None, log_file=None) -> subprocess.Popen:
+    """uvicorn 서버를 지정한 워커 수로 띄우고 응답할 때까지 기다립니다."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", LOAD_TEST_HOST, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(env or os.environ, WEB_CONCURRENCY=str(workers)),
+        stdout=log_file, stderr=log_file
+    )
+    if not wait_for_server(port):
+        stop_server(server)
+        raise RuntimeError(f"서버가 시작되지 않았습니다. (워커 {workers}개)")
+    return server
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    server.wait(timeout=30)
+
+def measure(port: int, path: str, duration: float, clients: int, connections: int, headers: Dict = None) -> Dict:
+    """클라이언트 프로세스 clients개로 부하를 걸고 처리량과 지연 시간 백분위를 반환합니다."""
+    started = time.monotonic()
+    with Pool(clients) as pool:
+        results = pool.map(client_worker, [(port, path, duration, connections, headers)] * clients)
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    return {
+        'requests': len(latencies),
+        'errors': sum(result['errors'] for result in results),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2)
+    }
+
+def run_load(workers: int, path: str, duration: float, clients: int, connections: int) -> Dict:
+    """워커 수를 지정해 서버를 띄우고 부하를 건 결과를 반환합니다."""
+    server = start_server(workers)
+    try:
+        # 워커가 모두 뜰 때까지 잠시 예열
+        client_worker((LOAD_TEST_PORT, path, 1, connections, None))
+        return {'workers': workers, **measure(LOAD_TEST_PORT, path, duration, clients, connections)}
+    finally:
+        stop_server(server)
+
+def main():
+    """메인 실행 함수"""
+    args = sys.argv[1:]
+    worker_counts = [1, 2, 4]
+    path = "/health"
+    duration = 10.0
+    clients = max(1, (os.cpu_count() or 2) // 2)
+    connections = 16
+    output_path = None
+    while args:
+        arg = args.pop(0)
+        if arg == '--workers' and args:
+            worker_counts = [int(value) for value in args.pop(0).split(',')]
+        elif arg == '--path' and args:
+            path = args.pop(0)
+        elif arg == '--duration' and args:
+            duration = float(args.pop(0))
+        elif arg == '--clients' and args:
+            clients = int(args.pop(0))
+        elif arg == '--connections' and args:
+            connections = int(args.pop(0))
+        elif arg == '--output' and args:
+            output_path = args.pop(0)
+
+    logger.info(f"=== 멀티 워커 부하 테스트: {path}, {duration}초, 클라이언트 {clients}개 x 연결 {connections}개, CPU {os.cpu_count()}개 ===")
+    try:
+        results = []
+        for workers in worker_counts:
+            result = run_load(workers, path, duration, clients, connections)
+            results.append(result)
+            logger.info(
+                f"워커 {workers}개: {result['rps']} req/s, p50 {result['p50_ms']}ms, "
+                f"p95 {result['p95_ms']}ms, p99 {result['p99_ms']}ms, 오류 {result['errors']}건"
+            )
+    except Exception as e:
+        logger.error(f"부하 테스트 실패: {e}")
+        return False
+
+    baseline = results[0]['rps'] / results[0]['workers'] if results[0]['rps'] else 0
+    logger.info("=== 확장성 요약 ===")
+    for result in results:
+        speedup = result['rps'] / baseline if baseline else 0
+        result['speedup'] = round(speedup, 2)
+        result['efficiency'] = round(speedup / result['workers'], 2)
+        logger.info(f"워커 {result['workers']}개: {result['speedup']}배 (효율 {result['efficiency']:.0%})")
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as file:
+            json.dump({'path': path, 'duration': duration, 'cpu_count': os.cpu_count(), 'results': results}, file, indent=2)
+        logger.info(f"결과를 저장했습니다: {output_path}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Railway 로그 export에서 쿠폰-발행자 매핑 복구 스크립트
+`발행자 X에게 할당된 쿠폰 ID: [...]` 로그 줄을 스트리밍으로 읽어 매핑을 재구성합니다.
+
+- 파일은 한 줄씩 읽고, 중복 제거 상태는 (이메일, 쿠폰 ID 집합)별 최신 시각만 보관합니다.
+- 여러 파일은 프로세스 풀에서 병렬로 처리합니다.
+- 결과는 coupon_id,issuer_email,assigned_at CSV로 저장하거나(mapping_bulk_loader 형식),
+  --apply로 DATABASE_URL에 바로 병합합니다. (이미 할당된 쿠폰은 재할당하지 않음)
+
+사용법: python log_recovery.py logs.*.csv [--output final_new_mappings.csv] [--apply] [--workers N]
+"""
+
+import csv
+import glob
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOG_RECOVERY_WORKERS = int(os.getenv("LOG_RECOVERY_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 정규식 전에 걸러내는 고정 문자열과 매핑 로그 매처
+ASSIGNMENT_MARKER = "에게 할당된 쿠폰 ID:"
+ASSIGNMENT_PATTERN = re.compile(r"발행자 (?P<email>[^\s@]+@[^\s@]+)에게 할당된 쿠폰 ID: \[(?P<ids>[\d,\s]*)\]")
+COUPON_ID_PATTERN = re.compile(r"\d+")
+
+Snapshot = Tuple[str, FrozenSet[int]]  # (발행자 이메일, 쿠폰 ID 집합)
+
+# 대용량 로그 메시지 필드도 읽을 수 있도록 필드 크기 제한 해제
+csv.field_size_limit(sys.maxsize)
+
+def _normalize_timestamp(timestamp: str) -> str:
+    """'2025-10-09T12:44:57.010675559Z' -> '2025-10-09 12:44:57.010675' (DB timestamp 형식)"""
+    timestamp = timestamp.strip().rstrip('Z').replace('T', ' ')
+    head, dot, fraction = timestamp.partition('.')
+    return f"{head}.{fraction[:6]}" if dot else head
+
+def scan_log_file(path: str) -> Dict[Snapshot, str]:
+    """로그 CSV 한 개를 스트리밍으로 읽어 (이메일, 쿠폰 ID 집합)별 최신 시각을 반환합니다."""
+    snapshots: Dict[Snapshot, str] = {}
+    lines = matched = 0
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, None) or []
+        message_idx = header.index('message') if 'message' in header else 0
+        timestamp_idx = header.index('timestamp') if 'timestamp' in header else len(header) - 1
+
+        for row in reader:
+            lines += 1
+            if len(row) <= max(message_idx, timestamp_idx):
+                continue
+            message = row[message_idx]
+            if ASSIGNMENT_MARKER not in message:
+                continue
+            match = ASSIGNMENT_PATTERN.search(message)
+            if not match:
+                continue
+            matched += 1
+            key = (match.group('email'), frozenset(int(cid) for cid in COUPON_ID_PATTERN.findall(match.group('ids'))))
+            timestamp = _normalize_timestamp(row[timestamp_idx])
+            if snapshots.get(key, '') < timestamp:
+                snapshots[key] = timestamp
+
+    logger.info(f"{path}: {lines}줄 중 매핑 로그 {matched}줄, 고유 스냅샷 {len(snapshots)}개")
+    return snapshots
+
+def collect_snapshots(paths: List[str], workers: int = LOG_RECOVERY_WORKERS) -> Dict[Snapshot, str]:
+    """여러 로그 파일을 병렬로 읽어 스냅샷을 합칩니다. (같은 스냅샷은 최신 시각 유지)"""
+    merged: Dict[Snapshot, str] = {}
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            results = executor.map(scan_log_file, paths)
+            for snapshots in results:
+                _merge_snapshots(merged, snapshots)
+    else:
+        for path in paths:
+            _merge_snapshots(merged, scan_log_file(path))
+    return merged
+
+def _merge_snapshots(merged: Dict[Snapshot, str], snapshots: Dict[Snapshot, str]):
+    for key, timestamp in snapshots.items():
+        if merged.get(key, '') < timestamp:
+            merged[key] = timestamp
+
+def snapshots_to_mappings(snapshots: Dict[Snapshot, str]) -> Iterator[Tuple[str, str, str]]:
+    """스냅샷을 (coupon_id, issuer_email, assigned_at) 행으로 변환합니다.
+
+    발행자별로 가장 최근 스냅샷의 쿠폰 목록을 사용하고, 한 쿠폰이 여러 발행자에게 나오면
+    더 최근 로그의 발행자가 적용됩니다.
+    """
+    latest_by_issuer: Dict[str, Tuple[str, FrozenSet[int]]] = {}
+    for (email, coupon_ids), timestamp in snapshots.items():
+        current = latest_by_issuer.get(email)
+        if current is None or current[0] < timestamp:
+            latest_by_issuer[email] = (timestamp, coupon_ids)
+
+    coupon_owner: Dict[int, Tuple[str, str]] = {}
+    for email, (timestamp, coupon_ids) in latest_by_issuer.items():
+        for coupon_id in coupon_ids:
+            owner = coupon_owner.get(coupon_id)
+            if owner is None or owner[0] < timestamp:
+                coupon_owner[coupon_id] = (timestamp, email)
+
+    for coupon_id in sorted(coupon_owner):
+        timestamp, email = coupon_owner[coupon_id]
+        yield (str(coupon_id), email, timestamp)
+
+def write_mapping_csv(rows: Iterable[Tuple[str, str, str]], output_path: str) -> int:
+    """매핑 행을 mapping_bulk_loader가 읽을 수 있는 CSV로 저장합니다."""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['coupon_id', 'issuer_email', 'assigned_at'])
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def recover_mappings(paths: List[str], workers: int = LOG_RECOVERY_WORKERS) -> List[Tuple[str, str, str]]:
+    """로그 파일들에서 매핑 행 목록을 복구합니다."""
+    snapshots = collect_snapshots(paths, workers)
+    mappings = list(snapshots_to_mappings(snapshots))
+    logger.info(f"로그 {len(paths)}개 파일에서 고유 스냅샷 {len(snapshots)}개, 매핑 {len(mappings)}개 복구")
+    return mappings
+
+def main():
+    """메인 실행 함수"""
+    args = sys.argv[1:]
+    output_path = "final_new_mappings.csv"
+    workers = LOG_RECOVERY_WORKERS
+    patterns = []
+    apply = False
+    while args:
+        arg = args.pop(0)
+        if arg == '--output' and args:
+            output_path = args.pop(0)
+        elif arg == '--workers' and args:
+            workers = int(args.pop(0))
+        elif arg == '--apply':
+            apply = True
+        else:
+            patterns.append(arg)
+
+    paths = sorted({path for pattern in (patterns or ['logs.*.csv']) for path in glob.glob(pattern)})
+    if not paths:
+        logger.error("복구할 로그 CSV 파일을 찾을 수 없습니다.")
+        return False
+
+    try:
+        mappings = recover_mappings(paths, workers)
+        count = write_mapping_csv(mappings, output_path)
+        logger.info(f"복구된 매핑 {count}개를 저장했습니다: {output_path}")
+
+        if apply:
+            import psycopg2
+            from mapping_bulk_loader import load_mapping_rows
+
+            database_url = os.getenv('DATABASE_URL')
+            if not database_url:
+                logger.error("DATABASE_URL 환경 변수가 설정되지 않았습니다.")
+                return False
+            conn = psycopg2.connect(database_url)
+            try:
+                report = load_mapping_rows(conn, mappings, reassign=False, create_missing_issuers=True)
+            finally:
+                conn.close()
+            logger.info(f"DB 반영: 신규 {report['inserted']}개, 기존 할당 유지 {report['skipped_existing']}개")
+        return True
+
+    except Exception as e:
+        logger.error(f"로그 복구 실패: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
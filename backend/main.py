@@ -1,17 +1,31 @@
 from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 import uvicorn
 from datetime import datetime, timedelta
 import logging
+import json
 import os
 import jwt
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from database import db_service
+from coupon_search import coupon_search
+from coupon_snapshot import coupon_snapshot
+from statistics_rollup import statistics_rollup
+from statistics_cache import statistics_cache
+from single_flight import single_flight
+from coupon_changes import coupon_changes, InvalidChangeToken
 from issuer_management import issuer_manager
 from issuer_database import issuer_db_service
+from admin_jobs import admin_job_runner
+from coupon_export import EXPORT_MEDIA_TYPES, EXPORT_WRITERS
+from compression import ResponseCompressionMiddleware, compression_stats, COMPRESSION_ENABLED
+from worker_bus import worker_bus, WEB_CONCURRENCY, WORKER_BUS_PAYLOAD_LIMIT
+from temp_coupon_store import TempCouponStore, TEMP_COUPON_ID_START
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -19,9 +33,26 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="쿠폰 트래커 API", version="2.0.0")
 
+@app.on_event("startup")
+async def start_issuer_db_probe():
+    """발행자 DB 연결 확인을 백그라운드에서 시작합니다 (부팅을 막지 않음)."""
+    issuer_db_service.start_readiness_probe()
+    # 멀티 워커 모드: 워커 간 동기화 채널 시작 (발행자 DB와 같은 PostgreSQL 사용)
+    worker_bus.start(issuer_db_service.database_url)
+    # COUPON_SNAPSHOT_ENABLED=true이면 쿠폰 목록 메모리 스냅샷을 백그라운드에서 만듭니다.
+    coupon_snapshot.start(db_service)
+    # 통계 집계 테이블 증분 갱신 (발행자 DB가 PostgreSQL일 때)
+    statistics_rollup.start()
+
+@app.on_event("shutdown")
+async def stop_worker_bus():
+    worker_bus.stop()
+    coupon_snapshot.stop()
+    statistics_rollup.stop()
+
 # Railway 환경 및 SQLite 경로 확인을 위한 엔드포인트 추가
 @app.get("/api/debug/env")
-async def debug_environment():
+def debug_environment():
     """Railway 환경 및 SQLite 설정 확인 (디버깅용)"""
     import os
     from issuer_database import issuer_db_service
@@ -73,6 +104,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 목록/통계 응답 압축 설정 (gzip/brotli)
+if COMPRESSION_ENABLED:
+    app.add_middleware(ResponseCompressionMiddleware)
+
 # 확장된 쿠폰 모델
 class Coupon(BaseModel):
     id: Optional[int] = None
@@ -95,9 +130,68 @@ class PaginatedCoupons(BaseModel):
     size: int
     total_pages: int
 
-# 임시 데이터베이스 (메모리) - 새로운 쿠폰 추가용
-temp_coupons_db: List[Coupon] = []
-temp_counter = 10000  # DB 쿠폰과 구분하기 위해 큰 숫자부터 시작
+# 부트스트랩 요청에서 고를 수 있는 조회 (기본: 전부)
+BOOTSTRAP_SECTIONS = ("coupons", "coupon_names", "stores", "statistics")
+
+class BootstrapRequest(BaseModel):
+    include: List[str] = list(BOOTSTRAP_SECTIONS)
+    page: int = Field(1, ge=1)
+    size: int = Field(100, ge=1, le=1000)
+    search: Optional[str] = None
+    coupon_names: Optional[List[str]] = None
+    store_names: Optional[List[str]] = None
+    issuer: Optional[str] = None
+    unassigned: bool = False
+
+# 동기화 응답 메시지 하나에 담는 임시 쿠폰 데이터 크기 (NOTIFY payload 한도 안에서 메시지 틀 여유를 둠)
+TEMP_COUPON_SYNC_BATCH_BYTES = WORKER_BUS_PAYLOAD_LIMIT - 500
+
+# 임시 저장소 - 새로운 쿠폰 추가용 (ID별 인덱스, TEMP_COUPON_DB_PATH 설정 시 파일에도 저장)
+temp_coupons_db = TempCouponStore(Coupon)
+
+def allocate_temp_coupon_id() -> int:
+    """임시 쿠폰 ID를 발급합니다. 멀티 워커 모드에서는 워커 간에 겹치지 않도록 항상 DB 시퀀스를 사용합니다.
+
+    시퀀스에 접근할 수 없으면 예외를 올립니다. (워커별 카운터는 모두 같은 값에서 시작하므로 대신 쓰지 않음)
+    """
+    if worker_bus.enabled:
+        return worker_bus.next_id('temp_coupon_id_seq', start=TEMP_COUPON_ID_START)
+    return temp_coupons_db.allocate_id()
+
+def _apply_temp_coupon_upsert(data: dict):
+    # 다른 워커가 이미 저장했으므로 메모리에만 반영
+    temp_coupons_db.add(Coupon(**data), persist=False)
+
+def _apply_temp_coupon_delete(data: dict):
+    temp_coupons_db.delete(data['id'], persist=False)
+
+def _apply_temp_coupon_batch(data: dict):
+    for coupon_id in data.get('deleted', []):
+        temp_coupons_db.delete(coupon_id, persist=False)
+    for coupon in data.get('coupons', []):
+        temp_coupons_db.add(Coupon(**coupon), persist=False)
+
+def _share_temp_coupons(data: dict):
+    """새로 연결된 워커에게 이 워커가 가진 임시 쿠폰을 보냅니다. (메시지 크기 한도까지 묶어서 전송)"""
+    coupons, deleted_ids = temp_coupons_db.snapshot()
+    items = [('deleted', coupon_id) for coupon_id in deleted_ids] + [('coupons', coupon.model_dump()) for coupon in coupons]
+    batch, batch_size = {'coupons': [], 'deleted': []}, 0
+    for key, item in items:
+        item_size = len(json.dumps(item, ensure_ascii=False, default=str).encode('utf-8')) + 2
+        if batch_size and batch_size + item_size > TEMP_COUPON_SYNC_BATCH_BYTES:
+            worker_bus.publish('temp_coupon.batch', batch)
+            batch, batch_size = {'coupons': [], 'deleted': []}, 0
+        batch[key].append(item)
+        batch_size += item_size
+    if batch_size:
+        worker_bus.publish('temp_coupon.batch', batch)
+
+worker_bus.subscribe('temp_coupon.upsert', _apply_temp_coupon_upsert)
+worker_bus.subscribe('temp_coupon.delete', _apply_temp_coupon_delete)
+worker_bus.subscribe('temp_coupon.batch', _apply_temp_coupon_batch)
+worker_bus.subscribe('temp_coupon.sync', _share_temp_coupons)
+# 연결(재연결) 직후 다른 워커들에게 현재 임시 쿠폰을 요청
+worker_bus.on_connect(lambda: worker_bus.publish('temp_coupon.sync', {}))
 
 # 새로운 모델 정의
 class IssuerAuthRequest(BaseModel):
@@ -146,8 +240,21 @@ async def api_health_check():
     """API 헬스체크 엔드포인트"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/ready")
+async def readiness_check():
+    """readiness 엔드포인트 - 발행자 DB 초기화가 끝나기 전에는 503을 반환합니다."""
+    issuer_db = issuer_db_service.readiness()
+    if not issuer_db['ready']:
+        return JSONResponse(status_code=503, content={"status": "starting", "issuer_db": issuer_db})
+    status = "degraded" if issuer_db['disabled'] else "ready"
+    return {"status": status, "issuer_db": issuer_db, "workers": worker_bus.stats(),
+            "search": coupon_search.stats(), "snapshot": coupon_snapshot.stats(),
+            "statistics_rollup": statistics_rollup.stats(), "statistics_cache": statistics_cache.stats(),
+            "single_flight": single_flight.stats(), "coupon_changes": coupon_changes.stats(),
+            "timestamp": datetime.now().isoformat()}
+
 @app.get("/coupons")
-async def get_coupons(
+def get_coupons(
     search: str = Query(None, description="검색어"),
     coupon_names: str = Query(None, description="쿠폰명 필터 (쉼표로 구분)"),
     store_names: str = Query(None, description="지점명 필터 (쉼표로 구분)"),
@@ -190,7 +297,7 @@ async def get_coupons(
         raise HTTPException(status_code=500, detail="쿠폰 조회에 실패했습니다")
 
 @app.get("/api/coupons")
-async def get_api_coupons(
+def get_api_coupons(
     search: str = Query(None, description="검색어"),
     coupon_names: str = Query(None, description="쿠폰명 필터 (쉼표로 구분)"),
     store_names: str = Query(None, description="지점명 필터 (쉼표로 구분)"),
@@ -237,8 +344,51 @@ async def get_api_coupons(
         logger.error(f"쿠폰 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="쿠폰 조회에 실패했습니다")
 
+@app.get("/api/coupons/export")
+async def export_coupons(
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="내보내기 형식 (csv 또는 ndjson)"),
+    search: str = Query(None, description="검색어"),
+    coupon_names: str = Query(None, description="쿠폰명 필터 (쉼표로 구분)"),
+    store_names: str = Query(None, description="지점명 필터 (쉼표로 구분)"),
+    issuer: str = Query(None, description="발행자 이메일 필터"),
+    unassigned: bool = Query(False, description="발행자 미지정만 조회"),
+    team_id: str = Query(None, description="팀 ID")
+):
+    """쿠폰 전체 데이터를 CSV/NDJSON으로 스트리밍합니다. (서버 사이드 커서 사용, 메모리 사용량 일정)"""
+    coupon_name_list = [name.strip() for name in coupon_names.split(',')] if coupon_names else None
+    store_name_list = [name.strip() for name in store_names.split(',')] if store_names else None
+    
+    batches = db_service.iter_coupon_batches(
+        team_id=team_id,
+        search=search,
+        coupon_names=coupon_name_list,
+        store_names=store_name_list,
+        issuer=issuer,
+        unassigned=unassigned
+    )
+    filename = f"coupons_{team_id or 'all'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    logger.info(f"쿠폰 내보내기 시작: {filename}")
+    
+    return StreamingResponse(
+        EXPORT_WRITERS[format](batches),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/coupons/by-code/{code}")
+def get_coupon_by_code(code: str):
+    """쿠폰 코드로 쿠폰 하나를 조회합니다. (코드 일치 인덱스 + 최근 조회 캐시, 발행자 포함)"""
+    try:
+        coupon = db_service.get_coupon_by_code(code)
+    except Exception as e:
+        logger.error(f"쿠폰 코드 조회 실패: {e}")
+        raise HTTPException(status_code=500, detail="쿠폰 조회에 실패했습니다")
+    if coupon is None:
+        raise HTTPException(status_code=404, detail="쿠폰을 찾을 수 없습니다")
+    return coupon
+
 @app.get("/coupon-names")
-async def get_coupon_names():
+def get_coupon_names():
     """쿠폰명 리스트를 반환합니다."""
     try:
         coupon_names = db_service.get_coupon_names_from_db()
@@ -248,7 +398,7 @@ async def get_coupon_names():
         raise HTTPException(status_code=500, detail="쿠폰명 리스트 조회에 실패했습니다.")
 
 @app.get("/api/coupon-names")
-async def get_api_coupon_names(team_id: str = Query(None, description="팀 ID")):
+def get_api_coupon_names(team_id: str = Query(None, description="팀 ID")):
     """쿠폰명 리스트를 반환합니다. (API 경로)"""
     try:
         coupon_names = db_service.get_coupon_names_from_db(team_id)
@@ -258,7 +408,7 @@ async def get_api_coupon_names(team_id: str = Query(None, description="팀 ID"))
         raise HTTPException(status_code=500, detail="쿠폰명 조회에 실패했습니다")
 
 @app.get("/api/teams/{team_id}/coupon-names")
-async def get_team_coupon_names(team_id: str):
+def get_team_coupon_names(team_id: str):
     """팀별 쿠폰명 리스트를 반환합니다."""
     try:
         coupon_names = db_service.get_coupon_names_from_db(team_id)
@@ -268,7 +418,7 @@ async def get_team_coupon_names(team_id: str):
         raise HTTPException(status_code=500, detail=f"팀 {team_id} 쿠폰명 조회에 실패했습니다")
 
 @app.get("/stores")
-async def get_stores():
+def get_stores():
     """지점명 리스트를 반환합니다."""
     try:
         store_names = db_service.get_stores_from_db()
@@ -278,7 +428,7 @@ async def get_stores():
         raise HTTPException(status_code=500, detail="지점명 리스트 조회에 실패했습니다.")
 
 @app.get("/api/stores")
-async def get_api_stores(team_id: str = Query(None, description="팀 ID")):
+def get_api_stores(team_id: str = Query(None, description="팀 ID")):
     """지점명 리스트를 반환합니다. (API 경로)"""
     try:
         stores = db_service.get_stores_from_db(team_id)
@@ -288,7 +438,7 @@ async def get_api_stores(team_id: str = Query(None, description="팀 ID")):
         raise HTTPException(status_code=500, detail="지점명 조회에 실패했습니다")
 
 @app.get("/api/teams/{team_id}/stores")
-async def get_team_stores(team_id: str):
+def get_team_stores(team_id: str):
     """팀별 지점명 리스트를 반환합니다."""
     try:
         stores = db_service.get_stores_from_db(team_id)
@@ -298,25 +448,26 @@ async def get_team_stores(team_id: str):
         raise HTTPException(status_code=500, detail=f"팀 {team_id} 지점명 조회에 실패했습니다")
 
 @app.post("/api/coupons", response_model=Coupon)
-async def create_coupon(coupon: Coupon):
+def create_coupon(coupon: Coupon):
     """새 쿠폰을 임시 저장소에 추가합니다."""
-    global temp_counter
-    coupon.id = temp_counter
-    temp_counter += 1
-    temp_coupons_db.append(coupon)
+    try:
+        coupon.id = allocate_temp_coupon_id()
+    except Exception as e:
+        logger.error(f"임시 쿠폰 ID 발급 실패: {e}")
+        raise HTTPException(status_code=503, detail="쿠폰 ID 발급에 실패했습니다. 잠시 후 다시 시도해주세요.")
+    temp_coupons_db.add(coupon)
+    worker_bus.publish('temp_coupon.upsert', coupon.model_dump())
     logger.info(f"새 쿠폰 추가: {coupon.name}")
     return coupon
 
 @app.put("/api/coupons/{coupon_id}", response_model=Coupon)
-async def update_coupon(coupon_id: int, coupon: Coupon):
+def update_coupon(coupon_id: int, coupon: Coupon):
     """쿠폰을 수정합니다. (임시 저장소의 쿠폰만 수정 가능)"""
     # 임시 저장소에서 쿠폰 찾기
-    for i, existing_coupon in enumerate(temp_coupons_db):
-        if existing_coupon.id == coupon_id:
-            coupon.id = coupon_id
-            temp_coupons_db[i] = coupon
-            logger.info(f"쿠폰 수정: {coupon.name}")
-            return coupon
+    if temp_coupons_db.replace(coupon_id, coupon):
+        worker_bus.publish('temp_coupon.upsert', coupon.model_dump())
+        logger.info(f"쿠폰 수정: {coupon.name}")
+        return coupon
     
     # DB 쿠폰은 수정할 수 없음을 알림
     if coupon_id < 10000:
@@ -325,14 +476,14 @@ async def update_coupon(coupon_id: int, coupon: Coupon):
     raise HTTPException(status_code=404, detail="쿠폰을 찾을 수 없습니다")
 
 @app.delete("/api/coupons/{coupon_id}")
-async def delete_coupon(coupon_id: int):
+def delete_coupon(coupon_id: int):
     """쿠폰을 삭제합니다. (임시 저장소의 쿠폰만 삭제 가능)"""
     # 임시 저장소에서 쿠폰 찾기
-    for i, coupon in enumerate(temp_coupons_db):
-        if coupon.id == coupon_id:
-            deleted_coupon = temp_coupons_db.pop(i)
-            logger.info(f"쿠폰 삭제: {deleted_coupon.name}")
-            return {"message": "쿠폰이 삭제되었습니다"}
+    deleted_coupon = temp_coupons_db.delete(coupon_id) if temp_coupons_db.get(coupon_id) is not None else None
+    if deleted_coupon is not None:
+        worker_bus.publish('temp_coupon.delete', {'id': coupon_id})
+        logger.info(f"쿠폰 삭제: {deleted_coupon.name}")
+        return {"message": "쿠폰이 삭제되었습니다"}
     
     # DB 쿠폰은 삭제할 수 없음을 알림
     if coupon_id < 10000:
@@ -341,14 +492,16 @@ async def delete_coupon(coupon_id: int):
     raise HTTPException(status_code=404, detail="쿠폰을 찾을 수 없습니다")
 
 @app.patch("/api/coupons/{coupon_id}/use")
-async def use_coupon(coupon_id: int):
+def use_coupon(coupon_id: int):
     """쿠폰을 사용 처리합니다. (임시 저장소의 쿠폰만 사용 처리 가능)"""
     # 임시 저장소에서 쿠폰 찾기
-    for coupon in temp_coupons_db:
-        if coupon.id == coupon_id:
-            coupon.used = True
-            logger.info(f"쿠폰 사용: {coupon.name}")
-            return coupon
+    coupon = temp_coupons_db.get(coupon_id)
+    if coupon is not None:
+        coupon = coupon.model_copy(update={'status': '사용완료'})
+        temp_coupons_db.replace(coupon_id, coupon)
+        worker_bus.publish('temp_coupon.upsert', coupon.model_dump())
+        logger.info(f"쿠폰 사용: {coupon.name}")
+        return coupon
     
     # DB 쿠폰은 사용 처리할 수 없음을 알림
     if coupon_id < 10000:
@@ -357,7 +510,7 @@ async def use_coupon(coupon_id: int):
     raise HTTPException(status_code=404, detail="쿠폰을 찾을 수 없습니다")
 
 @app.patch("/api/coupons/{coupon_id}/registered-by")
-async def update_coupon_registered_by(coupon_id: int, request: dict):
+def update_coupon_registered_by(coupon_id: int, request: dict):
     try:
         registered_by = request.get('registered_by')
         if not registered_by:
@@ -374,7 +527,7 @@ async def update_coupon_registered_by(coupon_id: int, request: dict):
         raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
 
 @app.patch("/api/coupons/{coupon_id}/assign-issuer")
-async def assign_coupon_issuer(coupon_id: int, request: dict):
+def assign_coupon_issuer(coupon_id: int, request: dict):
     """쿠폰을 발행자에게 할당합니다."""
     try:
         issuer_email = request.get('issuer_email')
@@ -401,10 +554,19 @@ async def assign_coupon_issuer(coupon_id: int, request: dict):
         raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
 
 @app.get("/api/statistics")
-async def get_statistics():
-    """쿠폰 통계 정보를 반환합니다."""
+def get_statistics():
+    """쿠폰 통계 정보를 반환합니다. (캐시된 응답, TTL이 지나면 백그라운드에서 다시 계산)"""
+    return statistics_cache.get("statistics", compute_statistics)
+
+def compute_statistics():
+    """쿠폰 통계 정보를 계산합니다."""
     try:
-        # 데이터베이스에서 모든 쿠폰 조회
+        # 통계 집계 테이블이 있으면 전체 쿠폰 기준 집계를 그대로 반환
+        rollup_statistics = statistics_rollup.get_statistics()
+        if rollup_statistics is not None:
+            return {"statistics": rollup_statistics}
+
+        # 집계 테이블이 없으면(발행자 DB 비활성화 등) 최근 쿠폰으로 직접 집계
         result = db_service.get_coupons_from_db(team_id=None, page=1, size=10000)
         all_coupons = result['coupons']
         
@@ -488,8 +650,16 @@ async def get_statistics():
         logger.error(f"통계 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="통계 조회에 실패했습니다")
 
+@app.get("/api/debug/compression")
+async def debug_compression(reset: bool = Query(False, description="통계 초기화 여부")):
+    """경로별 응답 압축 통계 (전송 바이트, 압축 CPU 시간)"""
+    stats = compression_stats.snapshot()
+    if reset:
+        compression_stats.reset()
+    return {"enabled": COMPRESSION_ENABLED, "routes": stats}
+
 @app.get("/api/database/test")
-async def test_database_connection():
+def test_database_connection():
     """데이터베이스 연결 테스트"""
     try:
         coupons = db_service.get_coupons_from_db()
@@ -505,7 +675,7 @@ async def test_database_connection():
         }
 
 @app.get("/api/teams/{team_id}/coupons")
-async def get_team_coupons(
+def get_team_coupons(
     team_id: str,
     search: str = Query(None, description="검색어"),
     coupon_names: str = Query(None, description="쿠폰명 필터 (쉼표로 구분)"),
@@ -552,9 +722,32 @@ async def get_team_coupons(
         logger.error(f"팀 {team_id} 쿠폰 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=f"팀 {team_id} 쿠폰 조회에 실패했습니다")
 
+@app.get("/api/teams/{team_id}/coupons/changes")
+def get_team_coupon_changes(team_id: str, since: str = Query(None, description="이전 응답의 token (없으면 토큰만 발급)")):
+    """since 토큰 이후 생성/등록·결제 변경/발행자 할당이 바뀐 팀 쿠폰과 다음 토큰을 반환합니다.
+
+    reset이 true이면 변경분을 줄 수 없는 경우(첫 요청, 변경이 너무 많음, 오래된 토큰)이므로 목록을 다시 불러와야 합니다.
+    """
+    try:
+        return coupon_changes.changes(team_id, since)
+    except InvalidChangeToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"팀 {team_id} 쿠폰 변경분 조회 실패: {e}")
+        raise HTTPException(status_code=500, detail="쿠폰 변경분 조회에 실패했습니다")
+
 @app.get("/api/teams/{team_id}/statistics")
-async def get_team_statistics(team_id: str):
+def get_team_statistics(team_id: str):
+    """팀별 쿠폰 통계를 반환합니다. (캐시된 응답, TTL이 지나면 백그라운드에서 다시 계산)"""
+    return statistics_cache.get(f"team:{team_id}", lambda: compute_team_statistics(team_id))
+
+def compute_team_statistics(team_id: str):
+    """팀별 쿠폰 통계를 계산합니다."""
     try:
+        rollup_statistics = statistics_rollup.get_team_statistics(team_id)
+        if rollup_statistics is not None:
+            return rollup_statistics
+
         # 통계용으로는 모든 데이터를 한 번에 가져오되, 필터링 없이 조회
         result = db_service.get_coupons_from_db(team_id=team_id, page=1, size=10000)
         coupons = result['coupons']
@@ -683,6 +876,53 @@ async def get_team_statistics(team_id: str):
         logger.error(f"팀 통계 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="통계 조회에 실패했습니다.")
 
+# 부트스트랩 조회를 동시에 실행하는 스레드 풀 (요청 하나당 조회 수만큼 사용)
+BOOTSTRAP_MAX_WORKERS = int(os.getenv('BOOTSTRAP_MAX_WORKERS', '8'))
+bootstrap_executor = ThreadPoolExecutor(max_workers=BOOTSTRAP_MAX_WORKERS, thread_name_prefix="bootstrap")
+
+@app.post("/api/teams/{team_id}/bootstrap")
+def bootstrap_team(team_id: str, request: Optional[BootstrapRequest] = None):
+    """페이지 첫 로딩에 필요한 쿠폰 목록, 쿠폰명, 지점명, 통계를 한 번에 반환합니다.
+
+    각 조회는 동시에 실행되며 개별 API와 같은 경로(스냅샷, 동시 조회 합치기, 통계 캐시)를 탑니다.
+    일부 조회가 실패하면 그 항목은 null이고 errors에 사유가 담깁니다.
+    """
+    request = request or BootstrapRequest()
+    unknown = [section for section in request.include if section not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 조회 항목: {', '.join(unknown)}")
+
+    def load_coupons():
+        result = db_service.get_coupons_from_db(
+            team_id=team_id,
+            page=request.page,
+            size=request.size,
+            search=request.search,
+            coupon_names=request.coupon_names or None,
+            store_names=request.store_names or None,
+            issuer=request.issuer,
+            unassigned=request.unassigned
+        )
+        return {key: result[key] for key in ("coupons", "total", "page", "size", "total_pages")}
+
+    loaders = {
+        "coupons": load_coupons,
+        "coupon_names": lambda: db_service.get_coupon_names_from_db(team_id),
+        "stores": lambda: db_service.get_stores_from_db(team_id),
+        "statistics": lambda: statistics_cache.get(f"team:{team_id}", lambda: compute_team_statistics(team_id)),
+    }
+    futures = {section: bootstrap_executor.submit(loaders[section]) for section in dict.fromkeys(request.include)}
+
+    response = {"team_id": team_id, "errors": {}}
+    for section, future in futures.items():
+        try:
+            response[section] = future.result()
+        except Exception as e:
+            logger.error(f"팀 {team_id} 부트스트랩 {section} 조회 실패: {e}")
+            response[section] = None
+            response["errors"][section] = getattr(e, 'detail', None) or "조회에 실패했습니다"
+    return response
+
 # 쿠폰발행자 인증 관련 유틸리티 함수
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -717,7 +957,7 @@ def hash_contact_info(email: str = None, phone: str = None) -> str:
 # 쿠폰 발행자 관리 API 엔드포인트
 
 @app.get("/api/issuers")
-async def get_all_issuers():
+def get_all_issuers():
     """모든 발행자 목록을 조회합니다."""
     try:
         issuers = issuer_db_service.get_all_issuers()
@@ -727,7 +967,7 @@ async def get_all_issuers():
         raise HTTPException(status_code=500, detail="발행자 목록 조회에 실패했습니다.")
 
 @app.post("/api/issuers")
-async def create_issuer(issuer: IssuerAuthRequest):
+def create_issuer(issuer: IssuerAuthRequest):
     """새 발행자를 생성합니다."""
     try:
         # 필수 필드 검증 - 전화번호 제거
@@ -753,7 +993,7 @@ async def create_issuer(issuer: IssuerAuthRequest):
         raise HTTPException(status_code=500, detail="발행자 생성에 실패했습니다.")
 
 @app.put("/api/issuers/{issuer_email}")
-async def update_issuer(issuer_email: str, update_data: dict):
+def update_issuer(issuer_email: str, update_data: dict):
     """발행자 정보를 수정합니다."""
     try:
         name = update_data.get('name')
@@ -823,7 +1063,7 @@ async def update_issuer(issuer_email: str, update_data: dict):
         raise HTTPException(status_code=500, detail="발행자 정보 수정에 실패했습니다.")
 
 @app.delete("/api/coupons/{coupon_id}/issuer")
-async def unassign_coupon_issuer(coupon_id: int):
+def unassign_coupon_issuer(coupon_id: int):
     """쿠폰에서 발행자 할당을 해제합니다."""
     try:
         # 쿠폰 존재 확인
@@ -847,7 +1087,7 @@ async def unassign_coupon_issuer(coupon_id: int):
         raise HTTPException(status_code=500, detail="쿠폰 발행자 할당 해제에 실패했습니다.")
 
 @app.delete("/api/issuers/{issuer_email}")
-async def delete_issuer(issuer_email: str):
+def delete_issuer(issuer_email: str):
     """발행자를 삭제합니다."""
     try:
         # 발행자 존재 확인
@@ -872,7 +1112,7 @@ async def delete_issuer(issuer_email: str):
         raise HTTPException(status_code=500, detail="발행자 삭제에 실패했습니다.")
 
 @app.post("/api/issuers/{issuer_email}/assign-coupon")
-async def assign_coupon_to_issuer(issuer_email: str, request: dict):
+def assign_coupon_to_issuer(issuer_email: str, request: dict):
     """쿠폰을 발행자에게 할당"""
     try:
         coupon_id = request.get('coupon_id')
@@ -903,7 +1143,7 @@ async def assign_coupon_to_issuer(issuer_email: str, request: dict):
         raise HTTPException(status_code=500, detail="쿠폰 할당에 실패했습니다.")
 
 @app.get("/api/issuers/{issuer_email}/assigned-coupons")
-async def get_assigned_coupons(issuer_email: str):
+def get_assigned_coupons(issuer_email: str):
     """특정 발행자에게 할당된 쿠폰 ID 목록을 조회합니다."""
     try:
         coupon_ids = issuer_db_service.get_assigned_coupon_ids(issuer_email)
@@ -923,7 +1163,7 @@ async def get_assigned_coupons(issuer_email: str):
         raise HTTPException(status_code=500, detail="할당된 쿠폰 조회에 실패했습니다.")
 
 @app.get("/api/debug/database", summary="데이터베이스 디버깅")
-async def debug_database():
+def debug_database():
     """데이터베이스의 사용자와 쿠폰 정보를 확인합니다."""
     try:
         debug_info = db_service.debug_check_users_and_coupons()
@@ -933,7 +1173,7 @@ async def debug_database():
         raise HTTPException(status_code=500, detail="디버깅 조회에 실패했습니다.")
 
 @app.post("/api/issuer/login")
-async def issuer_login(request: IssuerAuthRequest):
+def issuer_login(request: IssuerAuthRequest):
     """발행자 로그인"""
     try:
         # 이메일과 이름 검증
@@ -975,7 +1215,7 @@ async def issuer_login(request: IssuerAuthRequest):
         raise HTTPException(status_code=500, detail="로그인 처리 중 오류가 발생했습니다.")
 
 @app.get("/api/issuer/profile")
-async def get_issuer_profile(issuer_email: str = Depends(verify_token)):
+def get_issuer_profile(issuer_email: str = Depends(verify_token)):
     """발행자 프로필 조회"""
     try:
         # SQLite에서 발행자 정보 조회
@@ -993,14 +1233,10 @@ async def get_issuer_profile(issuer_email: str = Depends(verify_token)):
         expired_coupons = 0
         
         if assigned_coupon_ids:
-            coupons = db_service.get_coupons_by_issuer(issuer_email)
-            for coupon in coupons:
-                # 실제 쿠폰 상태를 확인하여 카운트
-                status = coupon.get('status', '')
-                if status == '사용가능':
-                    active_coupons += 1
-                elif status == '만료':
-                    expired_coupons += 1
+            # 실제 쿠폰 상태를 확인하여 카운트 (스트리밍 집계)
+            status_counts = db_service.count_coupons_by_issuer_status(issuer_email)
+            active_coupons = status_counts.get('사용가능', 0)
+            expired_coupons = status_counts.get('만료', 0)
         
         return IssuerProfile(
             name=issuer['name'],
@@ -1018,7 +1254,7 @@ async def get_issuer_profile(issuer_email: str = Depends(verify_token)):
         raise HTTPException(status_code=500, detail="프로필 조회 중 오류가 발생했습니다.")
 
 @app.get("/api/issuer/coupons")
-async def get_issuer_coupons(
+def get_issuer_coupons(
     page: int = Query(1, ge=1, description="페이지 번호"),
     size: int = Query(20, ge=1, le=100, description="페이지 크기"),
     issuer_email: str = Depends(verify_token)
@@ -1032,14 +1268,8 @@ async def get_issuer_coupons(
         if not issuer:
             raise HTTPException(status_code=404, detail="발행자를 찾을 수 없습니다.")
         
-        # 할당된 쿠폰 정보 조회
-        all_coupons = db_service.get_coupons_by_issuer(issuer_email)
-        
-        # 페이지네이션
-        total = len(all_coupons)
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        coupons = all_coupons[start_idx:end_idx]
+        # 할당된 쿠폰 정보 조회 (해당 페이지만 보관하며 스트리밍)
+        coupons, total = db_service.get_coupons_by_issuer_page(issuer_email, page, size)
         
         # 쿠폰 객체로 변환
         coupon_objects = []
@@ -1073,209 +1303,83 @@ async def get_issuer_coupons(
         logger.error(f"발행자 쿠폰 목록 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="쿠폰 목록 조회 중 오류가 발생했습니다.")
 
+def submit_admin_job(job_name: str) -> dict:
+    """관리자 작업을 백그라운드 워커에 등록하고 작업 ID를 즉시 반환합니다."""
+    try:
+        job = admin_job_runner.submit(job_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"등록되지 않은 관리자 작업입니다: {job_name}")
+    return {
+        "status": "accepted",
+        "message": f"'{job.description}' 작업이 시작되었습니다. 상태는 /api/admin/jobs/{job.id}에서 확인할 수 있습니다.",
+        "job_id": job.id,
+        "job": job.to_dict(include_output=False)
+    }
+
+@app.get("/api/admin/jobs")
+async def list_admin_jobs():
+    """등록 가능한 관리자 작업과 최근 실행 이력을 조회합니다. (관리자용)"""
+    return {
+        "available_jobs": admin_job_runner.registered(),
+        "jobs": admin_job_runner.list_job_dicts()
+    }
+
+@app.post("/api/admin/jobs/{job_name}")
+async def run_admin_job(job_name: str):
+    """이름으로 관리자 작업을 실행합니다. (관리자용)"""
+    return submit_admin_job(job_name)
+
+@app.get("/api/admin/jobs/{job_id}")
+async def get_admin_job(job_id: str):
+    """관리자 작업의 상태, 진행률, 출력을 조회합니다. (관리자용)"""
+    job = admin_job_runner.get_dict(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
+
+@app.post("/api/admin/statistics-cache/purge")
+async def purge_statistics_cache(team_id: Optional[str] = Query(None, description="비울 팀 (없으면 전체)")):
+    """통계 응답 캐시를 비웁니다. 다음 통계 요청에서 다시 계산합니다."""
+    key = f"team:{team_id}" if team_id else None
+    purged = statistics_cache.purge(key)
+    return {"message": f"통계 캐시를 비웠습니다. ({team_id or '전체'})", "purged": purged}
+
 @app.post("/api/admin/restore-issuer-data")
 async def restore_issuer_data():
     """발행자 데이터 복구 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 복구 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "restore_issuer_data.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "발행자 데이터 복구가 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "발행자 데이터 복구 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"발행자 데이터 복구 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"복구 실패: {str(e)}")
+    return submit_admin_job("restore_issuer_data")
 
 @app.post("/api/admin/add-recent-issuers")
 async def add_recent_issuers():
     """최근 추가된 발행자 데이터 복구 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 최근 발행자 추가 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "add_recent_issuers.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "최근 발행자 데이터 복구가 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "최근 발행자 데이터 복구 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"최근 발행자 데이터 복구 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"복구 실패: {str(e)}")
+    return submit_admin_job("add_recent_issuers")
 
 @app.post("/api/admin/restore-log-data")
 async def restore_log_data():
     """로그에서 복구된 발행자 데이터 복구 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 로그 데이터 복구 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "restore_log_data.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "로그에서 복구된 발행자 데이터 복구가 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "로그에서 복구된 발행자 데이터 복구 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"로그 데이터 복구 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"복구 실패: {str(e)}")
+    return submit_admin_job("restore_log_data")
 
 @app.post("/api/admin/fix-issuer-names")
 async def fix_issuer_names():
     """발행자 이름 수정 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 이름 수정 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "fix_issuer_names.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "발행자 이름 수정이 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "발행자 이름 수정 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"발행자 이름 수정 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"수정 실패: {str(e)}")
+    return submit_admin_job("fix_issuer_names")
 
 @app.post("/api/admin/export-issuer-data")
 async def export_issuer_data():
     """발행자 데이터 CSV 추출 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 데이터 추출 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "export_issuer_data.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "발행자 데이터 추출이 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "발행자 데이터 추출 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"발행자 데이터 추출 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"추출 실패: {str(e)}")
+    return submit_admin_job("export_issuer_data")
 
 @app.post("/api/admin/add-final-issuers")
 async def add_final_issuers():
     """최종 발행자 5명 추가 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 발행자 추가 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "add_final_issuers.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "최종 발행자 5명 추가가 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "최종 발행자 추가 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"최종 발행자 추가 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"추가 실패: {str(e)}")
+    return submit_admin_job("add_final_issuers")
 
 @app.post("/api/admin/add-final-mappings")
 async def add_final_mappings():
     """최종 쿠폰 매핑 추가 엔드포인트 (관리자용)"""
-    try:
-        import subprocess
-        import sys
-        
-        # 매핑 추가 스크립트 실행
-        result = subprocess.run([
-            sys.executable, "add_final_mappings.py"
-        ], capture_output=True, text=True, cwd=".")
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "message": "최종 쿠폰 매핑 추가가 완료되었습니다.",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "최종 쿠폰 매핑 추가 중 오류가 발생했습니다.",
-                "error": result.stderr
-            }
-            
-    except Exception as e:
-        logger.error(f"최종 쿠폰 매핑 추가 실패: {e}")
-        raise HTTPException(status_code=500, detail=f"매핑 추가 실패: {str(e)}")
+    return submit_admin_job("add_final_mappings")
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port) 
\ No newline at end of file
+    # 워커를 여러 개 띄우려면 앱을 import 문자열로 넘겨야 합니다.
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=WEB_CONCURRENCY) 
\ No newline at end of file
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+쿠폰-발행자 매핑 대량 적재 모듈
+CSV(예: coupon_issuer_matching.csv)를 임시 스테이징 테이블에 적재한 뒤,
+coupon_issuers와의 조인으로 한 번에 검증하고 coupon_issuer_mapping에 병합합니다.
+
+- PostgreSQL: COPY FROM STDIN으로 스테이징 적재, 병합은 단일 SQL 문(CTE)
+- SQLite(로컬 개발용): executemany로 스테이징 적재, 동일한 집합 기반 검증/병합
+
+사용법: python mapping_bulk_loader.py <CSV 경로> [--delete-missing] [--no-reassign] [--create-missing-issuers]
+"""
+
+import csv
+import io
+import logging
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# CSV 헤더에서 쿠폰 ID / 발행자 이메일 / 할당 시각 컬럼으로 인정하는 이름 (앞쪽이 우선)
+COUPON_ID_HEADERS = ('coupon_id', 'id')
+ISSUER_EMAIL_HEADERS = ('issuer_email', 'issuer', 'email')
+ASSIGNED_AT_HEADERS = ('assigned_at',)
+
+# SQLite 스테이징 적재 시 executemany 배치 크기
+SQLITE_STAGING_BATCH = 5000
+
+MappingRow = Tuple[str, str, str]  # (coupon_id, issuer_email, assigned_at) - 모두 원본 문자열
+
+_DIALECTS = {
+    'postgresql': {
+        'staging_table': '''
+            CREATE TEMP TABLE mapping_staging (
+                row_no BIGSERIAL,
+                coupon_id TEXT,
+                issuer_email TEXT,
+                assigned_at TEXT
+            ) ON COMMIT DROP
+        ''',
+        'load_table_prefix': 'CREATE TEMP TABLE mapping_load ON COMMIT DROP AS',
+        # 정수 컬럼(int4) 범위를 넘는 ID는 캐스트 오류로 전체 병합이 롤백되므로 형식 오류로 셉니다.
+        'valid_coupon_id': (
+            "CASE WHEN TRIM(s.coupon_id) ~ '^[0-9]+$' "
+            "THEN TRIM(s.coupon_id)::numeric <= 2147483647 ELSE false END"
+        ),
+        'valid_email': "POSITION('@' IN TRIM(s.issuer_email)) > 1",
+        # 빈 값(현재 시각 사용) 또는 timestamp로 캐스트 가능한 ISO 형식 (없는 날짜 포함 검사, CASE로 평가 순서 보장)
+        'valid_assigned_at': (
+            "CASE WHEN NULLIF(TRIM(s.assigned_at), '') IS NULL THEN true "
+            "WHEN TRIM(s.assigned_at) ~ '^[1-9][0-9]{3}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])"
+            "([ T]([01][0-9]|2[0-3]):[0-5][0-9](:[0-5][0-9]([.][0-9]+)?)?([+-][0-9]{2}(:?[0-9]{2})?|Z)?)?$' "
+            "THEN SUBSTRING(TRIM(s.assigned_at) FROM 9 FOR 2)::int <= EXTRACT(DAY FROM "
+            "make_date(SUBSTRING(TRIM(s.assigned_at) FROM 1 FOR 4)::int, SUBSTRING(TRIM(s.assigned_at) FROM 6 FOR 2)::int, 1)"
+            " + INTERVAL '1 month - 1 day') "
+            "ELSE false END"
+        ),
+        'issuer_name': "split_part(TRIM(s.issuer_email), '@', 1)",
+        'assigned_at': "COALESCE(NULLIF(TRIM(s.assigned_at), '')::timestamp, CURRENT_TIMESTAMP)",
+    },
+    'sqlite': {
+        'staging_table': '''
+            CREATE TEMP TABLE mapping_staging (
+                row_no INTEGER PRIMARY KEY,
+                coupon_id TEXT,
+                issuer_email TEXT,
+                assigned_at TEXT
+            )
+        ''',
+        'load_table_prefix': 'CREATE TEMP TABLE mapping_load AS',
+        'valid_coupon_id': (
+            "TRIM(s.coupon_id) <> '' AND TRIM(s.coupon_id) NOT GLOB '*[^0-9]*' "
+            "AND CAST(TRIM(s.coupon_id) AS REAL) <= 2147483647"
+        ),
+        'valid_email': "INSTR(TRIM(s.issuer_email), '@') > 1",
+        'valid_assigned_at': "(NULLIF(TRIM(s.assigned_at), '') IS NULL OR datetime(TRIM(s.assigned_at)) IS NOT NULL)",
+        'issuer_name': "SUBSTR(TRIM(s.issuer_email), 1, INSTR(TRIM(s.issuer_email), '@') - 1)",
+        'assigned_at': "COALESCE(NULLIF(TRIM(s.assigned_at), ''), CURRENT_TIMESTAMP)",
+    },
+}
+
+def _pick_column(header, candidates) -> Optional[int]:
+    normalized = [name.strip().lower() for name in header]
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized.index(candidate)
+    return None
+
+def read_mapping_csv(csv_path: str) -> Iterator[MappingRow]:
+    """매핑 CSV를 한 줄씩 읽어 (coupon_id, issuer_email, assigned_at) 문자열 튜플로 반환합니다.
+
+    `id,issuer`(매칭 CSV)와 `id,coupon_id,issuer_email,assigned_at`(매핑 export CSV) 형식을 모두 지원합니다.
+    값 검증은 적재 후 SQL에서 일괄 처리하므로 여기서는 하지 않습니다.
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if not header:
+            return
+        coupon_idx = _pick_column(header, COUPON_ID_HEADERS)
+        email_idx = _pick_column(header, ISSUER_EMAIL_HEADERS)
+        assigned_idx = _pick_column(header, ASSIGNED_AT_HEADERS)
+        if coupon_idx is None or email_idx is None:
+            raise ValueError(f"CSV 헤더에서 쿠폰 ID/발행자 이메일 컬럼을 찾을 수 없습니다: {header}")
+
+        for row in reader:
+            if not row:
+                continue
+            yield (
+                row[coupon_idx] if coupon_idx < len(row) else '',
+                row[email_idx] if email_idx < len(row) else '',
+                row[assigned_idx] if assigned_idx is not None and assigned_idx < len(row) else ''
+            )
+
+class _CopyStream(io.TextIOBase):
+    """매핑 행 제너레이터를 COPY FROM STDIN용 CSV 텍스트 스트림으로 변환합니다."""
+
+    def __init__(self, rows: Iterable[MappingRow]):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+        self._pending = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            chunk = [row for _, row in zip(range(1000), self._rows)]
+            if not chunk:
+                break
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._writer.writerows(chunk)
+            self._pending += self._buffer.getvalue()
+        if size < 0:
+            data, self._pending = self._pending, ''
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+def _dialect_of(conn) -> str:
+    return 'sqlite' if isinstance(conn, sqlite3.Connection) else 'postgresql'
+
+def _fill_staging(conn, cursor, dialect: str, rows: Iterable[MappingRow]):
+    cursor.execute("DROP TABLE IF EXISTS mapping_load")
+    cursor.execute("DROP TABLE IF EXISTS mapping_staging")
+    cursor.execute(_DIALECTS[dialect]['staging_table'])
+    if dialect == 'postgresql':
+        cursor.copy_expert(
+            "COPY mapping_staging (coupon_id, issuer_email, assigned_at) FROM STDIN WITH (FORMAT csv)",
+            _CopyStream(rows)
+        )
+    else:
+        insert = "INSERT INTO mapping_staging (coupon_id, issuer_email, assigned_at) VALUES (?, ?, ?)"
+        rows = iter(rows)
+        while True:
+            chunk = [row for _, row in zip(range(SQLITE_STAGING_BATCH), rows)]
+            if not chunk:
+                break
+            cursor.executemany(insert, chunk)
+
+def load_mapping_rows(conn, rows: Iterable[MappingRow], reassign: bool = True, delete_missing: bool = False,
+                      create_missing_issuers: bool = False, commit: bool = True) -> Dict[str, int]:
+    """매핑 행을 스테이징에 적재하고 coupon_issuer_mapping에 병합합니다.
+
+    - reassign: 이미 다른 발행자에게 할당된 쿠폰을 새 발행자로 재할당할지 여부 (False면 건너뜀)
+    - delete_missing: 입력에 없는 쿠폰의 기존 매핑을 삭제할지 여부 (전체 교체)
+    - create_missing_issuers: coupon_issuers에 없는 이메일을 발행자로 생성할지 여부 (이름은 이메일 @ 앞부분)
+    같은 쿠폰 ID가 여러 번 나오면 마지막 행이 적용됩니다.
+    쿠폰 ID가 정수 범위를 넘거나 assigned_at을 시각으로 해석할 수 없는 행은 형식 오류(skipped_invalid)로 건너뜁니다.
+    """
+    started = time.time()
+    dialect = _dialect_of(conn)
+    sql = _DIALECTS[dialect]
+    valid = (
+        f"(s.coupon_id IS NOT NULL AND s.issuer_email IS NOT NULL AND {sql['valid_coupon_id']} "
+        f"AND {sql['valid_email']} AND {sql['valid_assigned_at']})"
+    )
+    cursor = conn.cursor()
+
+    try:
+        _fill_staging(conn, cursor, dialect, rows)
+
+        issuers_created = 0
+        if create_missing_issuers:
+            cursor.execute(f"""
+                INSERT INTO coupon_issuers (name, email)
+                SELECT DISTINCT {sql['issuer_name']}, TRIM(s.issuer_email)
+                FROM mapping_staging s
+                WHERE {valid}
+                AND NOT EXISTS (SELECT 1 FROM coupon_issuers ci WHERE ci.email = TRIM(s.issuer_email))
+            """)
+            issuers_created = max(cursor.rowcount, 0)
+
+        # 형식 오류 / 미등록 발행자 집계 (한 번의 조인)
+        cursor.execute(f"""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(CASE WHEN {valid} THEN 0 ELSE 1 END), 0),
+                COALESCE(SUM(CASE WHEN {valid} AND ci.email IS NULL THEN 1 ELSE 0 END), 0)
+            FROM mapping_staging s
+            LEFT JOIN coupon_issuers ci ON ci.email = TRIM(s.issuer_email)
+        """)
+        total_rows, invalid_rows, unknown_issuer_rows = cursor.fetchone()
+
+        # 유효한 행만, 쿠폰 ID당 마지막 행 하나로 정리
+        cursor.execute(f"""
+            {sql['load_table_prefix']}
+            SELECT coupon_id, issuer_email, assigned_at FROM (
+                SELECT
+                    CAST(TRIM(s.coupon_id) AS INTEGER) AS coupon_id,
+                    ci.email AS issuer_email,
+                    {sql['assigned_at']} AS assigned_at,
+                    ROW_NUMBER() OVER (PARTITION BY CAST(TRIM(s.coupon_id) AS INTEGER) ORDER BY s.row_no DESC) AS rn
+                FROM mapping_staging s
+                JOIN coupon_issuers ci ON ci.email = TRIM(s.issuer_email)
+                WHERE {valid}
+            ) ranked
+            WHERE rn = 1
+        """)
+        cursor.execute("CREATE INDEX idx_mapping_load_coupon ON mapping_load (coupon_id)")
+        if dialect == 'postgresql':
+            cursor.execute("ANALYZE mapping_load")
+
+        # 신규 / 재할당 대상 / 변경 없음 분류
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(CASE WHEN NOT EXISTS (
+                    SELECT 1 FROM coupon_issuer_mapping m WHERE m.coupon_id = l.coupon_id
+                ) THEN 1 ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN EXISTS (
+                    SELECT 1 FROM coupon_issuer_mapping m
+                    WHERE m.coupon_id = l.coupon_id AND m.issuer_email <> l.issuer_email
+                ) THEN 1 ELSE 0 END), 0)
+            FROM mapping_load l
+        """)
+        load_rows, new_rows, changed_rows = cursor.fetchone()
+
+        if reassign:
+            remove_changed = """
+                DELETE FROM coupon_issuer_mapping
+                WHERE EXISTS (
+                    SELECT 1 FROM mapping_load l
+                    WHERE l.coupon_id = coupon_issuer_mapping.coupon_id
+                    AND l.issuer_email <> coupon_issuer_mapping.issuer_email
+                )
+            """
+            insert_condition = "m.coupon_id = l.coupon_id AND m.issuer_email = l.issuer_email"
+        else:
+            remove_changed = None
+            insert_condition = "m.coupon_id = l.coupon_id"
+        insert_rows = f"""
+            INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email, assigned_at)
+            SELECT l.coupon_id, l.issuer_email, l.assigned_at
+            FROM mapping_load l
+            WHERE NOT EXISTS (SELECT 1 FROM coupon_issuer_mapping m WHERE {insert_condition})
+        """
+        remove_missing = """
+            DELETE FROM coupon_issuer_mapping
+            WHERE NOT EXISTS (SELECT 1 FROM mapping_load l WHERE l.coupon_id = coupon_issuer_mapping.coupon_id)
+        """ if delete_missing else None
+
+        deleted = 0
+        if dialect == 'postgresql':
+            # 단일 SQL 문으로 병합 (CTE는 모두 같은 스냅샷을 보며, 대상 행 집합이 서로 겹치지 않음)
+            ctes = []
+            if remove_changed:
+                ctes.append(f"removed AS ({remove_changed} RETURNING 1)")
+            if remove_missing:
+                ctes.append(f"missing AS ({remove_missing} RETURNING 1)")
+            ctes.append(f"inserted AS ({insert_rows} RETURNING 1)")
+            cursor.execute(f"""
+                WITH {', '.join(ctes)}
+                SELECT (SELECT COUNT(*) FROM inserted), {'(SELECT COUNT(*) FROM missing)' if remove_missing else '0'}
+            """)
+            _, deleted = cursor.fetchone()
+        else:
+            if remove_changed:
+                cursor.execute(remove_changed)
+            if remove_missing:
+                cursor.execute(remove_missing)
+                deleted = max(cursor.rowcount, 0)
+            cursor.execute(insert_rows)
+
+        cursor.execute("DROP TABLE IF EXISTS mapping_load")
+        cursor.execute("DROP TABLE IF EXISTS mapping_staging")
+        if commit:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    report = {
+        'rows': total_rows,
+        'inserted': new_rows,
+        'updated': changed_rows if reassign else 0,
+        'unchanged': load_rows - new_rows - changed_rows,
+        'skipped_invalid': invalid_rows,
+        'skipped_unknown_issuer': unknown_issuer_rows,
+        'skipped_duplicate': total_rows - invalid_rows - unknown_issuer_rows - load_rows,
+        'skipped_existing': 0 if reassign else changed_rows,
+        'deleted': deleted,
+        'issuers_created': issuers_created,
+        'elapsed_seconds': round(time.time() - started, 3)
+    }
+    logger.info(f"매핑 대량 적재 완료: {report}")
+    return report
+
+def load_mappings_csv(conn, csv_path: str, **options) -> Dict[str, int]:
+    """매핑 CSV 파일을 스트리밍으로 읽어 load_mapping_rows로 병합합니다."""
+    logger.info(f"매핑 CSV 적재 시작: {csv_path}")
+    return load_mapping_rows(conn, read_mapping_csv(csv_path), **options)
+
+def main():
+    """메인 실행 함수 - DATABASE_URL의 PostgreSQL에 CSV를 적재합니다."""
+    import psycopg2
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith('--')}
+    csv_path = args[0] if args else 'coupon_issuer_matching.csv'
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        logger.error("DATABASE_URL 환경 변수가 설정되지 않았습니다.")
+        return False
+    if not os.path.exists(csv_path):
+        logger.error(f"CSV 파일을 찾을 수 없습니다: {csv_path}")
+        return False
+
+    try:
+        conn = psycopg2.connect(database_url)
+        try:
+            report = load_mappings_csv(
+                conn, csv_path,
+                reassign='--no-reassign' not in flags,
+                delete_missing='--delete-missing' in flags,
+                create_missing_issuers='--create-missing-issuers' in flags
+            )
+        finally:
+            conn.close()
+        for key, value in report.items():
+            logger.info(f"- {key}: {value}")
+        return True
+    except Exception as e:
+        logger.error(f"매핑 대량 적재 실패: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+쿠폰-발행자 매핑 증분 동기화 모듈
+원본(CSV, 로컬 SQLite, 코드 내 목록)과 대상 PostgreSQL의 매핑을 매핑별 해시로 비교해
+달라진 부분만 전송합니다.
+
+- 매핑 해시: md5("쿠폰ID:이메일") 앞 60비트. 파이썬과 PostgreSQL에서 같은 값을 계산합니다.
+- 버킷 요약: coupon_id % 버킷 수별 (행 수, 해시 합). 대상 DB는 한 번의 쿼리로 요약을 반환합니다.
+- 요약이 같으면 즉시 종료(왕복 1회), 다르면 해당 버킷의 행만 가져와 차이를 일괄 반영합니다.
+- 동기화 결과(요약, 시각, 변경 수)는 manifest JSON 파일에 기록합니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from mapping_bulk_loader import load_mapping_rows
+
+logger = logging.getLogger(__name__)
+
+MAPPING_SYNC_BUCKETS = int(os.getenv("MAPPING_SYNC_BUCKETS", "256"))
+MAPPING_SYNC_MANIFEST = os.getenv(
+    "MAPPING_SYNC_MANIFEST",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapping_sync_manifest.json")
+)
+
+# mapping_hash와 같은 값을 PostgreSQL에서 계산하는 식
+_PG_MAPPING_HASH = "('x' || substr(md5(coupon_id::text || ':' || issuer_email), 1, 15))::bit(60)::bigint"
+
+BucketDigests = Dict[int, Tuple[int, int]]  # bucket -> (행 수, 해시 합)
+
+def mapping_hash(coupon_id: int, issuer_email: str) -> int:
+    """매핑 한 건의 내용 해시 (60비트 정수)"""
+    return int(hashlib.md5(f"{coupon_id}:{issuer_email}".encode('utf-8')).hexdigest()[:15], 16)
+
+def normalize_mappings(rows: Iterable[Tuple]) -> Dict[int, str]:
+    """(coupon_id, issuer_email, ...) 행을 {쿠폰 ID: 이메일}로 정리합니다. 잘못된 행은 버리고, 중복은 마지막 행이 적용됩니다."""
+    mappings = {}
+    for row in rows:
+        coupon_id, issuer_email = str(row[0]).strip(), (row[1] or '').strip()
+        if coupon_id.isdigit() and issuer_email.find('@') > 0:
+            mappings[int(coupon_id)] = issuer_email
+    return mappings
+
+def bucket_digests(mappings: Dict[int, str], buckets: int = MAPPING_SYNC_BUCKETS) -> BucketDigests:
+    digests: Dict[int, List[int]] = {}
+    for coupon_id, issuer_email in mappings.items():
+        digest = digests.setdefault(coupon_id % buckets, [0, 0])
+        digest[0] += 1
+        digest[1] += mapping_hash(coupon_id, issuer_email)
+    return {bucket: (count, total) for bucket, (count, total) in digests.items()}
+
+def dataset_digest(digests: BucketDigests) -> str:
+    """버킷 요약 전체를 하나의 문자열 요약으로 만듭니다. (manifest 기록/비교용)"""
+    payload = ','.join(f"{bucket}:{count}:{total}" for bucket, (count, total) in sorted(digests.items()))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _target_digests(cursor, buckets: int, coupon_ids: Optional[List[int]]) -> BucketDigests:
+    scope = "WHERE coupon_id = ANY(%(coupon_ids)s)" if coupon_ids is not None else ""
+    cursor.execute(f"""
+        SELECT coupon_id %% %(buckets)s AS bucket, COUNT(*), SUM({_PG_MAPPING_HASH})
+        FROM coupon_issuer_mapping
+        {scope}
+        GROUP BY 1
+    """, {'buckets': buckets, 'coupon_ids': coupon_ids})
+    return {int(bucket): (int(count), int(total)) for bucket, count, total in cursor.fetchall()}
+
+def _target_rows(cursor, buckets: int, changed_buckets: List[int], coupon_ids: Optional[List[int]]) -> Dict[int, Set[str]]:
+    scope = "AND coupon_id = ANY(%(coupon_ids)s)" if coupon_ids is not None else ""
+    cursor.execute(f"""
+        SELECT coupon_id, issuer_email
+        FROM coupon_issuer_mapping
+        WHERE coupon_id %% %(buckets)s = ANY(%(changed_buckets)s)
+        {scope}
+    """, {'buckets': buckets, 'changed_buckets': changed_buckets, 'coupon_ids': coupon_ids})
+    rows: Dict[int, Set[str]] = {}
+    for coupon_id, issuer_email in cursor.fetchall():
+        rows.setdefault(coupon_id, set()).add(issuer_email)
+    return rows
+
+def load_manifest(path: str = MAPPING_SYNC_MANIFEST) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"동기화 manifest 읽기 실패 (무시하고 전체 비교): {e}")
+        return {}
+
+def save_manifest(manifest: Dict, path: str = MAPPING_SYNC_MANIFEST):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def sync_mappings(conn, rows: Iterable[Tuple], source_name: str, mirror: bool = False, dry_run: bool = False,
+                  buckets: int = MAPPING_SYNC_BUCKETS, manifest_path: str = MAPPING_SYNC_MANIFEST) -> Dict:
+    """원본 매핑을 대상 PostgreSQL(conn)에 증분 동기화합니다.
+
+    - mirror=False: 원본에 있는 쿠폰만 비교/반영 (추가·재할당)
+    - mirror=True: 대상 전체를 원본과 같게 맞춤 (원본에 없는 쿠폰의 매핑 삭제)
+    - dry_run=True: 차이만 계산하고 반영/manifest 기록은 하지 않음
+    """
+    source = normalize_mappings(rows)
+    source_digests = bucket_digests(source, buckets)
+    source_digest = dataset_digest(source_digests)
+    coupon_ids = None if mirror else sorted(source)
+
+    manifest = load_manifest(manifest_path)
+    previous = manifest.get(source_name, {})
+    if previous.get('source_digest') == source_digest:
+        logger.info(f"원본 변경 없음 (마지막 동기화: {previous.get('synced_at')}) - 대상 요약만 확인합니다.")
+
+    report = {
+        'source': source_name,
+        'mode': 'mirror' if mirror else 'upsert',
+        'source_rows': len(source),
+        'changed_buckets': 0,
+        'upserted': 0,
+        'deleted': 0,
+        'compare_round_trips': 0,
+        'dry_run': dry_run
+    }
+
+    cursor = conn.cursor()
+    try:
+        target_digests = _target_digests(cursor, buckets, coupon_ids)
+        report['compare_round_trips'] += 1
+
+        changed_buckets = sorted(
+            bucket for bucket in set(source_digests) | set(target_digests)
+            if source_digests.get(bucket) != target_digests.get(bucket)
+        )
+        report['changed_buckets'] = len(changed_buckets)
+
+        if changed_buckets:
+            target = _target_rows(cursor, buckets, changed_buckets, coupon_ids)
+            report['compare_round_trips'] += 1
+            changed = set(changed_buckets)
+
+            upserts = [
+                (str(coupon_id), issuer_email, '')
+                for coupon_id, issuer_email in source.items()
+                if coupon_id % buckets in changed and target.get(coupon_id) != {issuer_email}
+            ]
+            deletes = [
+                (coupon_id, issuer_email)
+                for coupon_id, emails in target.items() if coupon_id not in source
+                for issuer_email in emails
+            ] if mirror else []
+            report['upserted'] = len(upserts)
+            report['deleted'] = len(deletes)
+
+            if not dry_run:
+                if upserts:
+                    report['load'] = load_mapping_rows(conn, upserts, create_missing_issuers=True, commit=False)
+                if deletes:
+                    cursor.execute("""
+                        DELETE FROM coupon_issuer_mapping m
+                        USING unnest(%s::integer[], %s::text[]) AS d(coupon_id, issuer_email)
+                        WHERE m.coupon_id = d.coupon_id AND m.issuer_email = d.issuer_email
+                    """, ([coupon_id for coupon_id, _ in deletes], [email for _, email in deletes]))
+                conn.commit()
+        if dry_run:
+            conn.rollback()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if not dry_run:
+        manifest[source_name] = {
+            'source_digest': source_digest,
+            'source_rows': len(source),
+            'mode': report['mode'],
+            'buckets': buckets,
+            'synced_at': datetime.now().isoformat(),
+            'last_changes': {'upserted': report['upserted'], 'deleted': report['deleted']}
+        }
+        save_manifest(manifest, manifest_path)
+
+    logger.info(
+        f"매핑 동기화 완료 ({source_name}): 변경 버킷 {report['changed_buckets']}개, "
+        f"반영 {report['upserted']}개, 삭제 {report['deleted']}개, 비교 왕복 {report['compare_round_trips']}회"
+    )
+    return report
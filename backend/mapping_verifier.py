@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+쿠폰-발행자 매핑 검증 모듈
+기대 매핑(CSV 등)과 coupon_issuer_mapping 테이블을 한 번의 조회로 비교해
+누락/불일치/초과 매핑을 집합 연산으로 계산합니다. SQLite와 PostgreSQL 연결을 모두 지원합니다.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Set, Tuple
+
+from mapping_sync import normalize_mappings
+
+logger = logging.getLogger(__name__)
+
+VERIFY_FETCH_SIZE = 5000
+
+def fetch_actual_mappings(conn) -> Dict[int, Set[str]]:
+    """coupon_issuer_mapping 전체를 {쿠폰 ID: 이메일 집합}으로 한 번에 읽습니다."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT coupon_id, issuer_email FROM coupon_issuer_mapping")
+        actual: Dict[int, Set[str]] = {}
+        while True:
+            rows = cursor.fetchmany(VERIFY_FETCH_SIZE)
+            if not rows:
+                break
+            for coupon_id, issuer_email in rows:
+                actual.setdefault(int(coupon_id), set()).add(issuer_email)
+        return actual
+    finally:
+        cursor.close()
+
+def diff_mappings(expected: Dict[int, str], actual: Dict[int, Set[str]], include_extra: bool = False) -> Dict:
+    """기대 매핑과 실제 매핑의 차이를 계산합니다.
+
+    - matched: 기대한 (쿠폰, 발행자) 쌍이 그대로 있음
+    - missing: 쿠폰에 할당이 전혀 없음
+    - mismatched: 쿠폰이 다른 발행자에게 할당되어 있음 (또는 기대 발행자 외 할당이 함께 있음)
+    - extra: 기대 목록에 없는 쿠폰의 할당 (include_extra=True일 때만 계산)
+    """
+    matched: List[Tuple[int, str]] = []
+    missing: List[Tuple[int, str]] = []
+    mismatched: List[Tuple[int, str, List[str]]] = []
+
+    for coupon_id, issuer_email in expected.items():
+        emails = actual.get(coupon_id)
+        if not emails:
+            missing.append((coupon_id, issuer_email))
+        elif emails == {issuer_email}:
+            matched.append((coupon_id, issuer_email))
+        else:
+            mismatched.append((coupon_id, issuer_email, sorted(emails)))
+
+    extra: List[Tuple[int, str]] = []
+    if include_extra:
+        for coupon_id in actual.keys() - expected.keys():
+            extra.extend((coupon_id, issuer_email) for issuer_email in sorted(actual[coupon_id]))
+
+    return {
+        'expected': len(expected),
+        'actual': sum(len(emails) for emails in actual.values()),
+        'matched': sorted(matched),
+        'missing': sorted(missing),
+        'mismatched': sorted(mismatched),
+        'extra': sorted(extra)
+    }
+
+def verify_mappings(conn, rows: Iterable[Tuple], include_extra: bool = False) -> Dict:
+    """(coupon_id, issuer_email, ...) 행들이 DB에 그대로 저장되어 있는지 검증합니다."""
+    rows = list(rows)
+    expected = normalize_mappings(rows)
+    report = diff_mappings(expected, fetch_actual_mappings(conn), include_extra)
+    # 형식이 잘못되었거나 같은 쿠폰 ID가 반복된 행 (중복은 마지막 행 기준으로 검증)
+    report['skipped_rows'] = len(rows) - len(expected)
+    logger.info(
+        f"매핑 검증: 기대 {report['expected']}개 중 확인 {len(report['matched'])}개, "
+        f"누락 {len(report['missing'])}개, 불일치 {len(report['mismatched'])}개"
+        + (f", 초과 {len(report['extra'])}개" if include_extra else "")
+    )
+    return report
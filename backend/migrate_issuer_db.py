@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+발행자 DB 스키마 마이그레이션 스크립트
+coupon_issuers / coupon_issuer_mapping 테이블과 인덱스를 생성합니다.
+앱 부팅과 분리해서 실행할 때는 ISSUER_DB_AUTO_MIGRATE=false로 설정합니다.
+"""
+
+import os
+import sys
+import logging
+
+from issuer_database import issuer_db_service, mask_database_url
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    """메인 실행 함수"""
+    try:
+        database_url = os.getenv('DATABASE_URL')
+        if not database_url:
+            logger.error("DATABASE_URL 환경 변수가 설정되지 않았습니다.")
+            return False
+
+        logger.info(f"발행자 DB 마이그레이션 시작: {mask_database_url(database_url)}")
+        issuer_db_service.migrate()
+        logger.info("발행자 DB 마이그레이션이 완료되었습니다.")
+        return True
+
+    except Exception as e:
+        logger.error(f"마이그레이션 실패: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
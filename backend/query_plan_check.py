@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+쿼리 실행 계획 회귀 검사 스크립트
+DatabaseService가 만드는 쿠폰 목록/쿠폰명/지점명/발행자 쿠폰 SQL을 모든 필터 조합에 대해
+합성 데이터셋(bench_dataset.py) 위에서 EXPLAIN (FORMAT JSON)하고 계획 속성을 검사합니다.
+
+검사 항목:
+- 페이지 조회 쿼리는 PLAN_SEQ_SCAN_MAX_ROWS행을 넘는 테이블을 순차 스캔하지 않을 것
+  (기준 파일에 이미 기록된 순차 스캔은 알려진 상태로 보고 경고만 출력)
+- 쿠폰 ID 목록으로 거르는 쿼리(발행자 필터, 발행자 쿠폰 조회)는 b_payment_bcoupon 인덱스를 사용할 것
+- 예상 비용이 PLAN_COST_CEILING(설정 시)을 넘지 않고, 기준 파일 대비 PLAN_COST_TOLERANCE배를 넘지 않을 것
+
+사용법: python query_plan_check.py [--size 100k] [--database-url postgresql://...] [--no-seed]
+                                   [--baseline query_plan_baseline.json] [--update-baseline] [--output plan_report.json]
+  계획을 의도적으로 바꾼 뒤에는 --update-baseline으로 기준 파일을 갱신해 커밋합니다.
+"""
+
+import json
+import logging
+import os
+import sys
+from itertools import combinations
+from typing import Dict, Iterator, List
+
+import psycopg2
+
+from bench_dataset import bench_coupon_code, bench_issuer_email, database_env, open_bench_database, parse_size, seed_dataset
+from database import (
+    DatabaseService, coupon_count_query, coupon_page_query, coupon_names_query, store_names_query, issuer_coupons_query
+)
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PLAN_SEQ_SCAN_MAX_ROWS = int(os.getenv('PLAN_SEQ_SCAN_MAX_ROWS', '50000'))
+PLAN_COST_TOLERANCE = float(os.getenv('PLAN_COST_TOLERANCE', '1.5'))
+PLAN_COST_CEILING = float(os.getenv('PLAN_COST_CEILING', '0'))  # 0이면 검사하지 않음
+PLAN_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_plan_baseline.json')
+
+PLAN_TEAMS = [None, 'teamb', 'timberland']
+PLAN_FILTERS = ('search', 'coupon_names', 'store_names', 'issuer', 'unassigned')
+PLAN_TABLES = ('b_payment_bcoupon', 'b_class_bplace', 'b_class_bprovider', 'b_payment_bcouponuser', 'user_user')
+
+# 필터 값 (합성 데이터셋 기준)
+PLAN_SEARCH = '피트니스'
+PLAN_COUPON_NAMES = ['프렌즈 쿠폰) 1DAY 쿠폰']
+PLAN_STORE_NAMES = ['지점 1', 'TeamB 지점 10']
+
+INDEX_NODE_TYPES = ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+
+def build_cases(conn) -> List[Dict]:
+    """get_coupons_from_db의 모든 필터 조합과 쿠폰명/지점명/발행자 쿠폰 조회 쿼리를 검사 케이스로 만듭니다."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT coupon_id FROM coupon_issuer_mapping WHERE issuer_email = %s", (bench_issuer_email(1),))
+    issuer_coupon_ids = sorted(row[0] for row in cursor.fetchall())
+    cursor.execute("SELECT coupon_id FROM coupon_issuer_mapping")
+    assigned_coupon_ids = sorted(row[0] for row in cursor.fetchall())
+
+    service = DatabaseService()
+    cases = []
+    for team_id in PLAN_TEAMS:
+        team = team_id or 'all'
+        for count in range(len(PLAN_FILTERS) + 1):
+            for combo in combinations(PLAN_FILTERS, count):
+                where_clause, params = service._build_coupon_where(
+                    team_id=team_id,
+                    search=PLAN_SEARCH if 'search' in combo else None,
+                    coupon_names=PLAN_COUPON_NAMES if 'coupon_names' in combo else None,
+                    store_names=PLAN_STORE_NAMES if 'store_names' in combo else None,
+                    issuer_coupon_ids=issuer_coupon_ids if 'issuer' in combo else None,
+                    unassigned='unassigned' in combo,
+                    assigned_coupon_ids=assigned_coupon_ids
+                )
+                name = f"coupons[{team}|{'+'.join(combo) or 'none'}]"
+                cases.append({'name': f"{name}:count", 'query': coupon_count_query(where_clause),
+                              'params': params, 'allow_seq_scan': True, 'expect_index': []})
+                # 발행자 필터는 LIMIT 없이 스트리밍하며 페이지를 잘라냅니다. (get_coupons_from_db와 동일)
+                if 'issuer' in combo:
+                    page_query, expect_index = coupon_page_query(where_clause), ['b_payment_bcoupon']
+                else:
+                    page_query, expect_index = coupon_page_query(where_clause, 1, 100), []
+                cases.append({'name': f"{name}:page", 'query': page_query, 'params': params,
+                              'allow_seq_scan': False, 'expect_index': expect_index})
+
+        cases.append({'name': f"coupon_names[{team}]", 'query': coupon_names_query(team_id), 'params': None,
+                      'allow_seq_scan': True, 'expect_index': []})
+        cases.append({'name': f"stores[{team}]", 'query': store_names_query(team_id), 'params': None,
+                      'allow_seq_scan': True, 'expect_index': []})
+
+    # 쿠폰 코드 검색은 코드 완전 일치 경로(idx_bcoupon_code_lower)를 타야 합니다.
+    where_clause, params = service._build_coupon_where(team_id='teamb', search=bench_coupon_code(1).lower())
+    cases.append({'name': "coupons[teamb|code]:page", 'query': coupon_page_query(where_clause, 1, 100), 'params': params,
+                  'allow_seq_scan': False, 'expect_index': ['b_payment_bcoupon']})
+    cases.append({'name': "coupons[all|none]:page50", 'query': coupon_page_query('', 50, 100), 'params': [],
+                  'allow_seq_scan': False, 'expect_index': []})
+    cases.append({'name': "issuer_coupons[issuer1]", 'query': issuer_coupons_query(issuer_coupon_ids), 'params': None,
+                  'allow_seq_scan': False, 'expect_index': ['b_payment_bcoupon']})
+    return cases
+
+def _walk(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _walk(child)
+
+def explain(cursor, query: str, params=None) -> Dict:
+    """쿼리의 실행 계획을 요약합니다. (실행하지 않음)"""
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    plan = cursor.fetchone()[0][0]['Plan']
+    nodes = list(_walk(plan))
+    return {
+        'total_cost': plan['Total Cost'],
+        'plan_rows': plan['Plan Rows'],
+        'seq_scans': sorted({node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan'}),
+        'index_scans': sorted({node['Relation Name'] for node in nodes
+                               if node['Node Type'] in INDEX_NODE_TYPES and 'Relation Name' in node}),
+    }
+
+def check_case(case: Dict, summary: Dict, table_rows: Dict[str, float], baseline: Dict) -> List[str]:
+    """케이스 하나의 계획 요약을 검사해 실패 사유 목록을 반환합니다."""
+    failures = []
+    known = baseline.get(case['name'])
+
+    if not case['allow_seq_scan']:
+        for table in summary['seq_scans']:
+            if table_rows.get(table, 0) <= PLAN_SEQ_SCAN_MAX_ROWS:
+                continue
+            if known and table in known['seq_scans']:
+                logger.warning(f"{case['name']}: {table} 순차 스캔 (기준 파일에 기록된 알려진 상태)")
+                continue
+            failures.append(f"{table} 순차 스캔 ({int(table_rows[table])}행 > {PLAN_SEQ_SCAN_MAX_ROWS}행)")
+
+    for table in case['expect_index']:
+        if table not in summary['index_scans']:
+            failures.append(f"{table} 인덱스를 사용하지 않음")
+
+    if PLAN_COST_CEILING and summary['total_cost'] > PLAN_COST_CEILING:
+        failures.append(f"예상 비용 {summary['total_cost']:.0f} > 상한 {PLAN_COST_CEILING:.0f}")
+    if known and known['total_cost'] and summary['total_cost'] > known['total_cost'] * PLAN_COST_TOLERANCE:
+        failures.append(f"예상 비용 {known['total_cost']:.0f} -> {summary['total_cost']:.0f} "
+                        f"({summary['total_cost'] / known['total_cost']:.1f}배)")
+    return failures
+
+def run_plan_checks(conn, baseline: Dict) -> Dict:
+    """모든 케이스를 EXPLAIN하고 검사 결과를 반환합니다."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(%s)", (list(PLAN_TABLES),))
+    table_rows = dict(cursor.fetchall())
+    cursor.execute("SHOW server_version")
+    server_version = cursor.fetchone()[0]
+
+    results = {}
+    failed = 0
+    for case in build_cases(conn):
+        summary = explain(cursor, case['query'], case['params'])
+        failures = check_case(case, summary, table_rows, baseline.get('cases', {}))
+        results[case['name']] = {**summary, 'failures': failures}
+        if failures:
+            failed += 1
+            logger.error(f"✗ {case['name']}: {'; '.join(failures)}")
+        else:
+            logger.info(f"✓ {case['name']}: 비용 {summary['total_cost']:.0f}, 순차 스캔 {summary['seq_scans'] or '없음'}")
+    conn.rollback()
+    return {'server_version': server_version, 'table_rows': table_rows, 'cases': results, 'failed': failed}
+
+def main():
+    """메인 실행 함수"""
+    args = sys.argv[1:]
+    size = '100k'
+    database_url = None
+    seed = True
+    baseline_path = PLAN_BASELINE_PATH
+    update_baseline = False
+    output_path = None
+    while args:
+        arg = args.pop(0)
+        if arg == '--size' and args:
+            size = args.pop(0)
+        elif arg == '--database-url' and args:
+            database_url = args.pop(0)
+        elif arg == '--no-seed':
+            seed = False
+        elif arg == '--baseline' and args:
+            baseline_path = args.pop(0)
+        elif arg == '--update-baseline':
+            update_baseline = True
+        elif arg == '--output' and args:
+            output_path = args.pop(0)
+
+    baseline = {}
+    if os.path.exists(baseline_path) and not update_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    try:
+        database_url, stop_database = open_bench_database(database_url)
+    except Exception as e:
+        logger.error(f"벤치마크 DB 준비 실패: {e}")
+        return False
+
+    # 검색 조건 생성(인덱스 확인, 코드 조회)이 벤치마크 DB를 보도록 쿠폰 DB 환경 변수를 맞춥니다.
+    os.environ.update(database_env(database_url))
+    try:
+        coupons = seed_dataset(database_url, parse_size(size))['coupons'] if seed else None
+        conn = psycopg2.connect(database_url)
+        try:
+            if coupons is None:
+                cursor = conn.cursor()
+                cursor.execute("SELECT coupons FROM bench_dataset ORDER BY created_at DESC LIMIT 1")
+                coupons = cursor.fetchone()[0]
+            if baseline and baseline.get('coupons') != coupons:
+                logger.warning(f"기준 파일의 데이터셋 크기({baseline.get('coupons')})와 현재 크기({coupons})가 다릅니다.")
+            report = {'coupons': coupons, **run_plan_checks(conn, baseline)}
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"실행 계획 검사 실패: {e}")
+        return False
+    finally:
+        stop_database()
+
+    logger.info(f"=== 실행 계획 검사 완료: {len(report['cases'])}개 중 {report['failed']}개 실패 ===")
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if update_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'coupons': report['coupons'],
+                'server_version': report['server_version'],
+                'cases': {name: {key: case[key] for key in ('total_cost', 'seq_scans', 'index_scans')}
+                          for name, case in report['cases'].items()}
+            }, file, ensure_ascii=False, indent=2, sort_keys=True)
+        logger.info(f"기준 파일을 갱신했습니다: {baseline_path}")
+        return True
+    return report['failed'] == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -12,6 +12,9 @@ from psycopg2.extras import RealDictCursor
 from datetime import datetime
 import logging
 
+from admin_jobs import report_progress
+from mapping_bulk_loader import load_mappings_csv
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -78,7 +81,8 @@ def restore_issuers(conn, csv_file_path):
         reader = csv.DictReader(file)
         count = 0
         
-        for row in reader:
+        for row_index, row in enumerate(reader, start=1):
+            report_progress(row_index)
             if not row['email']:  # 빈 이메일 건너뛰기
                 continue
                 
@@ -107,36 +111,18 @@ def restore_issuers(conn, csv_file_path):
         logger.info(f"{count}명의 발행자 데이터 복구 완료")
 
 def restore_mappings(conn, csv_file_path):
-    """CSV 파일에서 쿠폰-발행자 매핑 데이터를 복구합니다."""
-    cursor = conn.cursor()
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        count = 0
-        
-        for row in reader:
-            if not row['coupon_id'] or not row['issuer_email']:
-                continue
-                
-            try:
-                # 매핑 정보 삽입
-                cursor.execute("""
-                    INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email, assigned_at)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (coupon_id, issuer_email) DO UPDATE SET
-                        assigned_at = EXCLUDED.assigned_at
-                """, (
-                    int(row['coupon_id']),
-                    row['issuer_email'],
-                    row['assigned_at'] if row['assigned_at'] else datetime.now()
-                ))
-                count += 1
-                
-            except Exception as e:
-                logger.error(f"매핑 {row['coupon_id']} -> {row['issuer_email']} 삽입 실패: {e}")
-        
-        conn.commit()
-        logger.info(f"{count}개의 쿠폰-발행자 매핑 복구 완료")
+    """CSV 파일에서 쿠폰-발행자 매핑 데이터를 복구합니다. (COPY 스테이징 + 일괄 병합)"""
+    report = load_mappings_csv(conn, csv_file_path)
+    report_progress(report['rows'], report['rows'])
+    if report['skipped_invalid'] or report['skipped_unknown_issuer']:
+        logger.warning(
+            f"건너뛴 매핑: 형식 오류 {report['skipped_invalid']}개, "
+            f"미등록 발행자 {report['skipped_unknown_issuer']}개"
+        )
+    logger.info(
+        f"{report['inserted'] + report['updated']}개의 쿠폰-발행자 매핑 복구 완료 "
+        f"(신규 {report['inserted']}, 재할당 {report['updated']}, 변경 없음 {report['unchanged']})"
+    )
 
 def verify_restoration(conn):
     """복구된 데이터를 검증합니다."""
@@ -12,6 +12,9 @@ from psycopg2.extras import RealDictCursor
 from datetime import datetime
 import logging
 
+from admin_jobs import report_progress
+from mapping_bulk_loader import load_mappings_csv
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,7 +40,8 @@ def restore_log_issuers(conn, csv_file_path):
         reader = csv.DictReader(file)
         count = 0
         
-        for row in reader:
+        for row_index, row in enumerate(reader, start=1):
+            report_progress(row_index)
             if not row['email']:  # 빈 이메일 건너뛰기
                 continue
                 
@@ -71,44 +75,14 @@ def restore_log_issuers(conn, csv_file_path):
         logger.info(f"{count}명의 발행자 데이터 복구 완료")
 
 def restore_log_mappings(conn, csv_file_path):
-    """로그에서 복구된 쿠폰-발행자 매핑 데이터를 추가합니다."""
-    cursor = conn.cursor()
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        count = 0
-        
-        for row in reader:
-            if not row['coupon_id'] or not row['issuer_email']:
-                continue
-                
-            try:
-                # 기존 매핑 확인
-                cursor.execute("SELECT id FROM coupon_issuer_mapping WHERE coupon_id = %s AND issuer_email = %s", 
-                             (int(row['coupon_id']), row['issuer_email']))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    logger.info(f"매핑 {row['coupon_id']} -> {row['issuer_email']}는 이미 존재합니다. 건너뜁니다.")
-                    continue
-                
-                # 매핑 정보 삽입
-                cursor.execute("""
-                    INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email, assigned_at)
-                    VALUES (%s, %s, %s)
-                """, (
-                    int(row['coupon_id']),
-                    row['issuer_email'],
-                    row['assigned_at'] if row['assigned_at'] else datetime.now()
-                ))
-                count += 1
-                logger.info(f"새 매핑 추가: 쿠폰 {row['coupon_id']} -> {row['issuer_email']}")
-                
-            except Exception as e:
-                logger.error(f"매핑 {row['coupon_id']} -> {row['issuer_email']} 삽입 실패: {e}")
-        
-        conn.commit()
-        logger.info(f"{count}개의 쿠폰-발행자 매핑 복구 완료")
+    """로그에서 복구된 쿠폰-발행자 매핑 데이터를 추가합니다. (log_recovery.py 출력, 이미 할당된 쿠폰은 유지)"""
+    report = load_mappings_csv(conn, csv_file_path, reassign=False)
+    report_progress(report['rows'], report['rows'])
+    if report['skipped_existing'] or report['unchanged']:
+        logger.info(f"이미 할당된 쿠폰 {report['skipped_existing'] + report['unchanged']}개는 건너뜁니다.")
+    if report['skipped_unknown_issuer']:
+        logger.warning(f"미등록 발행자로 건너뛴 매핑: {report['skipped_unknown_issuer']}개")
+    logger.info(f"{report['inserted']}개의 쿠폰-발행자 매핑 복구 완료")
 
 def verify_restoration(conn):
     """복구된 데이터를 검증합니다."""
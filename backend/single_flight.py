@@ -0,0 +1,123 @@
+"""
+동시 조회 합치기 (single-flight)
+같은 인자로 동시에 들어온 조회는 DB를 한 번만 실행하고 그 결과(또는 예외)를 함께 받습니다.
+결과를 캐시하지는 않습니다. 실행이 끝난 뒤 들어온 호출은 다시 실행합니다.
+
+    @single_flight.coalesce("get_stores_from_db")
+    def get_stores_from_db(self, team_id=None): ...
+
+- 키는 기본값을 채운 인자 전체입니다. (f(), f(None), f(team_id=None)은 같은 호출)
+- unordered로 지정한 리스트 인자는 순서와 무관한 필터로 보고 정렬해 키를 만듭니다.
+- 결과 객체는 호출자끼리 공유하므로 호출자가 수정하면 안 됩니다.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Iterable
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+
+class _Call:
+    """진행 중인 실행 하나"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = 0
+        self.value = None
+        self.error = None
+
+def _normalize(value: Any, unordered: bool = False) -> Hashable:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_normalize(item) for item in value]
+        if unordered or isinstance(value, (set, frozenset)):
+            items.sort(key=repr)
+        return tuple(items)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items()))
+    return value
+
+class SingleFlight:
+    """이름별 동시 호출 합치기와 합친 횟수 통계"""
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'calls': 0, 'executions': 0, 'collapsed': 0, 'errors': 0})
+
+    def do(self, name: str, key: Hashable, func: Callable[[], Any]) -> Any:
+        """(name, key)로 진행 중인 실행이 있으면 그 결과를 기다리고, 없으면 func()을 실행합니다."""
+        if not self.enabled:
+            return func()
+
+        flight_key = (name, key)
+        with self._lock:
+            stats = self._stats[name]
+            stats['calls'] += 1
+            call = self._calls.get(flight_key)
+            leader = call is None
+            if leader:
+                call = self._calls[flight_key] = _Call()
+                stats['executions'] += 1
+            else:
+                call.waiters += 1
+                stats['collapsed'] += 1
+
+        if not leader:
+            call.event.wait()
+        else:
+            try:
+                call.value = func()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    stats['errors'] += 1
+            finally:
+                with self._lock:
+                    del self._calls[flight_key]
+                call.event.set()
+                if call.waiters:
+                    logger.debug(f"동시 조회 합침: {name} ({call.waiters}건)")
+
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def coalesce(self, name: str, unordered: Iterable[str] = ()) -> Callable:
+        """함수/메서드의 동시 호출을 인자 기준으로 합치는 데코레이터"""
+        unordered = frozenset(unordered)
+
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = tuple(
+                    (param, id(value) if param == 'self' else _normalize(value, param in unordered))
+                    for param, value in bound.arguments.items()
+                )
+                return self.do(name, key, lambda: func(*args, **kwargs))
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict:
+        with self._lock:
+            calls = {name: dict(stats) for name, stats in self._stats.items()}
+            in_flight = len(self._calls)
+        return {
+            'enabled': self.enabled,
+            'in_flight': in_flight,
+            'collapsed': sum(stats['collapsed'] for stats in calls.values()),
+            'calls': calls,
+        }
+
+# 전역 동시 조회 합치기 (DB 조회 서비스용)
+single_flight = SingleFlight()
@@ -0,0 +1,141 @@
+"""
+통계 응답 캐시
+팀별 통계 응답을 TTL 동안 그대로 반환하고, TTL이 지난 뒤에도 STATS_CACHE_STALE_TTL 안이면
+이전 응답을 바로 반환하면서 백그라운드에서 다시 계산합니다. (stale-while-revalidate)
+
+- 같은 키를 동시에 계산하지 않습니다. 캐시가 없을 때 몰린 요청은 첫 요청의 계산 결과를 함께 받습니다.
+- 통계 계산은 무거우므로 키가 달라도 재계산은 한 번에 하나만 실행합니다.
+- purge()는 다른 워커에도 worker_bus로 전달됩니다.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from worker_bus import worker_bus
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_ENABLED = os.getenv('STATS_CACHE_ENABLED', 'true').lower() == 'true'
+# 캐시된 응답을 다시 계산 없이 반환하는 시간(초)
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '60'))
+# TTL이 지난 응답을 백그라운드 재계산 동안 반환하는 최대 시간(초), 넘으면 요청에서 다시 계산
+STATS_CACHE_STALE_TTL = float(os.getenv('STATS_CACHE_STALE_TTL', '3600'))
+# team_id는 경로 값이므로 키 수를 제한합니다.
+STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', '100'))
+
+class _Flight:
+    """진행 중인 계산 하나 - 같은 키의 요청들이 결과를 기다립니다."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class StatisticsCache:
+    """통계 응답 캐시 (키별 TTL + stale-while-revalidate + 동시 계산 합치기)"""
+
+    def __init__(self, ttl: float = STATS_CACHE_TTL, stale_ttl: float = STATS_CACHE_STALE_TTL,
+                 max_entries: int = STATS_CACHE_MAX_ENTRIES, enabled: bool = STATS_CACHE_ENABLED):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # key -> (응답, 계산 완료 시각)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+                       'refreshes': 0, 'errors': 0, 'purges': 0}
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        """key의 캐시된 응답을 반환합니다. 없으면 compute()로 계산합니다. (계산 실패 시 예외 전달)"""
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[1]
+                if age < self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age < self.ttl:
+                        self._stats['hits'] += 1
+                    else:
+                        self._stats['stale_hits'] += 1
+                        if key not in self._flights:
+                            flight = self._flights[key] = _Flight(self._generation)
+                            threading.Thread(target=self._run, args=(key, flight, compute),
+                                             name="stats-cache-refresh", daemon=True).start()
+                    return entry[0]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(self._generation)
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if leader:
+            self._run(key, flight, compute)
+        else:
+            flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _run(self, key: str, flight: _Flight, compute: Callable[[], Any]):
+        try:
+            with self._compute_lock:
+                started = time.time()
+                flight.value = compute()
+            self._stats['refreshes'] += 1
+            logger.info(f"통계 캐시 갱신: {key} ({time.time() - started:.2f}초)")
+        except Exception as e:
+            flight.error = e
+            self._stats['errors'] += 1
+            logger.error(f"통계 캐시 갱신 실패 ({key}): {e}")
+        finally:
+            with self._lock:
+                # 계산 중에 purge되었으면 결과를 캐시에 넣지 않습니다. (기다리던 요청에는 그대로 반환)
+                if flight.error is None and flight.generation == self._generation:
+                    self._entries[key] = (flight.value, time.monotonic())
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.event.set()
+
+    def purge(self, key: Optional[str] = None, broadcast: bool = True) -> int:
+        """key(없으면 전체)의 캐시를 비우고 비운 항목 수를 반환합니다."""
+        with self._lock:
+            if key is None:
+                purged = len(self._entries)
+                self._entries.clear()
+                self._flights.clear()
+            else:
+                purged = 1 if self._entries.pop(key, None) is not None else 0
+                self._flights.pop(key, None)
+            self._generation += 1
+            self._stats['purges'] += 1
+        if broadcast:
+            worker_bus.publish('statistics_cache.purge', {'key': key})
+        logger.info(f"통계 캐시 비움: {key or '전체'} ({purged}개)")
+        return purged
+
+    def stats(self) -> Dict:
+        return {'enabled': self.enabled, 'ttl': self.ttl, 'stale_ttl': self.stale_ttl,
+                'entries': len(self._entries), 'in_flight': len(self._flights), **self._stats}
+
+# 전역 통계 캐시
+statistics_cache = StatisticsCache()
+worker_bus.subscribe('statistics_cache.purge',
+                     lambda data: statistics_cache.purge(data.get('key'), broadcast=False))
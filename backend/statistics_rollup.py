@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+쿠폰 통계 집계 테이블
+쿠폰 DB(원본)의 쿠폰을 쿠폰 한 건당 한 행(coupon_stats_facts)으로 발행자 DB(PostgreSQL)에 옮겨 두고,
+(지점, 쿠폰명)별 집계(coupon_stats_rollup)와 쿠폰명별 등록 회원 집계(coupon_stats_users)를 유지합니다.
+/api/statistics, /api/teams/{team_id}/statistics는 집계 테이블만 읽습니다.
+
+증분 갱신:
+- id 워터마크 이후의 새 쿠폰을 추가합니다.
+- id 워터마크 이후이거나 updated_at이 바뀐 b_payment_bcouponuser 행의 쿠폰은 다시 읽어 갱신합니다.
+- 날짜가 바뀌면 그 사이에 만료된 쿠폰이 있는 (지점, 쿠폰명)의 만료 수를 다시 셉니다.
+- 바뀐 (지점, 쿠폰명)/쿠폰명의 집계 행만 다시 계산합니다.
+쿠폰 수정/삭제는 전체 재구성(--full)에서 반영됩니다.
+
+사용법: python statistics_rollup.py [--full]
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from database import db_service
+from issuer_database import issuer_db_service
+
+logger = logging.getLogger(__name__)
+
+STATS_ROLLUP_ENABLED = os.getenv('STATS_ROLLUP_ENABLED', 'true').lower() == 'true'
+# 증분 갱신 주기(초), 0이면 예약 갱신 없이 관리자 작업으로만 갱신
+STATS_ROLLUP_REFRESH_INTERVAL = float(os.getenv('STATS_ROLLUP_REFRESH_INTERVAL', '300'))
+STATS_ROLLUP_BATCH_SIZE = int(os.getenv('STATS_ROLLUP_BATCH_SIZE', '5000'))
+# 등록 updated_at 워터마크를 DB 현재 시각보다 이만큼(초) 뒤에 두어 늦게 커밋된 변경을 놓치지 않게 합니다. (COUPON_CHANGES_OVERLAP과 같은 방식)
+STATS_ROLLUP_OVERLAP = float(os.getenv('STATS_ROLLUP_OVERLAP', '5'))
+
+# 여러 워커/작업이 동시에 갱신하지 않도록 잡는 advisory lock 키
+STATS_ROLLUP_LOCK_KEY = 'coupon_stats_rollup'
+
+# 팀별 쿠폰명 키워드 (database.team_title_filter와 같은 조건)
+TEAM_TITLE_KEYWORDS = {
+    'timberland': ('팀버핏',),
+    'teamb': ('패밀리 쿠폰)', '프렌즈 쿠폰)'),
+}
+
+STATS_ROLLUP_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS coupon_stats_facts (
+        coupon_id INTEGER PRIMARY KEY,
+        store TEXT NOT NULL,
+        title TEXT NOT NULL,
+        expires_on DATE,
+        registered_by TEXT,
+        paid BOOLEAN NOT NULL DEFAULT FALSE
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_stats_facts_key ON coupon_stats_facts(title, store)',
+    'CREATE INDEX IF NOT EXISTS idx_stats_facts_expires ON coupon_stats_facts(expires_on)',
+    '''
+    CREATE TABLE IF NOT EXISTS coupon_stats_rollup (
+        store TEXT NOT NULL,
+        title TEXT NOT NULL,
+        issued INTEGER NOT NULL,
+        registered INTEGER NOT NULL,
+        paid INTEGER NOT NULL,
+        expired INTEGER NOT NULL,
+        PRIMARY KEY (store, title)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS coupon_stats_users (
+        title TEXT NOT NULL,
+        registered_by TEXT NOT NULL,
+        coupons INTEGER NOT NULL,
+        PRIMARY KEY (title, registered_by)
+    )
+    ''',
+    'CREATE TABLE IF NOT EXISTS coupon_stats_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+]
+
+# 쿠폰 DB에서 통계용 쿠폰 행을 읽는 쿼리 (지점/쿠폰명 표시 규칙은 COUPON_LIST_SELECT와 같음, 등록은 마지막 한 건)
+# 만료 시작일: date_expired가 이 날짜 이하가 되는 첫날 (날짜/타임스탬프 모두 '만료' 판정과 일치)
+FACTS_QUERY = """
+    SELECT
+        a.id,
+        COALESCE(NULLIF(b.name, ''), NULLIF(c.name, ''), '알 수 없음'),
+        COALESCE(NULLIF(a.title, ''), '쿠폰명 없음'),
+        (a.date_expired + interval '1 day' - interval '1 microsecond')::date,
+        r.name,
+        COALESCE(r.is_used, FALSE)
+    FROM b_payment_bcoupon a
+    LEFT JOIN b_class_bplace b ON b.id = a.b_place_id
+    LEFT JOIN b_class_bprovider c ON a.b_provider_id = c.id
+    LEFT JOIN LATERAL (
+        SELECT NULLIF(TRIM(e.name), '') AS name, d.is_used
+        FROM b_payment_bcouponuser d
+        LEFT JOIN user_user e ON d.user_id = e.id
+        WHERE d.b_coupon_id = a.id
+        ORDER BY d.id DESC
+        LIMIT 1
+    ) r ON TRUE
+    {where}
+    ORDER BY a.id
+"""
+
+CHANGED_REGISTRATIONS_QUERY = """
+    SELECT b_coupon_id, id, updated_at
+    FROM b_payment_bcouponuser
+    WHERE id > %s OR updated_at > %s
+"""
+
+UPSERT_FACTS = """
+    INSERT INTO coupon_stats_facts (coupon_id, store, title, expires_on, registered_by, paid) VALUES %s
+    ON CONFLICT (coupon_id) DO UPDATE SET
+        store = EXCLUDED.store, title = EXCLUDED.title, expires_on = EXCLUDED.expires_on,
+        registered_by = EXCLUDED.registered_by, paid = EXCLUDED.paid
+"""
+
+# 집계 다시 계산 ({filter}가 비어 있으면 전체)
+ROLLUP_INSERT = """
+    INSERT INTO coupon_stats_rollup (store, title, issued, registered, paid, expired)
+    SELECT store, title, COUNT(*), COUNT(registered_by),
+           COUNT(*) FILTER (WHERE paid), COUNT(*) FILTER (WHERE expires_on <= CURRENT_DATE)
+    FROM coupon_stats_facts
+    {filter}
+    GROUP BY store, title
+"""
+
+USERS_INSERT = """
+    INSERT INTO coupon_stats_users (title, registered_by, coupons)
+    SELECT title, registered_by, COUNT(*)
+    FROM coupon_stats_facts
+    WHERE registered_by IS NOT NULL {filter}
+    GROUP BY title, registered_by
+"""
+
+KEYS_FILTER = "(store, title) IN (SELECT * FROM unnest(%s::text[], %s::text[]))"
+
+def title_matches_team(title: str, team_id: Optional[str]) -> bool:
+    keywords = TEAM_TITLE_KEYWORDS.get(team_id)
+    if keywords is None:
+        return True
+    return any(keyword in title for keyword in keywords)
+
+def _advance_updated_at(current: str, seen: Optional[datetime], now: Dict[bool, datetime]) -> str:
+    """등록 updated_at 워터마크를 seen까지 올리되 (DB 현재 시각 - STATS_ROLLUP_OVERLAP)을 넘지 않게 합니다.
+
+    트랜잭션은 시작 시각을 updated_at으로 남기므로 늦게 커밋된 변경이 워터마크보다 앞선 시각으로 나타날 수 있습니다.
+    최근 겹침 시간 안의 변경은 다음 갱신에서 한 번 더 읽습니다. now는 {aware 여부: DB 현재 시각}입니다.
+    """
+    if seen is None:
+        return current
+    candidate = min(seen, now[seen.tzinfo is not None] - timedelta(seconds=STATS_ROLLUP_OVERLAP))
+    watermark = datetime.fromisoformat(current)
+    if watermark.tzinfo is None and candidate.tzinfo is not None:
+        watermark = watermark.replace(tzinfo=candidate.tzinfo)
+    return candidate.isoformat() if candidate > watermark else current
+
+def _rate(count: int, total: int) -> float:
+    return round((count / total) * 100, 1) if total > 0 else 0.0
+
+class StatisticsRollup:
+    """통계 집계 테이블 갱신/조회"""
+
+    def __init__(self, enabled: bool = STATS_ROLLUP_ENABLED):
+        self.enabled = enabled
+        self._schema_ready = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_result = None
+        self._stats = {'refreshes': 0, 'skipped': 0, 'errors': 0}
+
+    def _connect(self):
+        conn = issuer_db_service.get_connection()
+        if not self._schema_ready:
+            cursor = conn.cursor()
+            for statement in STATS_ROLLUP_SCHEMA:
+                cursor.execute(statement)
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    # 갱신
+
+    def refresh(self, full: bool = False) -> Optional[Dict]:
+        """집계를 갱신하고 결과 요약을 반환합니다. 다른 곳에서 갱신 중이면 None을 반환합니다."""
+        started = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", (STATS_ROLLUP_LOCK_KEY,))
+            if not cursor.fetchone()[0]:
+                self._stats['skipped'] += 1
+                logger.info("다른 워커가 통계 집계를 갱신 중입니다. 이번 갱신은 건너뜁니다.")
+                return None
+
+            state = self._load_state(cursor)
+            if full or 'coupon_watermark' not in state:
+                # TRUNCATE는 커밋까지 ACCESS EXCLUSIVE 잠금을 잡아 재구성 내내 통계 조회가 막히므로 DELETE를 씁니다.
+                # (조회는 커밋 전까지 이전 집계를 그대로 읽음)
+                for table in ('coupon_stats_facts', 'coupon_stats_rollup', 'coupon_stats_users'):
+                    cursor.execute(f"DELETE FROM {table}")
+                state = {}
+                full = True
+            coupon_watermark = int(state.get('coupon_watermark', 0))
+            registration_watermark = int(state.get('registration_watermark', 0))
+            registration_updated_at = state.get('registration_updated_at', '1970-01-01T00:00:00')
+            status_date = state.get('status_date', date.today().isoformat())
+
+            changed_ids: Set[int] = set()
+            source_conn = db_service.get_connection()
+            try:
+                source = source_conn.cursor()
+                source.execute("SELECT CURRENT_TIMESTAMP, LOCALTIMESTAMP")
+                now = dict(zip((True, False), source.fetchone()))
+                if full:
+                    source.execute("SELECT COALESCE(MAX(id), 0), MAX(updated_at) FROM b_payment_bcouponuser")
+                    registration_watermark, max_updated_at = source.fetchone()
+                    registration_updated_at = _advance_updated_at(registration_updated_at, max_updated_at, now)
+            finally:
+                source_conn.close()
+
+            # 1. 바뀐 등록 행의 쿠폰 (워터마크 이전 쿠폰만 - 이후 쿠폰은 2에서 새로 읽음)
+            if not full:
+                for rows in db_service.stream_query(CHANGED_REGISTRATIONS_QUERY,
+                                                    (registration_watermark, registration_updated_at),
+                                                    name="stats_registrations"):
+                    for coupon_id, registration_id, updated_at in rows:
+                        registration_watermark = max(registration_watermark, registration_id)
+                        registration_updated_at = _advance_updated_at(registration_updated_at, updated_at, now)
+                        if coupon_id is not None and coupon_id <= coupon_watermark:
+                            changed_ids.add(coupon_id)
+
+            affected: Set[Tuple[str, str]] = set()
+            if changed_ids:
+                cursor.execute("SELECT store, title FROM coupon_stats_facts WHERE coupon_id = ANY(%s)", (list(changed_ids),))
+                affected.update(cursor.fetchall())
+                query = FACTS_QUERY.format(where="WHERE a.id = ANY(%s)")
+                for rows in db_service.stream_query(query, (sorted(changed_ids),), batch_size=STATS_ROLLUP_BATCH_SIZE,
+                                                    name="stats_changed"):
+                    execute_values(cursor, UPSERT_FACTS, rows, page_size=STATS_ROLLUP_BATCH_SIZE)
+                    affected.update((row[1], row[2]) for row in rows)
+
+            # 2. 새 쿠폰
+            new_coupons = 0
+            query = FACTS_QUERY.format(where="WHERE a.id > %s")
+            for rows in db_service.stream_query(query, (coupon_watermark,), batch_size=STATS_ROLLUP_BATCH_SIZE,
+                                                name="stats_coupons"):
+                execute_values(cursor, UPSERT_FACTS, rows, page_size=STATS_ROLLUP_BATCH_SIZE)
+                coupon_watermark = rows[-1][0]
+                new_coupons += len(rows)
+                if not full:
+                    affected.update((row[1], row[2]) for row in rows)
+
+            # 3. 날짜가 바뀌었으면 그 사이 만료된 쿠폰의 (지점, 쿠폰명)
+            today = date.today().isoformat()
+            if not full and status_date < today:
+                cursor.execute("""
+                    SELECT DISTINCT store, title FROM coupon_stats_facts
+                    WHERE expires_on > %s AND expires_on <= CURRENT_DATE
+                """, (status_date,))
+                affected.update(cursor.fetchall())
+
+            # 4. 집계 다시 계산
+            if full:
+                cursor.execute(ROLLUP_INSERT.format(filter=""))
+                cursor.execute(USERS_INSERT.format(filter=""))
+            elif affected:
+                stores = [key[0] for key in affected]
+                titles = [key[1] for key in affected]
+                cursor.execute(f"DELETE FROM coupon_stats_rollup WHERE {KEYS_FILTER}", (stores, titles))
+                cursor.execute(ROLLUP_INSERT.format(filter="WHERE " + KEYS_FILTER), (stores, titles))
+                affected_titles = sorted(set(titles))
+                cursor.execute("DELETE FROM coupon_stats_users WHERE title = ANY(%s)", (affected_titles,))
+                cursor.execute(USERS_INSERT.format(filter="AND title = ANY(%s)"), (affected_titles,))
+
+            self._save_state(cursor, {
+                'coupon_watermark': str(coupon_watermark),
+                'registration_watermark': str(registration_watermark),
+                'registration_updated_at': registration_updated_at,
+                'status_date': today,
+                'refreshed_at': datetime.now().isoformat(),
+            })
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        result = {
+            'full': full,
+            'new_coupons': new_coupons,
+            'changed_coupons': len(changed_ids),
+            'recomputed_keys': len(affected),
+            'coupon_watermark': coupon_watermark,
+            'seconds': round(time.time() - started, 2),
+        }
+        self._last_result = result
+        self._stats['refreshes'] += 1
+        logger.info(f"통계 집계 갱신 완료: {result}")
+        return result
+
+    def _load_state(self, cursor) -> Dict[str, str]:
+        cursor.execute("SELECT key, value FROM coupon_stats_state")
+        return dict(cursor.fetchall())
+
+    def _save_state(self, cursor, values: Dict[str, str]):
+        execute_values(cursor, """
+            INSERT INTO coupon_stats_state (key, value) VALUES %s
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        """, list(values.items()))
+
+    # 예약 갱신
+
+    def start(self):
+        """예약 갱신 스레드를 시작합니다. (발행자 DB가 PostgreSQL일 때만 갱신)"""
+        if not self.enabled or STATS_ROLLUP_REFRESH_INTERVAL <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="stats-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not issuer_db_service.disabled:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    logger.error(f"통계 집계 갱신 실패: {e}")
+            self._stop.wait(STATS_ROLLUP_REFRESH_INTERVAL)
+
+    # 조회
+
+    def _read(self) -> Optional[Tuple[List[tuple], List[tuple]]]:
+        """(집계 행, 등록 회원 행)을 읽습니다. 집계가 한 번도 만들어지지 않았거나 읽을 수 없으면 None."""
+        if not self.enabled or issuer_db_service.disabled:
+            return None
+        try:
+            conn = self._connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1 FROM coupon_stats_state WHERE key = 'refreshed_at'")
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute("SELECT store, title, issued, registered, paid, expired FROM coupon_stats_rollup")
+                rollup = cursor.fetchall()
+                cursor.execute("SELECT title, registered_by FROM coupon_stats_users")
+                users = cursor.fetchall()
+                return rollup, users
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"통계 집계 조회 실패: {e}")
+            return None
+
+    def get_statistics(self) -> Optional[List[Dict]]:
+        """/api/statistics 응답의 statistics 목록 (지점명 순). 집계가 없으면 None."""
+        data = self._read()
+        if data is None:
+            return None
+        stores: Dict[str, List[Dict]] = {}
+        for store, title, issued, registered, paid, expired in data[0]:
+            stores.setdefault(store, []).append({
+                'coupon_name': title,
+                'total_count': issued,
+                'registered_count': registered,
+                'payment_completed_count': paid,
+                'registration_rate': _rate(registered, issued),
+                'payment_rate': _rate(paid, issued)
+            })
+        result = []
+        for store, coupons in stores.items():
+            total_issued = sum(coupon['total_count'] for coupon in coupons)
+            total_registered = sum(coupon['registered_count'] for coupon in coupons)
+            total_payment_completed = sum(coupon['payment_completed_count'] for coupon in coupons)
+            result.append({
+                'store': store,
+                'coupons': coupons,
+                'total_issued': total_issued,
+                'total_registered': total_registered,
+                'total_payment_completed': total_payment_completed,
+                'overall_registration_rate': _rate(total_registered, total_issued),
+                'overall_payment_rate': _rate(total_payment_completed, total_issued)
+            })
+        result.sort(key=lambda x: x['store'])
+        return result
+
+    def get_team_statistics(self, team_id: str) -> Optional[Dict]:
+        """/api/teams/{team_id}/statistics 응답. 집계가 없으면 None."""
+        data = self._read()
+        if data is None:
+            return None
+        rollup, users = data
+
+        store_stats: Dict[str, Dict[str, int]] = {}
+        store_coupon_names: Dict[str, Set[str]] = {}
+        name_stats: Dict[str, Dict[str, int]] = {}
+        for store, title, issued, registered, paid, expired in rollup:
+            if not title_matches_team(title, team_id):
+                continue
+            stats = store_stats.setdefault(store, {'total': 0, 'used': 0, 'available': 0, 'expired': 0})
+            stats['total'] += issued
+            stats['available'] += issued - expired
+            stats['expired'] += expired
+            store_coupon_names.setdefault(store, set()).add(title)
+            name = name_stats.setdefault(title, {'issued_count': 0, 'payment_completed_count': 0})
+            name['issued_count'] += issued
+            name['payment_completed_count'] += paid
+
+        registered_users: Dict[str, Set[str]] = {}
+        for title, registered_by in users:
+            if title in name_stats:
+                registered_users.setdefault(title, set()).add(registered_by.strip())
+
+        coupon_statistics = []
+        for title, stats in name_stats.items():
+            registered_users_count = len(registered_users.get(title, ()))
+            coupon_statistics.append({
+                "name": title,
+                "issued_count": stats['issued_count'],
+                "registered_users_count": registered_users_count,
+                "payment_completed_count": stats['payment_completed_count'],
+                "registration_rate": _rate(registered_users_count, stats['issued_count']),
+                "payment_rate": _rate(stats['payment_completed_count'], stats['issued_count'])
+            })
+        coupon_statistics.sort(key=lambda x: x['name'])
+
+        total_issued_count = sum(stats['total'] for stats in store_stats.values())
+        total_registered_users_count = len(set().union(*registered_users.values())) if registered_users else 0
+        total_payment_completed = sum(stats['payment_completed_count'] for stats in name_stats.values())
+        return {
+            "team_id": team_id,
+            "summary": {
+                "total_issued_count": total_issued_count,
+                "total_registered_users_count": total_registered_users_count,
+                "total_payment_completed_count": total_payment_completed,
+                "total_registration_rate": _rate(total_registered_users_count, total_issued_count),
+                "total_payment_rate": _rate(total_payment_completed, total_issued_count),
+                "total_coupons": total_issued_count,
+                "used_coupons": 0,
+                "available_coupons": sum(stats['available'] for stats in store_stats.values()),
+                "expired_coupons": sum(stats['expired'] for stats in store_stats.values())
+            },
+            "store_statistics": [
+                {"name": store, **stats} for store, stats in store_stats.items()
+            ],
+            "store_coupon_names": {store: sorted(names) for store, names in store_coupon_names.items()},
+            "coupon_statistics": coupon_statistics
+        }
+
+    def stats(self) -> Dict:
+        return {'enabled': self.enabled, 'last_refresh': self._last_result, **self._stats}
+
+# 전역 통계 집계
+statistics_rollup = StatisticsRollup()
+
+def main():
+    """메인 실행 함수"""
+    logging.basicConfig(level=logging.INFO)
+    try:
+        result = statistics_rollup.refresh(full='--full' in sys.argv[1:])
+    except Exception as e:
+        logger.error(f"통계 집계 갱신 실패: {e}")
+        return False
+    return result is not None
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -7,10 +7,12 @@ import psycopg2
 import os
 import logging
 
+from mapping_sync import sync_mappings
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def sync_mappings():
+def sync_production_mappings():
     """새로운 쿠폰 매칭을 PostgreSQL에 추가합니다."""
     # 추가할 매칭 데이터 (하드코딩)
     new_mappings = [
@@ -59,40 +61,13 @@ def sync_mappings():
             return False
         
         conn = psycopg2.connect(database_url)
-        cursor = conn.cursor()
-        
-        success_count = 0
         
-        for coupon_id, issuer_email in new_mappings:
-            try:
-                issuer_name = issuer_email.split('@')[0]
-                
-                # 발급자 정보 저장/업데이트
-                cursor.execute("""
-                    INSERT INTO coupon_issuers (name, email, created_at, updated_at)
-                    VALUES (%s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                    ON CONFLICT (email) DO UPDATE SET
-                        name = COALESCE(EXCLUDED.name, coupon_issuers.name),
-                        updated_at = CURRENT_TIMESTAMP
-                """, (issuer_name, issuer_email))
-                
-                # 쿠폰 매칭 추가
-                cursor.execute("""
-                    INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email, assigned_at)
-                    VALUES (%s, %s, CURRENT_TIMESTAMP)
-                    ON CONFLICT (coupon_id, issuer_email) DO NOTHING
-                """, (coupon_id, issuer_email))
-                
-                success_count += 1
-                logger.info(f"✓ 쿠폰 {coupon_id} → {issuer_email}")
-                
-            except Exception as e:
-                logger.error(f"✗ 쿠폰 {coupon_id} → {issuer_email}: {e}")
+        # 대상과 해시 요약을 비교해 달라진 매칭만 일괄 반영 (발급자 정보는 없으면 생성)
+        report = sync_mappings(conn, new_mappings, source_name="sync_production_mappings")
         
-        conn.commit()
         conn.close()
         
-        logger.info(f"동기화 완료: {success_count}개 성공")
+        logger.info(f"동기화 완료: {report['upserted']}개 반영")
         return True
         
     except Exception as e:
@@ -100,4 +75,4 @@ def sync_mappings():
         return False
 
 if __name__ == "__main__":
-    sync_mappings()
+    sync_production_mappings()
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 임시 쿠폰 ID 시작값 (DB 쿠폰과 구분하기 위해 큰 숫자부터 시작)
+TEMP_COUPON_ID_START = 10000
+# 임시 쿠폰을 저장할 SQLite 파일 경로 (비어 있으면 메모리에만 보관, 재시작 시 사라짐)
+TEMP_COUPON_DB_PATH = os.getenv('TEMP_COUPON_DB_PATH', '')
+# 삭제된 ID를 기억하는 시간(초) - 이 시간 안에 도착한 늦은 동기화 메시지로는 되살아나지 않습니다.
+TEMP_COUPON_DELETED_TTL = float(os.getenv('TEMP_COUPON_DELETED_TTL', '86400'))
+
+TEMP_COUPON_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS temp_coupons (id INTEGER PRIMARY KEY, data TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS temp_coupon_deleted (id INTEGER PRIMARY KEY, deleted_at REAL)',
+]
+
+class TempCouponStore:
+    """임시 쿠폰 저장소
+
+    ID별 dict에 보관하므로 조회/수정/삭제가 쿠폰 수와 관계없이 O(1)이고, dict의 삽입 순서로
+    생성 순서대로 순회합니다. 삭제된 ID는 따로 기록해 늦게 도착한 워커 동기화 메시지로 되살아나지
+    않게 합니다. (TEMP_COUPON_DELETED_TTL 동안만 보관) 경로를 주면 변경할 때마다 SQLite(WAL)에 기록하고 시작할 때 다시 읽습니다.
+    """
+
+    def __init__(self, factory: Callable[..., Any], path: str = TEMP_COUPON_DB_PATH, id_start: int = TEMP_COUPON_ID_START,
+                 deleted_ttl: float = TEMP_COUPON_DELETED_TTL):
+        self._factory = factory
+        self._coupons: Dict[int, Any] = {}
+        # 삭제된 ID -> 삭제 시각
+        # 삭제 ID -> 삭제 시각 (삭제 순서대로 유지하므로 만료는 앞에서부터 확인)
+        self._deleted: 'OrderedDict[int, float]' = OrderedDict()
+        self._deleted_ttl = deleted_ttl
+        self._next_id = id_start
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._open(path)
+
+    @property
+    def persistent(self) -> bool:
+        return self._conn is not None
+
+    def _open(self, path: str):
+        try:
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            for statement in TEMP_COUPON_SCHEMA:
+                conn.execute(statement)
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(temp_coupon_deleted)')]
+            if 'deleted_at' not in columns:
+                conn.execute('ALTER TABLE temp_coupon_deleted ADD COLUMN deleted_at REAL')
+            for coupon_id, data in conn.execute('SELECT id, data FROM temp_coupons ORDER BY id'):
+                self._coupons[coupon_id] = self._factory(**json.loads(data))
+            # 삭제 시각이 없는 예전 기록은 지금 삭제된 것으로 봅니다.
+            now = time.time()
+            conn.execute('UPDATE temp_coupon_deleted SET deleted_at = ? WHERE deleted_at IS NULL', (now,))
+            self._deleted.update(
+                (coupon_id, deleted_at or now)
+                for coupon_id, deleted_at in conn.execute('SELECT id, deleted_at FROM temp_coupon_deleted ORDER BY deleted_at, id')
+            )
+            known_ids = list(self._coupons) + list(self._deleted)
+            if known_ids:
+                self._next_id = max(self._next_id, max(known_ids) + 1)
+            self._conn = conn
+            logger.info(f"임시 쿠폰 {len(self._coupons)}개를 불러왔습니다: {path}")
+        except Exception as e:
+            logger.error(f"임시 쿠폰 저장 파일 열기 실패, 메모리에만 보관합니다: {e}")
+
+    def allocate_id(self) -> int:
+        with self._lock:
+            coupon_id = self._next_id
+            self._next_id += 1
+            return coupon_id
+
+    def get(self, coupon_id: int) -> Optional[Any]:
+        return self._coupons.get(coupon_id)
+
+    def list(self) -> List[Any]:
+        with self._lock:
+            return list(self._coupons.values())
+
+    def __len__(self) -> int:
+        return len(self._coupons)
+
+    def add(self, coupon: Any, persist: bool = True) -> bool:
+        """쿠폰을 추가하거나 같은 ID의 쿠폰을 교체합니다. 이미 삭제된 ID면 무시하고 False를 반환합니다."""
+        with self._lock:
+            if coupon.id in self._deleted:
+                return False
+            self._coupons[coupon.id] = coupon
+            if coupon.id >= self._next_id:
+                self._next_id = coupon.id + 1
+            if persist:
+                self._execute(
+                    'INSERT OR REPLACE INTO temp_coupons (id, data) VALUES (?, ?)',
+                    (coupon.id, json.dumps(coupon.model_dump(), ensure_ascii=False))
+                )
+            return True
+
+    def replace(self, coupon_id: int, coupon: Any) -> bool:
+        """기존 쿠폰만 교체합니다. 없는 ID면 False를 반환합니다."""
+        with self._lock:
+            if coupon_id not in self._coupons:
+                return False
+        coupon.id = coupon_id
+        return self.add(coupon)
+
+    def delete(self, coupon_id: int, persist: bool = True) -> Optional[Any]:
+        """쿠폰을 삭제하고 삭제된 쿠폰을 반환합니다. (없으면 None)"""
+        with self._lock:
+            now = time.time()
+            # 다시 삭제된 ID는 맨 뒤로 옮겨 삭제 시각 순서를 유지합니다.
+            self._deleted[coupon_id] = now
+            self._deleted.move_to_end(coupon_id)
+            coupon = self._coupons.pop(coupon_id, None)
+            if persist:
+                self._execute('DELETE FROM temp_coupons WHERE id = ?', (coupon_id,))
+                self._execute('INSERT OR REPLACE INTO temp_coupon_deleted (id, deleted_at) VALUES (?, ?)', (coupon_id, now))
+            self._expire_deleted(now)
+            return coupon
+
+    def snapshot(self) -> Tuple[List[Any], List[int]]:
+        """(현재 쿠폰 목록, 삭제된 ID 목록)을 반환합니다."""
+        with self._lock:
+            self._expire_deleted(time.time())
+            return list(self._coupons.values()), list(self._deleted)
+
+    def _expire_deleted(self, now: float):
+        """보관 시간이 지난 삭제 ID를 잊습니다. (잠금을 잡은 상태에서 호출)
+
+        _deleted는 삭제 시각 순서이므로 앞에서부터 만료되지 않은 첫 항목까지만 확인합니다.
+        """
+        cutoff = now - self._deleted_ttl
+        expired = False
+        while self._deleted and next(iter(self._deleted.values())) < cutoff:
+            self._deleted.popitem(last=False)
+            expired = True
+        if expired:
+            self._execute('DELETE FROM temp_coupon_deleted WHERE deleted_at < ?', (cutoff,))
+
+    def _execute(self, query: str, params: tuple):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(query, params)
+        except Exception as e:
+            logger.error(f"임시 쿠폰 저장 실패: {e}")
@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+logger = logging.getLogger(__name__)
+
+# uvicorn/gunicorn 워커 수 (Procfile의 --workers와 같은 값)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+# auto: 워커가 2개 이상일 때만 사용, true/false: 강제 설정
+WORKER_BUS_ENABLED = os.getenv('WORKER_BUS_ENABLED', 'auto').lower()
+WORKER_BUS_RECONNECT_MAX = float(os.getenv('WORKER_BUS_RECONNECT_MAX', '30'))
+WORKER_BUS_KEEPALIVE = float(os.getenv('WORKER_BUS_KEEPALIVE', '30'))
+
+# 워커 간 메시지 채널 (payload: {"origin", "topic", "data"} JSON)
+WORKER_BUS_CHANNEL = 'coupon_tracker_worker_bus'
+# NOTIFY payload 최대 크기는 8000바이트
+WORKER_BUS_PAYLOAD_LIMIT = 7900
+
+def _bus_enabled() -> bool:
+    if WORKER_BUS_ENABLED == 'auto':
+        return WEB_CONCURRENCY > 1
+    return WORKER_BUS_ENABLED == 'true'
+
+class WorkerBus:
+    """같은 서비스의 워커 프로세스끼리 PostgreSQL NOTIFY로 변경 사항을 주고받는 채널
+
+    각 워커는 백그라운드 스레드에서 LISTEN하고, 토픽별 핸들러를 수신 스레드에서 호출합니다.
+    자기 자신이 보낸 메시지는 무시합니다. 연결이 끊겼다 다시 붙으면 그 사이 메시지를 놓쳤을 수
+    있으므로 on_connect 훅으로 상태를 다시 맞춥니다.
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = _bus_enabled() if enabled is None else enabled
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._handlers: Dict[str, List[Callable[[Dict], None]]] = defaultdict(list)
+        self._connect_hooks: List[Callable[[], None]] = []
+        self._database_url = None
+        self._listening = False
+        self._listener = None
+        self._stop = threading.Event()
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._stats = {'published': 0, 'received': 0, 'dropped': 0, 'handler_errors': 0, 'reconnects': 0}
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self._listening
+
+    def subscribe(self, topic: str, handler: Callable[[Dict], None]):
+        """다른 워커가 보낸 topic 메시지를 받을 핸들러를 등록합니다. (수신 스레드에서 호출됨)"""
+        self._handlers[topic].append(handler)
+
+    def on_connect(self, hook: Callable[[], None]):
+        """LISTEN 연결(재연결 포함) 직후 호출할 훅을 등록합니다."""
+        self._connect_hooks.append(hook)
+
+    def publish(self, topic: str, data: Dict) -> bool:
+        """다른 워커들에게 메시지를 보냅니다. 버스를 사용하지 않으면 아무것도 하지 않습니다."""
+        if not self.active:
+            return False
+        payload = json.dumps({'origin': self.worker_id, 'topic': topic, 'data': data}, ensure_ascii=False, default=str)
+        if len(payload.encode('utf-8')) > WORKER_BUS_PAYLOAD_LIMIT:
+            logger.warning(f"워커 메시지가 너무 커서 전송하지 않습니다: {topic} ({len(payload)}자)")
+            self._stats['dropped'] += 1
+            return False
+        try:
+            with self._publish_lock:
+                cursor = self._get_publish_connection().cursor()
+                cursor.execute("SELECT pg_notify(%s, %s)", (WORKER_BUS_CHANNEL, payload))
+            self._stats['published'] += 1
+            return True
+        except Exception as e:
+            logger.error(f"워커 메시지 전송 실패: {topic}: {e}")
+            self._close_publish_connection()
+            self._stats['dropped'] += 1
+            return False
+
+    def next_id(self, sequence: str, start: int) -> int:
+        """워커 간에 겹치지 않는 ID를 PostgreSQL 시퀀스에서 발급합니다. 실패하면 예외를 그대로 올립니다."""
+        try:
+            with self._publish_lock:
+                cursor = self._get_publish_connection().cursor()
+                cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence} START WITH {int(start)}")
+                cursor.execute("SELECT nextval(%s)", (sequence,))
+                return cursor.fetchone()[0]
+        except Exception:
+            self._close_publish_connection()
+            raise
+
+    def _get_publish_connection(self):
+        if self._publish_conn is None or self._publish_conn.closed:
+            self._publish_conn = psycopg2.connect(self._database_url, connect_timeout=5)
+            self._publish_conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        return self._publish_conn
+
+    def _close_publish_connection(self):
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                try:
+                    self._publish_conn.close()
+                except Exception:
+                    pass
+                self._publish_conn = None
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'listening': self._listening,
+            'worker_id': self.worker_id,
+            'web_concurrency': WEB_CONCURRENCY,
+            **self._stats
+        }
+
+    def start(self, database_url: Optional[str]):
+        """수신 스레드를 시작합니다. 버스가 꺼져 있으면 단일 워커처럼 동작합니다.
+
+        버스가 켜져 있는데 DATABASE_URL이 없으면 워커 간 ID 발급/동기화를 할 수 없으므로 시작을 거부합니다.
+        """
+        if not self.enabled or self._listener is not None:
+            return
+        if not database_url:
+            raise RuntimeError("멀티 워커 모드(WEB_CONCURRENCY>1 또는 WORKER_BUS_ENABLED=true)에는 DATABASE_URL이 필요합니다.")
+        self._database_url = database_url
+        self._listener = threading.Thread(target=self._listen_loop, name="worker-bus-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        self._close_publish_connection()
+
+    def _listen_loop(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self._database_url, connect_timeout=5)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {WORKER_BUS_CHANNEL}")
+                self._listening = True
+                backoff = 1.0
+                logger.info(f"워커 간 동기화 채널 수신 시작: {self.worker_id}")
+                for hook in self._connect_hooks:
+                    self._call(hook)
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], WORKER_BUS_KEEPALIVE) == ([], [], []):
+                        # 메시지가 없으면 연결이 살아있는지만 확인
+                        # (이 쿼리 중에 온 메시지는 conn.notifies에 쌓이고 소켓은 다시 readable이 되지 않으므로 아래에서 함께 처리)
+                        cursor.execute("SELECT 1")
+                    else:
+                        conn.poll()
+                    notifies = list(conn.notifies)
+                    conn.notifies.clear()
+                    for notify in notifies:
+                        self._dispatch(notify.payload)
+            except Exception as e:
+                logger.error(f"워커 간 동기화 채널 연결 실패: {e}")
+            finally:
+                self._listening = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            if self._stop.wait(backoff):
+                break
+            self._stats['reconnects'] += 1
+            backoff = min(backoff * 2, WORKER_BUS_RECONNECT_MAX)
+
+    def _dispatch(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"알 수 없는 워커 메시지: {payload[:100]}")
+            return
+        if message.get('origin') == self.worker_id:
+            return
+        self._stats['received'] += 1
+        for handler in self._handlers.get(message.get('topic'), []):
+            self._call(handler, message.get('data') or {})
+
+    def _call(self, func: Callable, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            self._stats['handler_errors'] += 1
+            logger.error(f"워커 메시지 처리 실패: {e}")
+
+# 전역 워커 버스 인스턴스
+worker_bus = WorkerBus()
@@ -51,6 +51,7 @@ import {
   fetchCoupons, 
   fetchCouponNames, 
   fetchStoreNames, 
+  fetchBootstrap,
   PaginatedCoupons 
 } from '../services/api';
 import html2canvas from 'html2canvas';
@@ -187,6 +188,16 @@ export const CouponList: React.FC<CouponListProps> = ({ onEditCoupon, refreshTri
     }
   }, [teamId]);
 
+  // 쿠폰명/지점명 필터 목록 불러오기 (팀 페이지는 첫 쿠폰 목록 조회의 bootstrap 요청에서 함께 받음)
+  const loadFilterOptions = useCallback(() => {
+    if (teamId) return;
+    loadCouponNames();
+    loadStoreNames();
+  }, [teamId, loadCouponNames, loadStoreNames]);
+
+  // 첫 쿠폰 목록을 bootstrap 요청으로 받은 팀 ID (이후 페이지/필터 변경은 개별 쿠폰 API 사용)
+  const bootstrappedTeamRef = useRef<string | null>(null);
+
   // 쿠폰발행자 목록 로딩 함수 추가
   const loadOwnerNames = useCallback(async () => {
     try {
@@ -263,6 +274,33 @@ export const CouponList: React.FC<CouponListProps> = ({ onEditCoupon, refreshTri
         return ownerNameToEmailMap[name] || name;
       }).filter(email => email && email.includes('@'));
 
+      const issuer = selectedIssuerEmails.length > 0 ? selectedIssuerEmails.join(',') : undefined;
+
+      // 팀 페이지 첫 로딩은 현재 페이지/필터의 쿠폰 목록과 쿠폰명/지점명 필터 목록을 한 번의 요청으로 불러오기
+      if (teamId && bootstrappedTeamRef.current !== teamId) {
+        const bootstrap = await fetchBootstrap(teamId, {
+          include: ['coupons', 'coupon_names', 'stores'],
+          page: currentPage,
+          size: 100,
+          search: searchTerm || undefined,
+          couponNames: selectedCouponNames.length > 0 ? selectedCouponNames : undefined,
+          storeNames: selectedStores.length > 0 ? selectedStores : undefined,
+          issuer,
+          unassigned: onlyUnassigned
+        });
+        bootstrappedTeamRef.current = teamId;
+        if (bootstrap.coupon_names) setAvailableCouponNames(bootstrap.coupon_names);
+        if (bootstrap.stores) setStoreNames(bootstrap.stores);
+        if (Object.keys(bootstrap.errors).length > 0) {
+          console.error('첫 페이지 데이터 일부 로딩 실패:', bootstrap.errors);
+        }
+        if (bootstrap.coupons) {
+          setData(bootstrap.coupons);
+          return;
+        }
+        // 쿠폰 목록만 실패한 경우 아래 개별 조회로 다시 시도
+      }
+
       const data: PaginatedCoupons = await fetchCoupons(
         currentPage,
         100,
@@ -270,7 +308,7 @@ export const CouponList: React.FC<CouponListProps> = ({ onEditCoupon, refreshTri
         selectedCouponNames.length > 0 ? selectedCouponNames.join(',') : undefined,
         selectedStores.length > 0 ? selectedStores.join(',') : undefined,
         teamId,
-        selectedIssuerEmails.length > 0 ? selectedIssuerEmails.join(',') : undefined,
+        issuer,
         onlyUnassigned || undefined
       );
 
@@ -285,13 +323,12 @@ export const CouponList: React.FC<CouponListProps> = ({ onEditCoupon, refreshTri
   }, [currentPage, searchTerm, selectedCouponNames, selectedStores, teamId, selectedOwners, onlyUnassigned]);
 
   useEffect(() => {
-    loadCouponNames();
-    loadStoreNames();
+    loadFilterOptions();
     loadCouponOwnersFromLocalStorage();
     if (teamId === 'teamb') {
       loadOwnerNames();
     }
-  }, [teamId, loadCouponNames, loadStoreNames, loadCouponOwnersFromLocalStorage, loadOwnerNames]);
+  }, [teamId, loadFilterOptions, loadCouponOwnersFromLocalStorage, loadOwnerNames]);
 
   // 메인 데이터 로딩 useEffect를 분리하여 불필요한 재호출 방지
   useEffect(() => {
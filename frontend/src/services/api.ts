@@ -229,4 +229,62 @@ export const fetchStatistics = async (teamId?: string): Promise<StatisticsRespon
     throw new Error('통계 데이터를 가져오는데 실패했습니다.');
   }
   return response.json();
-}; 
\ No newline at end of file
+}; 
+
+export interface BootstrapOptions {
+  include?: Array<'coupons' | 'coupon_names' | 'stores' | 'statistics'>;
+  page?: number;
+  size?: number;
+  search?: string;
+  couponNames?: string[];
+  storeNames?: string[];
+  issuer?: string;
+  unassigned?: boolean;
+}
+
+export interface BootstrapResponse {
+  team_id: string;
+  coupons?: PaginatedCoupons | null;
+  coupon_names?: string[] | null;
+  stores?: string[] | null;
+  statistics?: StatisticsResponse | null;
+  errors: Record<string, string>;
+}
+
+// 팀 페이지 첫 로딩용 일괄 조회 (쿠폰 목록, 쿠폰명, 지점명, 통계를 한 번의 요청으로)
+export const fetchBootstrap = async (teamId: string, options: BootstrapOptions = {}): Promise<BootstrapResponse> => {
+  const response = await fetch(`${API_BASE_URL}/api/teams/${teamId}/bootstrap`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      include: options.include,
+      page: options.page,
+      size: options.size,
+      search: options.search,
+      coupon_names: options.couponNames,
+      store_names: options.storeNames,
+      issuer: options.issuer,
+      unassigned: options.unassigned,
+    }),
+  });
+  if (!response.ok) {
+    throw new Error('페이지 데이터를 가져오는데 실패했습니다.');
+  }
+  return response.json();
+};
+
+export interface CouponChangesResponse {
+  coupons: Coupon[];
+  token: string;
+  reset: boolean;
+}
+
+// 팀 쿠폰 변경분 조회 (since 토큰 이후 바뀐 쿠폰만, reset이면 목록을 다시 불러와야 함)
+export const fetchCouponChanges = async (teamId: string, since?: string): Promise<CouponChangesResponse> => {
+  const params = since ? `?since=${encodeURIComponent(since)}` : '';
+  const response = await fetch(`${API_BASE_URL}/api/teams/${teamId}/coupons/changes${params}`);
+  if (!response.ok) {
+    throw new Error('쿠폰 변경분을 가져오는데 실패했습니다.');
+  }
+  return response.json();
+};
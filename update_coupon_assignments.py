@@ -4,9 +4,13 @@
 """
 
 import sqlite3
-import csv
 import os
-from datetime import datetime
+import sys
+
+# 백엔드 모듈을 import하기 위해 경로 추가
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from mapping_bulk_loader import load_mappings_csv
 
 def update_coupon_assignments():
     """CSV 파일의 데이터로 coupon_issuer_mapping 테이블을 업데이트합니다."""
@@ -24,88 +28,20 @@ def update_coupon_assignments():
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        print("=== 기존 쿠폰 할당 데이터 삭제 ===")
-        # 기존 쿠폰 할당 데이터 모두 삭제
-        cursor.execute("DELETE FROM coupon_issuer_mapping")
-        deleted_count = cursor.rowcount
-        print(f"삭제된 기존 할당 수: {deleted_count}")
-        
-        print("\n=== CSV 파일 읽기 ===")
-        # CSV 파일 읽기
-        new_assignments = []
-        skipped_count = 0
-        with open(csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                coupon_id = row['id'].strip()
-                issuer_email = row['issuer'].strip()
-                
-                # 빈 값이나 잘못된 데이터 건너뛰기
-                if not coupon_id or not issuer_email or issuer_email == '%':
-                    skipped_count += 1
-                    continue
-                    
-                try:
-                    coupon_id = int(coupon_id)
-                    new_assignments.append((coupon_id, issuer_email))
-                except ValueError:
-                    skipped_count += 1
-                    continue
-        
-        print(f"CSV에서 읽은 유효한 할당 수: {len(new_assignments)}")
-        print(f"건너뛴 잘못된 데이터 수: {skipped_count}")
-        
-        print("\n=== 발행자 존재 여부 확인 ===")
-        # 모든 발행자 이메일 조회
-        cursor.execute("SELECT email FROM coupon_issuers")
-        existing_issuers = {row[0] for row in cursor.fetchall()}
-        print(f"데이터베이스에 등록된 발행자 수: {len(existing_issuers)}")
-        
-        # 유효한 발행자만 필터링
-        valid_assignments = []
-        invalid_issuers = set()
-        for coupon_id, issuer_email in new_assignments:
-            if issuer_email in existing_issuers:
-                valid_assignments.append((coupon_id, issuer_email))
-            else:
-                invalid_issuers.add(issuer_email)
-        
-        print(f"유효한 할당 수: {len(valid_assignments)}")
-        if invalid_issuers:
-            print(f"⚠️ 등록되지 않은 발행자 ({len(invalid_issuers)}명): {list(invalid_issuers)[:5]}...")
-        
-        print("\n=== 새 할당 데이터 삽입 ===")
-        # 새 할당 데이터 삽입
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        insert_query = """
-        INSERT INTO coupon_issuer_mapping (coupon_id, issuer_email, assigned_at)
-        VALUES (?, ?, ?)
-        """
-        
-        inserted_count = 0
-        error_count = 0
-        for coupon_id, issuer_email in valid_assignments:
-            try:
-                cursor.execute(insert_query, (coupon_id, issuer_email, current_time))
-                inserted_count += 1
-                if inserted_count <= 5:  # 처음 5개만 출력
-                    print(f"  ✓ 삽입: 쿠폰 {coupon_id} → {issuer_email}")
-                elif inserted_count == 6:
-                    print("  ...")
-            except sqlite3.IntegrityError as e:
-                error_count += 1
-                if error_count <= 3:  # 처음 3개 오류만 출력
-                    print(f"  ⚠️ 중복 또는 오류: 쿠폰 {coupon_id} → {issuer_email} - {e}")
-                continue
+        print("=== CSV 일괄 적재 (스테이징 → 검증 → 병합) ===")
+        # CSV에 없는 쿠폰의 기존 할당은 삭제하여 전체 교체와 동일한 결과를 만듭니다.
+        report = load_mappings_csv(conn, csv_path, delete_missing=True)
         
-        # 변경사항 커밋
-        conn.commit()
+        print(f"CSV 행 수: {report['rows']}")
+        print(f"건너뛴 잘못된 데이터 수: {report['skipped_invalid']}")
+        if report['skipped_unknown_issuer']:
+            print(f"⚠️ 등록되지 않은 발행자로 건너뛴 할당 수: {report['skipped_unknown_issuer']}")
+        if report['skipped_duplicate']:
+            print(f"⚠️ 중복 쿠폰 ID로 건너뛴 행 수 (마지막 행 적용): {report['skipped_duplicate']}")
         
-        print(f"\n=== 완료 ===")
-        print(f"✅ 총 {inserted_count}개의 쿠폰 할당이 성공적으로 삽입되었습니다.")
-        if error_count > 0:
-            print(f"⚠️ {error_count}개의 할당에서 오류가 발생했습니다.")
+        print(f"\n=== 완료 ({report['elapsed_seconds']}초) ===")
+        print(f"✅ 신규 {report['inserted']}개, 재할당 {report['updated']}개, 변경 없음 {report['unchanged']}개")
+        print(f"🗑️ CSV에 없어 삭제된 기존 할당 수: {report['deleted']}")
         
         # 결과 확인
         cursor.execute("SELECT COUNT(*) FROM coupon_issuer_mapping")
@@ -2,14 +2,24 @@
 """
 쿠폰 매칭 결과 검증 스크립트
 추가된 쿠폰 매칭이 정상적으로 저장되었는지 상세히 확인합니다.
+
+사용법: python verify_mappings.py [--postgres] [--full]
+  --postgres  로컬 SQLite 대신 DATABASE_URL의 PostgreSQL을 검증
+  --full      CSV에 없는 쿠폰의 매칭(초과분)도 함께 보고
 """
 
 import sqlite3
-import csv
+import psycopg2
 import sys
 import os
 import logging
 
+# 백엔드 모듈을 import하기 위해 경로 추가
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from mapping_bulk_loader import read_mapping_csv
+from mapping_verifier import verify_mappings
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -17,11 +27,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_db_connection(db_path="backend/issuer_database.db"):
-    """SQLite 데이터베이스 연결을 반환합니다."""
+DB_PATH = "backend/issuer_database.db"
+
+def get_db_connection(use_postgres=False, db_path=DB_PATH):
+    """검증 대상 데이터베이스 연결을 반환합니다. (기본: SQLite)"""
+    if use_postgres:
+        return psycopg2.connect(os.getenv("DATABASE_URL"))
     return sqlite3.connect(db_path)
 
-def verify_csv_mappings():
+def verify_csv_mappings(conn, include_extra=False):
     """CSV 파일의 매칭이 데이터베이스에 정상적으로 저장되었는지 확인합니다."""
     csv_file_path = "임직원 쿠폰 매칭 추가_2508.csv"
     
@@ -30,49 +44,35 @@ def verify_csv_mappings():
         return False
     
     # CSV 파일에서 매칭 데이터 읽기
-    csv_mappings = []
-    with open(csv_file_path, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            coupon_id = int(row['id'])
-            issuer_email = row['issuer']
-            csv_mappings.append((coupon_id, issuer_email))
-    
+    csv_mappings = list(read_mapping_csv(csv_file_path))
     logger.info(f"CSV 파일에서 {len(csv_mappings)}개의 매칭을 읽었습니다.")
     
-    # 데이터베이스에서 확인
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    verified_count = 0
-    missing_count = 0
+    # 매핑 테이블을 한 번 조회해 집합 연산으로 비교
+    report = verify_mappings(conn, csv_mappings, include_extra=include_extra)
     
     logger.info("=== 매칭 검증 결과 ===")
-    
-    for coupon_id, issuer_email in csv_mappings:
-        cursor.execute("""
-            SELECT COUNT(*) FROM coupon_issuer_mapping 
-            WHERE coupon_id = ? AND issuer_email = ?
-        """, (coupon_id, issuer_email))
-        
-        exists = cursor.fetchone()[0] > 0
-        
-        if exists:
-            verified_count += 1
-            logger.info(f"✓ 쿠폰 {coupon_id} → {issuer_email}")
-        else:
-            missing_count += 1
-            logger.error(f"✗ 쿠폰 {coupon_id} → {issuer_email} (누락됨)")
-    
-    conn.close()
-    
-    logger.info(f"\n검증 완료: {verified_count}개 확인됨, {missing_count}개 누락됨")
-    return missing_count == 0
+    for coupon_id, issuer_email in report['matched']:
+        logger.info(f"✓ 쿠폰 {coupon_id} → {issuer_email}")
+    for coupon_id, issuer_email in report['missing']:
+        logger.error(f"✗ 쿠폰 {coupon_id} → {issuer_email} (누락됨)")
+    for coupon_id, issuer_email, actual_emails in report['mismatched']:
+        logger.error(f"✗ 쿠폰 {coupon_id} → {issuer_email} (실제: {', '.join(actual_emails)})")
+    for coupon_id, issuer_email in report['extra']:
+        logger.warning(f"? 쿠폰 {coupon_id} → {issuer_email} (CSV에 없음)")
+    if report['skipped_rows']:
+        logger.warning(f"잘못되었거나 중복된 CSV 행 {report['skipped_rows']}개는 건너뛰었습니다.")
+    
+    logger.info(
+        f"\n검증 완료: {len(report['matched'])}개 확인됨, {len(report['missing'])}개 누락됨, "
+        f"{len(report['mismatched'])}개 불일치"
+        + (f", {len(report['extra'])}개 초과" if include_extra else "")
+    )
+    return not report['missing'] and not report['mismatched']
 
-def show_issuer_summary():
+def show_issuer_summary(conn):
     """발급자별 할당된 쿠폰 수를 요약해서 보여줍니다."""
-    conn = get_db_connection()
     cursor = conn.cursor()
+    is_sqlite = isinstance(conn, sqlite3.Connection)
     
     # 새로 추가된 발급자들의 쿠폰 할당 현황
     query = """
@@ -80,7 +80,7 @@ def show_issuer_summary():
         ci.name,
         ci.email,
         COUNT(cim.coupon_id) as coupon_count,
-        GROUP_CONCAT(cim.coupon_id) as coupon_ids
+        {} as coupon_ids
     FROM coupon_issuers ci
     LEFT JOIN coupon_issuer_mapping cim ON ci.email = cim.issuer_email
     WHERE ci.email IN (
@@ -92,7 +92,7 @@ def show_issuer_summary():
     )
     GROUP BY ci.name, ci.email
     ORDER BY ci.email
-    """
+    """.format("GROUP_CONCAT(cim.coupon_id)" if is_sqlite else "string_agg(cim.coupon_id::text, ',')")
     
     cursor.execute(query)
     results = cursor.fetchall()
@@ -111,13 +111,11 @@ def show_issuer_summary():
         total_coupons += coupon_count
     
     logger.info(f"총 할당된 쿠폰 수: {total_coupons}개")
-    
-    conn.close()
 
-def show_database_stats():
+def show_database_stats(conn):
     """데이터베이스 전체 통계를 보여줍니다."""
-    conn = get_db_connection()
     cursor = conn.cursor()
+    today = "DATE('now')" if isinstance(conn, sqlite3.Connection) else "CURRENT_DATE"
     
     # 전체 발급자 수
     cursor.execute("SELECT COUNT(*) FROM coupon_issuers")
@@ -128,9 +126,9 @@ def show_database_stats():
     total_mappings = cursor.fetchone()[0]
     
     # 오늘 추가된 매칭 수
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT COUNT(*) FROM coupon_issuer_mapping 
-        WHERE DATE(assigned_at) = DATE('now')
+        WHERE DATE(assigned_at) = {today}
     """)
     today_mappings = cursor.fetchone()[0]
     
@@ -138,27 +136,35 @@ def show_database_stats():
     logger.info(f"총 발급자 수: {total_issuers}명")
     logger.info(f"총 쿠폰 매칭 수: {total_mappings}개")
     logger.info(f"오늘 추가된 매칭: {today_mappings}개")
-    
-    conn.close()
 
 def main():
     """메인 실행 함수"""
     logger.info("=== 쿠폰 매칭 결과 검증 시작 ===")
     
-    # 데이터베이스 파일 존재 확인
-    db_path = "backend/issuer_database.db"
-    if not os.path.exists(db_path):
-        logger.error(f"데이터베이스 파일을 찾을 수 없습니다: {db_path}")
-        return False
-    
-    # 1. CSV 매칭 검증
-    csv_verified = verify_csv_mappings()
+    flags = set(sys.argv[1:])
+    use_postgres = '--postgres' in flags
     
-    # 2. 발급자별 요약
-    show_issuer_summary()
+    # 데이터베이스 존재 확인
+    if use_postgres:
+        if not os.getenv("DATABASE_URL"):
+            logger.error("DATABASE_URL 환경 변수가 설정되지 않았습니다.")
+            return False
+    elif not os.path.exists(DB_PATH):
+        logger.error(f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
+        return False
     
-    # 3. 데이터베이스 통계
-    show_database_stats()
+    conn = get_db_connection(use_postgres)
+    try:
+        # 1. CSV 매칭 검증
+        csv_verified = verify_csv_mappings(conn, include_extra='--full' in flags)
+        
+        # 2. 발급자별 요약
+        show_issuer_summary(conn)
+        
+        # 3. 데이터베이스 통계
+        show_database_stats(conn)
+    finally:
+        conn.close()
     
     logger.info("=== 검증 완료 ===")
     return csv_verified